@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import date
 import pandas as pd
+import pyarrow as pa
+import hashlib
+import io
+import threading
+import time
 import os
+from src import draft_matrices, historical_store, preprocess_cache, sqlite_store
 
 app = FastAPI(title="MLBB historical Data API")
 
@@ -12,20 +21,257 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count"],
 )
 
-# Ruta relativa al CSV (local o actualizable)
+# Ruta relativa al histórico (dataset Parquet; CSV legado como respaldo)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE_PATH = os.path.join(BASE_DIR, "data", "mobile_legends_data_historical.csv")
+DATA_FILE_PATH = historical_store.DATASET_DIR
+LEGACY_CSV_PATH = os.path.join(BASE_DIR, "data", "mobile_legends_data_historical.csv")
+
+# Cada cuántos segundos se comprueba si el histórico cambió en disco
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Formatos de respuesta de /data (parámetro format= o cabecera Accept)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+STREAM_CHUNK_ROWS = 1000
+
+# ----------------------------------------------------
+# --- SNAPSHOT EN MEMORIA CON RECARGA AL CAMBIAR ---
+# ----------------------------------------------------
+
+class HistoricalSnapshot:
+    """
+    Histórico preprocesado en memoria. Se recarga (y se sustituye de golpe) solo
+    cuando cambia la versión del origen (huella de las particiones o del CSV).
+    """
+
+    def __init__(self):
+        self.df = None
+        self.version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resolve_source():
+        if historical_store.list_partition_dates(DATA_FILE_PATH):
+            return DATA_FILE_PATH
+        if os.path.exists(LEGACY_CSV_PATH):
+            return LEGACY_CSV_PATH
+        return None
+
+    def current(self):
+        """Devuelve (df, version), recargando si el origen cambió desde la última comprobación."""
+        now = time.monotonic()
+        if self.df is not None and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return self.df, self.version
+
+        with self._lock:
+            source = self.resolve_source()
+            if source is None:
+                return None, None
+            version = preprocess_cache.source_version(source)
+            if version != self.version or self.df is None:
+                df = preprocess_cache.load_preprocessed(source)
+                # Fechas como texto para serializar y filtrar sin conversiones por petición
+                df["extraction_date"] = df["extraction_date"].dt.strftime('%Y-%m-%d')
+                self.df, self.version = df, version
+            self._checked_at = now
+            return self.df, self.version
+
+snapshot = HistoricalSnapshot()
+
+class DraftSnapshot:
+    """
+    Modelo de draft en memoria (matrices de relaciones + rates actuales).
+    Se recarga solo cuando el fichero de matrices cambia en disco.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.model = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if self.model is not None and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return self.model
+
+        with self._lock:
+            path = self.path or draft_matrices.MATRICES_PATH
+            if not os.path.exists(path):
+                return None
+            fingerprint = preprocess_cache.file_fingerprint(path)
+            if fingerprint != self._fingerprint or self.model is None:
+                self.model = draft_matrices.DraftModel.load(path)
+                self._fingerprint = fingerprint
+            self._checked_at = now
+            return self.model
+
+draft_snapshot = DraftSnapshot()
+
+class SQLiteIndex:
+    """
+    Base SQLite indexada del histórico. Si está al día con el origen, /data
+    resuelve filtros, paginación y conteo en SQL sin cargar el histórico en
+    memoria; si no (o no existe), se usa el snapshot.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Versión de la base si está al día con el origen; None si hay que usar el snapshot."""
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return self.version
+
+        with self._lock:
+            source = HistoricalSnapshot.resolve_source()
+            self.version = None
+            if source is not None and sqlite_store.is_current(source, self.db_path):
+                self.version = f"sqlite-{sqlite_store.store_version(self.db_path)}"
+            self._checked_at = now
+            return self.version
+
+sqlite_index = SQLiteIndex()
+
+def filter_snapshot(df, start_date=None, end_date=None, hero=None, role=None, any_role=False):
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= df["extraction_date"] >= pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    if end_date:
+        mask &= df["extraction_date"] <= pd.Timestamp(end_date).strftime('%Y-%m-%d')
+    if hero:
+        ids = [int(h) for h in hero if str(h).isdigit()]
+        names = [str(h).lower() for h in hero if not str(h).isdigit()]
+        mask &= df["hero_id"].isin(ids) | df["hero_name"].str.lower().isin(names)
+    if role and any_role:
+        mask &= df["role"].str.lower().str.contains(role.lower(), regex=False)
+    elif role:
+        mask &= df["primary_role"].str.lower() == role.lower()
+    return df[mask]
+
+def make_etag(version, request, response_format):
+    key = f"{version}|{request.url.query}|{response_format}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+def negotiate_format(requested, accept_header):
+    """'json' (por defecto), 'ndjson' o 'arrow', según format= o la cabecera Accept."""
+    if requested:
+        return requested.lower()
+    accept = (accept_header or "").lower()
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    if NDJSON_MEDIA_TYPE in accept:
+        return "ndjson"
+    return "json"
+
+# ----------------------------------------------------
+# --- RESPUESTAS EN STREAMING ---
+# ----------------------------------------------------
+
+def iter_ndjson(df, chunk_rows=STREAM_CHUNK_ROWS):
+    """Genera el NDJSON por bloques de filas: el primer byte sale sin serializar todo."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n"
+
+def iter_arrow_stream(df, chunk_rows=STREAM_CHUNK_ROWS):
+    """Genera un stream Arrow IPC (esquema + record batches + fin de stream)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, table.schema)
+    for batch in table.to_batches(max_chunksize=chunk_rows):
+        writer.write_batch(batch)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
 
 @app.get("/data")
-def get_historical_data():
-    """Devuelve los datos históricos de MLBB en JSON"""
-    if not os.path.exists(DATA_FILE_PATH):
-        return {"error": "Archivo CSV no encontrado"}
-    
-    df = pd.read_csv(DATA_FILE_PATH)
-    # Convertir fechas a string para que JSON pueda serializar
-    if "extraction_date" in df.columns:
-        df["extraction_date"] = pd.to_datetime(df["extraction_date"]).dt.strftime('%Y-%m-%d')
-    return df.to_dict(orient="records")
\ No newline at end of file
+def get_historical_data(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Fecha final (YYYY-MM-DD)"),
+    hero: Optional[List[str]] = Query(None, description="Nombre o ID del héroe (repetible)"),
+    role: Optional[str] = Query(None, description="Rol principal del héroe"),
+    any_role: bool = Query(False, description="Buscar el rol en toda la lista de roles (sin índice)"),
+    columns: Optional[str] = Query(None, description="Columnas separadas por comas (de sqlite_store.COLUMNS)"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    response_format: Optional[str] = Query(None, alias="format", pattern="^(json|ndjson|arrow)$"),
+):
+    """
+    Devuelve los datos históricos de MLBB (filtrables, proyectables y paginados)
+    en JSON, NDJSON en streaming o stream Arrow IPC. Ambos orígenes (SQLite y
+    snapshot) devuelven el mismo esquema: las columnas de sqlite_store.COLUMNS.
+    """
+    try:
+        selected = sqlite_store.select_columns([c.strip() for c in columns.split(",")] if columns else None)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    version = sqlite_index.current()
+    df = None
+    if version is None:
+        df, version = snapshot.current()
+        if df is None:
+            return {"error": "Histórico no encontrado"}
+
+    response_format = negotiate_format(response_format, request.headers.get("accept"))
+    etag = make_etag(version, request, response_format)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if df is None:
+        # Consulta indexada: solo se leen las filas de la página pedida
+        hero_ids = [int(h) for h in hero or [] if str(h).isdigit()]
+        hero_names = [h for h in hero or [] if not str(h).isdigit()]
+        filters = dict(start_date=start_date, end_date=end_date, hero_ids=hero_ids, hero_names=hero_names,
+                       role=role, any_role=any_role, db_path=sqlite_index.db_path)
+        total = sqlite_store.count_history(**filters)
+        df = sqlite_store.query_history(columns=selected, limit=limit, offset=offset, parse_dates=False,
+                                        **filters)
+    else:
+        df = filter_snapshot(df, start_date, end_date, hero, role, any_role)
+        total = len(df)
+        df = df.reindex(columns=selected).iloc[offset: offset + limit if limit else None]
+    headers = {"ETag": etag, "X-Total-Count": str(total)}
+
+    if response_format == "ndjson":
+        return StreamingResponse(iter_ndjson(df), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    if response_format == "arrow":
+        return StreamingResponse(iter_arrow_stream(df), media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+    return Response(content=df.to_json(orient="records", force_ascii=False),
+                    media_type="application/json",
+                    headers=headers)
+
+@app.get("/draft/recommend")
+def recommend_draft_picks(
+    ally: Optional[List[str]] = Query(None, description="Aliados ya elegidos: nombre o ID (repetible)"),
+    enemy: Optional[List[str]] = Query(None, description="Enemigos ya elegidos: nombre o ID (repetible)"),
+    ban: Optional[List[str]] = Query(None, description="Héroes baneados: nombre o ID (repetible)"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Recomienda picks para un draft parcial: win/ban rate actuales más sinergias con
+    los aliados y counters/amenazas frente a los enemigos (matrices precompiladas).
+    """
+    model = draft_snapshot.current()
+    if model is None:
+        return {"error": "Matrices de draft no encontradas"}
+
+    start = time.perf_counter()
+    picks = model.recommend(ally, enemy, ban, limit)
+    return {"date": model.date, "picks": picks,
+            "unknown": [h for h in (ally or []) + (enemy or []) + (ban or []) if not model.positions([h])],
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
@@ -0,0 +1,75 @@
+"""
+Benchmark: tamaño de respuesta y tiempo de decodificación de /data por formato.
+
+Compara JSON (lista completa), NDJSON en streaming y stream Arrow IPC sobre el
+mismo histórico, midiendo bytes transferidos, tiempo hasta el primer byte,
+tiempo total de respuesta y tiempo de decodificación a DataFrame en el cliente.
+
+Uso:
+    python benchmarks/bench_api_formats.py --dataset data/historical
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+import api_mobilelegends as api
+from fastapi.testclient import TestClient
+
+DECODERS = {
+    "json": lambda content: pd.DataFrame(json.loads(content)),
+    "ndjson": lambda content: pd.read_json(io.BytesIO(content), lines=True),
+    "arrow": lambda content: pa.ipc.open_stream(content).read_pandas(),
+}
+
+
+def measure(client, response_format, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with client.stream("GET", "/data", params={"format": response_format}) as response:
+            chunks = response.iter_bytes()
+            first = next(chunks, b"")
+            ttfb = time.perf_counter() - start
+            content = first + b"".join(chunks)
+        total = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = DECODERS[response_format](content)
+        decode = time.perf_counter() - start
+
+        result = (ttfb, total, decode, len(content), len(df))
+        best = result if best is None or result[1] < best[1] else best
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=api.DATA_FILE_PATH, help="Dataset Parquet o CSV histórico")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.dataset.lower().endswith(".csv"):
+        api.DATA_FILE_PATH, api.LEGACY_CSV_PATH = os.path.join(parent_dir, "__sin_dataset__"), args.dataset
+    else:
+        api.DATA_FILE_PATH = args.dataset
+
+    client = TestClient(api.app)
+    client.get("/data", params={"limit": 1})  # Calienta el snapshot en memoria
+
+    print(f"{'formato':8} {'filas':>7} {'bytes':>12} {'TTFB (ms)':>10} {'total (ms)':>11} {'decode (ms)':>12}")
+    for response_format in ("json", "ndjson", "arrow"):
+        ttfb, total, decode, size, rows = measure(client, response_format, args.repeats)
+        print(f"{response_format:8} {rows:7d} {size:12,d} {ttfb * 1000:10.1f} {total * 1000:11.1f} {decode * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmark del arranque en frío de la carga de datos del dashboard (tiempo hasta el primer render).
+
+Cada medición corre en un proceso nuevo (imports y cachés vacías) y mide desde
+el inicio del proceso hasta tener el frame de análisis listo para dibujar:
+- before: orden anterior de load_data (GET bloqueante a la API con timeout=3,
+  luego histórico local, luego CSV remoto con engine='python') e import de
+  plotly.express al cargar el módulo.
+- after: src/data_sources.load_dashboard_data (orígenes locales primero, API y
+  export Parquet remoto del frame de análisis en paralelo, y copia local de la
+  descarga remota) con plotly importado después del primer render.
+
+Escenarios:
+- local: hay histórico local (dataset Parquet sintético). Se mide la segunda
+  carga: proceso nuevo pero caché de preprocesado en disco ya caliente, como
+  al reiniciar el dashboard.
+- remote: no hay histórico local; el CSV (before) y el export Parquet (after)
+  "remotos" los sirve un servidor HTTP local.
+- snapshot: como remote, pero tras una primera carga (la copia Parquet ya existe).
+
+La API se simula con --api-mode: 'hang' acepta la conexión y no responde (el
+caso en que el GET esperaba los 3 s enteros) y 'refused' usa un puerto cerrado.
+
+Uso:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --heroes 130 --days 365 --api-mode refused
+"""
+import argparse
+import contextlib
+import functools
+import http.server
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+SCENARIOS = ("local", "remote", "snapshot")
+RESULTS_DIR = os.path.join(parent_dir, "benchmarks", "results")
+
+
+# --- Proceso de medición (un escenario × una implementación) ------------------
+
+def legacy_load(api_url, csv_url):
+    """Cuerpo anterior de streamlit_dashboard.load_data (sin Streamlit)."""
+    import pandas as pd
+    import pyarrow as pa
+    import requests
+    from src import historical_store, preprocess_cache
+
+    try:
+        response = requests.get(api_url, timeout=3, headers={"Accept": "application/vnd.apache.arrow.stream"})
+        response.raise_for_status()
+        df = pa.ipc.open_stream(response.content).read_pandas()
+        df['extraction_date'] = pd.to_datetime(df['extraction_date'])
+        return df
+    except Exception:
+        try:
+            source = historical_store.DATASET_DIR if historical_store.list_partition_dates(historical_store.DATASET_DIR) \
+                else historical_store.LEGACY_CSV_PATH
+            return preprocess_cache.load_preprocessed(source)
+        except Exception:
+            df = pd.read_csv(csv_url, quotechar='"', engine='python')
+        return preprocess_cache.preprocess_history(df)
+
+
+def run_worker(impl, args):
+    start = time.perf_counter()
+    from src import historical_store, preprocess_cache
+
+    # Rutas de datos y cachés dentro del directorio de trabajo del escenario
+    historical_store.DATASET_DIR = args.dataset
+    historical_store.LEGACY_CSV_PATH = os.path.join(args.workdir, "__sin_csv__.csv")
+    preprocess_cache.CACHE_DIR = os.path.join(args.workdir, "cache", "preprocessed")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if impl == "before":
+            with contextlib.suppress(ImportError):
+                import plotly.express  # noqa: F401  (import al cargar el módulo del dashboard)
+            df = legacy_load(args.api_url, args.csv_url)
+            source = "?"
+        else:
+            from src import data_sources
+            data_sources.API_URL, data_sources.REMOTE_URL = args.api_url, args.remote_url
+            data_sources.REMOTE_SNAPSHOT_PATH = os.path.join(args.workdir, "cache", "remote_snapshot.parquet")
+            df, source = data_sources.load_dashboard_data()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"first_data_s": round(elapsed, 4), "rows": len(df), "source": source}), flush=True)
+    # Una petición que siga colgada en segundo plano no debe alargar el proceso
+    os._exit(0)
+
+
+# --- Servidores auxiliares ---------------------------------------------------
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_csv_server(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_hanging_api():
+    """Socket que acepta conexiones y nunca responde (API colgada o no accesible)."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(64)
+    accepted = []
+
+    def accept_forever():
+        with contextlib.suppress(OSError):
+            while True:
+                accepted.append(sock.accept()[0])
+
+    threading.Thread(target=accept_forever, daemon=True).start()
+    return sock, f"http://127.0.0.1:{sock.getsockname()[1]}/data"
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/data"
+
+
+def measure(impl, dataset, workdir, api_url, csv_url, remote_url):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", impl, "--dataset", dataset,
+               "--workdir", workdir, "--api-url", api_url, "--csv-url", csv_url, "--remote-url", remote_url]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=parent_dir)
+    lines = completed.stdout.strip().splitlines()
+    if not lines:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "error"}
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=int, default=130)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--api-mode", choices=("hang", "refused"), default="hang")
+    parser.add_argument("--output", default=None, help="Fichero JSON de resultados")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--dataset", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parser.add_argument("--csv-url", help=argparse.SUPPRESS)
+    parser.add_argument("--remote-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args)
+        return
+
+    from synthetic_history import generate_history, write_history
+
+    root = tempfile.mkdtemp(prefix="mlbb_cold_")
+    results = []
+    try:
+        df = generate_history(args.heroes, args.days)
+        dataset = os.path.join(root, "historical")
+        write_history(df, dataset)
+        write_history(df, os.path.join(root, "www", "historical.csv"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            from src import preprocess_cache
+            preprocess_cache.CACHE_DIR = os.path.join(root, "export_cache")
+            preprocess_cache.export_analysis_frame(dataset, os.path.join(root, "www", "analysis_frame.parquet"))
+        rows = len(df)
+        del df
+
+        csv_server, csv_base = start_csv_server(os.path.join(root, "www"))
+        api_socket = None
+        if args.api_mode == "hang":
+            api_socket, api_url = start_hanging_api()
+        else:
+            api_url = closed_port_url()
+        csv_url = f"{csv_base}/historical.csv"
+        remote_url = f"{csv_base}/analysis_frame.parquet"
+        no_dataset = os.path.join(root, "__sin_dataset__")
+
+        print(f"{args.heroes} héroes × {args.days} días ({rows} filas), API '{args.api_mode}'")
+        print(f"{'escenario':>9} {'implementación':>15} {'primer dato (s)':>16} {'origen':>9}")
+        for scenario in SCENARIOS:
+            for impl in ("before", "after"):
+                workdir = os.path.join(root, f"{scenario}_{impl}")
+                previous_cache = os.path.join(root, f"remote_{impl}", "cache")
+                if scenario == "snapshot" and os.path.isdir(previous_cache):
+                    # La carga 'remote' (ya medida) dejó la copia Parquet de la descarga remota
+                    shutil.copytree(previous_cache, os.path.join(workdir, "cache"), dirs_exist_ok=True)
+                os.makedirs(workdir, exist_ok=True)
+                if scenario == "local":
+                    # Primera carga (no medida) que calienta la caché de preprocesado en disco
+                    measure(impl, dataset, workdir, api_url, csv_url, remote_url)
+                result = measure(impl, dataset if scenario == "local" else no_dataset, workdir, api_url, csv_url,
+                                 remote_url)
+                result.update(scenario=scenario, impl=impl)
+                results.append(result)
+                print(f"{scenario:>9} {impl:>15} {result.get('first_data_s', float('nan')):16.3f} "
+                      f"{result.get('source', result.get('error', '')):>9}")
+        csv_server.shutdown()
+        if api_socket:
+            api_socket.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_cold_start_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                   "heroes": args.heroes, "days": args.days, "rows": rows, "api_mode": args.api_mode,
+                   "results": results}, f, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
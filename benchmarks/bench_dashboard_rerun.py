@@ -0,0 +1,154 @@
+"""
+Benchmark del trabajo de datos de un rerun del dashboard de Streamlit (cambio de héroe).
+
+Genera un histórico sintético (por defecto 130 héroes × 365 días) y mide, por
+rerun, el trabajo de datos que hace run_dashboard al cambiar de héroe:
+- antes: cada llamada a una función @st.cache_data devuelve una copia
+  deserializada (histórico, agregados, tendencias y serie larga), y después se
+  filtra y ordena el histórico del héroe, se calcula df_current dos veces, el
+  rol principal con .apply + groupby (sin agregados) y la media global.
+- después: load_views (@st.cache_resource) devuelve el mismo objeto sin copia
+  y el resto son búsquedas O(1) en src/dashboard_views.py.
+
+La deserialización de st.cache_data se reproduce con pickle (es lo que hace
+Streamlit en cada acierto de caché). No se incluye el dibujo de las figuras de
+plotly ni el envío al navegador: son iguales antes y después.
+
+Uso:
+    python benchmarks/bench_dashboard_rerun.py
+    python benchmarks/bench_dashboard_rerun.py --heroes 130 --days 365 --reruns 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from synthetic_history import generate_history, write_history
+from src import dashboard_views, preprocess_cache, rate_series, rollups, trends
+
+RESULTS_DIR = os.path.join(parent_dir, "benchmarks", "results")
+
+
+def build_inputs(n_heroes, n_days, workdir, seed=0):
+    """Histórico preprocesado, agregados, tendencias y serie larga de la escala pedida."""
+    raw = generate_history(n_heroes, n_days, seed=seed)
+    dataset = os.path.join(workdir, "historical")
+    with contextlib.redirect_stdout(io.StringIO()):
+        write_history(raw, dataset)
+        preprocess_cache.CACHE_DIR = os.path.join(workdir, "cache")
+        df = preprocess_cache.load_preprocessed(dataset)
+        rollups.update_rollups(dataset, rollup_dir=os.path.join(workdir, "rollups"))
+        tables = {name: rollups.load_rollup(name, rollup_dir=os.path.join(workdir, "rollups"))
+                  for name in ("role_stats", "meta_daily")}
+    df_series = rate_series.explode_rate_series(raw)
+    df_series['win_rate_pct'] = df_series['win_rate'] * 100
+    return df, tables, trends.compute_trends(df), df_series
+
+
+def rerun_before(cached, hero_name, use_rollups):
+    """Trabajo de datos de un rerun con el layout anterior (copias de st.cache_data incluidas)."""
+    df = pickle.loads(cached["df"])
+    df_rollups = pickle.loads(cached["rollups"])
+    latest_date = df['extraction_date'].max().date()
+    df_current = df[df['extraction_date'].dt.date == latest_date].copy()
+    if use_rollups and not df_rollups["role_stats"].empty:
+        role_winrate = rollups.overall_group_means(df_rollups["role_stats"], 'primary_role')
+    else:
+        df['primary_role'] = df['role'].apply(lambda x: x.split(',')[0].strip())
+        role_winrate = df.groupby('primary_role')['win_rate_pct'].mean().reset_index()
+    hero_list = sorted(df['hero_name'].unique())
+    df_hero = df[df['hero_name'] == hero_name].copy()
+    df_hero.sort_values(by='extraction_date', inplace=True)
+    latest_metrics = df_hero.iloc[-1]
+    hero_trend = trends.hero_trend(pickle.loads(cached["trends"]), latest_metrics['hero_id'])
+    df_series = pickle.loads(cached["series"])
+    df_trend = df_series[df_series['hero_id'] == latest_metrics['hero_id']]
+    if use_rollups and not df_rollups["meta_daily"].empty:
+        avg_win_rate = rollups.global_meta_average(df_rollups["meta_daily"])
+    else:
+        avg_win_rate = df['win_rate_pct'].mean()
+    df_current = df[df['extraction_date'].dt.date == latest_date].copy()
+    return role_winrate, hero_list, hero_trend, df_trend, avg_win_rate, df_current
+
+
+def rerun_after(views, hero_name):
+    """Trabajo de datos de un rerun con el índice y los frames derivados en caché."""
+    df_hero = views.hero(hero_name)
+    latest_metrics = df_hero.iloc[-1]
+    change = views.hero_delta(latest_metrics['hero_id'])
+    df_trend = views.hero_series(latest_metrics['hero_id'])
+    return views.role_winrate, views.hero_list, change, df_trend, views.avg_win_rate, views.df_current
+
+
+def time_reruns(call, heroes, reruns):
+    timings = []
+    for i in range(reruns):
+        start = time.perf_counter()
+        call(heroes[i % len(heroes)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "max_ms": round(max(timings), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=int, default=130)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--reruns", type=int, default=30, help="Reruns medidos (un héroe distinto en cada uno)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fichero JSON de resultados")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mlbb_dashboard_")
+    try:
+        df, tables, df_trends, df_series = build_inputs(args.heroes, args.days, workdir, args.seed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Lo que guarda st.cache_data (bytes serializados) para cada función de carga
+    cached = {"df": pickle.dumps(df), "rollups": pickle.dumps(tables),
+              "trends": pickle.dumps(df_trends), "series": pickle.dumps(df_series)}
+
+    start = time.perf_counter()
+    views = dashboard_views.DashboardViews(df, tables, df_trends, df_series)
+    build_ms = (time.perf_counter() - start) * 1000
+    heroes = views.hero_list
+
+    results = {}
+    for use_rollups in (True, False):
+        label = "con_agregados" if use_rollups else "sin_agregados"
+        results[label] = {
+            "before": time_reruns(lambda hero: rerun_before(cached, hero, use_rollups), heroes, args.reruns),
+            "after": time_reruns(lambda hero: rerun_after(views, hero), heroes, args.reruns),
+        }
+
+    print(f"{args.heroes} héroes × {args.days} días ({len(df)} filas); construcción del índice: {build_ms:.1f} ms")
+    print(f"{'escenario':>14} {'antes (ms)':>11} {'después (ms)':>13} {'aceleración':>12}")
+    for label, result in results.items():
+        before, after = result["before"]["median_ms"], result["after"]["median_ms"]
+        print(f"{label:>14} {before:11.2f} {after:13.3f} {before / after:11.0f}x")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_dashboard_rerun_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                   "pandas": pd.__version__, "heroes": args.heroes, "days": args.days, "rows": len(df),
+                   "reruns": args.reruns, "views_build_ms": round(build_ms, 2), "results": results}, f, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark reproducible de la extracción de ratings contra el servidor local de grabaciones.
+
+Sirve las grabaciones (src/api_replay.py) en un servidor local con latencia y
+errores inyectados, y ejecuta fetch_all_hero_rates para cada combinación de
+concurrencia (max_in_flight) × tasa de error. Con la misma semilla la secuencia
+de latencias y errores del servidor es la misma en cada ejecución.
+
+Si no se indica --recordings (o el directorio está vacío) se sintetizan
+grabaciones de hero-rate/{id}/ con la forma de la API para --heroes héroes.
+
+Por combinación se mide:
+- wall_s: tiempo total de la fase de ratings.
+- requests / retries: peticiones que recibió el servidor y las que fueron reintentos.
+- errors / resets: respuestas con error inyectado y conexiones cortadas.
+- missing: héroes sin datos al terminar (reintentos agotados o circuito abierto).
+
+Uso:
+    python -m src.api_replay record --out data/recordings
+    python benchmarks/bench_extraction_replay.py --recordings data/recordings --latency 0.08 --jitter 0.04
+    python benchmarks/bench_extraction_replay.py --heroes 130 --in-flight 1 4 8 16 --error-rates 0 0.05 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from src import api_replay, eda_mobilelegends
+from src.http_resilience import CircuitBreaker
+
+RESULTS_DIR = os.path.join(parent_dir, "benchmarks", "results")
+WINDOW_DAYS = 7
+
+
+def synthesize_recordings(recordings_dir, n_heroes, end_date="2025-10-29", seed=0):
+    """Graba respuestas sintéticas de hero-rate/{id}/ con la estructura de la API."""
+    rng = np.random.default_rng(seed)
+    store = api_replay.RecordingStore(recordings_dir)
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    for hero_id in range(1, n_heroes + 1):
+        points = [{"app_rate": round(float(rng.uniform(0.001, 0.05)), 6),
+                   "ban_rate": round(float(rng.uniform(0.0, 0.5)), 6),
+                   "date": (end - timedelta(days=d)).strftime("%Y-%m-%d"),
+                   "win_rate": round(float(rng.uniform(0.4, 0.6)), 6)}
+                  for d in range(1, WINDOW_DAYS + 1)]
+        record = {"_createdAt": int(end.timestamp() * 1000), "_id": f"{hero_id:024x}",
+                  "_updatedAt": int(end.timestamp() * 1000), "sourceId": "2756564",
+                  "data": {"bigrank": "8", "camp_type": "1", "main_heroid": hero_id,
+                           "match_type": "1", "win_rate": points}}
+        body = {"code": 0, "message": "OK", "data": {"records": [record], "total": 1}}
+        store.save(f"hero-rate/{hero_id}/", 200, {"Content-Type": "application/json"}, body)
+    return store
+
+
+def recorded_hero_ids(store):
+    ids = []
+    for endpoint in store.endpoints():
+        parts = endpoint.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "hero-rate" and parts[1].isdigit():
+            ids.append(int(parts[1]))
+    return sorted(ids)
+
+
+def run_case(recordings_dir, hero_ids, max_in_flight, error_rate, args):
+    server, url, stats = api_replay.start_server(
+        recordings_dir, latency=args.latency, jitter=args.jitter, error_rate=error_rate,
+        error_status=args.error_status, reset_rate=args.reset_rate, seed=args.seed)
+    try:
+        # Cada caso parte de una sesión, un circuit breaker y una URL base limpios
+        eda_mobilelegends.API_BASE_URL = url
+        eda_mobilelegends.set_transport("live")
+        eda_mobilelegends._circuit_breaker = CircuitBreaker(eda_mobilelegends.CIRCUIT_FAILURE_THRESHOLD,
+                                                           eda_mobilelegends.CIRCUIT_RESET_SECONDS)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            df = eda_mobilelegends.fetch_all_hero_rates(hero_ids, max_in_flight=max_in_flight,
+                                                        requests_per_second=args.rps, use_cache=False)
+            wall = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {"max_in_flight": max_in_flight, "error_rate": error_rate, "wall_s": round(wall, 4),
+            "requests": stats["requests"], "retries": stats["requests"] - len(hero_ids),
+            "errors": stats["errors"], "resets": stats["resets"],
+            "missing": len(df.attrs.get("missing_hero_ids", []))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", default=None, help="Directorio de grabaciones (si no, se sintetizan)")
+    parser.add_argument("--heroes", type=int, default=130, help="Héroes sintéticos si no hay grabaciones")
+    parser.add_argument("--in-flight", nargs="+", type=int, default=[1, 4, 8, 16])
+    parser.add_argument("--error-rates", nargs="+", type=float, default=[0.0, 0.05, 0.2])
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia por petición del servidor (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--rps", type=float, default=None, help="Límite de peticiones/s (por defecto, sin límite)")
+    parser.add_argument("--backoff-base", type=float, default=0.05, help="Base del backoff de reintentos (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fichero JSON de resultados")
+    args = parser.parse_args()
+
+    # Backoff corto para que el tiempo medido refleje la concurrencia y no las esperas
+    eda_mobilelegends.RETRY_BACKOFF_BASE = args.backoff_base
+
+    workdir = None
+    recordings_dir = args.recordings
+    if not recordings_dir or not api_replay.RecordingStore(recordings_dir).endpoints():
+        workdir = tempfile.mkdtemp(prefix="mlbb_replay_")
+        recordings_dir = os.path.join(workdir, "recordings")
+        synthesize_recordings(recordings_dir, args.heroes, seed=args.seed)
+    hero_ids = recorded_hero_ids(api_replay.RecordingStore(recordings_dir))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_extraction_replay_{datetime.now():%Y%m%d_%H%M%S}.json")
+    results = []
+    print(f"{len(hero_ids)} héroes, latencia {args.latency}s ± {args.jitter}s, semilla {args.seed}")
+    print(f"{'en vuelo':>8} {'error':>6} {'tiempo (s)':>10} {'peticiones':>10} {'reintentos':>10} {'errores':>7} {'cortes':>6} {'sin datos':>9}")
+    try:
+        for error_rate in args.error_rates:
+            for max_in_flight in args.in_flight:
+                result = run_case(recordings_dir, hero_ids, max_in_flight, error_rate, args)
+                results.append(result)
+                print(f"{max_in_flight:8d} {error_rate:6.2f} {result['wall_s']:10.3f} {result['requests']:10d} "
+                      f"{result['retries']:10d} {result['errors']:7d} {result['resets']:6d} {result['missing']:9d}")
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                   "heroes": len(hero_ids), "latency": args.latency, "jitter": args.jitter,
+                   "reset_rate": args.reset_rate, "seed": args.seed, "results": results}, f, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
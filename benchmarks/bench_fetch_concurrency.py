@@ -0,0 +1,85 @@
+"""
+Benchmark: extracción secuencial vs concurrente de hero-rate/{id}/.
+
+Levanta un servidor HTTP local que imita la API (con latencia configurable) y
+compara el modo antiguo (1 petición en vuelo + 0.1 s entre llamadas) con el
+modo concurrente con pool de conexiones compartido.
+
+Uso:
+    python benchmarks/bench_fetch_concurrency.py --heroes 130 --latency 0.08
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from src import eda_mobilelegends
+
+
+def make_handler(latency):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+
+        def do_GET(self):
+            parts = [p for p in self.path.split('?')[0].split('/') if p]
+            hero_id = int(parts[-1]) if parts and parts[-1].isdigit() else 0
+            time.sleep(latency)
+            body = json.dumps({"data": {"records": [{
+                "_id": f"stub-{hero_id}",
+                "data": {"main_heroid": hero_id,
+                         "win_rate": [{"date": "2025-10-28", "win_rate": 0.5, "ban_rate": 0.1, "app_rate": 0.01}]},
+            }]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return StubHandler
+
+
+def timed_run(hero_ids, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = eda_mobilelegends.fetch_all_hero_rates(hero_ids, use_cache=False, **kwargs)
+    return df, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=int, default=130)
+    parser.add_argument("--latency", type=float, default=0.08, help="Latencia simulada por petición (s)")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=50)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    eda_mobilelegends.API_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/api/"
+
+    hero_ids = list(range(1, args.heroes + 1))
+    try:
+        df_seq, t_seq = timed_run(hero_ids, max_in_flight=1, requests_per_second=10)
+        df_conc, t_conc = timed_run(hero_ids, max_in_flight=args.max_in_flight, requests_per_second=args.rps)
+    finally:
+        server.shutdown()
+
+    same = df_seq.astype(str).equals(df_conc.astype(str))
+    print(f"Héroes: {len(hero_ids)} | latencia simulada: {args.latency * 1000:.0f} ms")
+    print(f"Secuencial (1 en vuelo, 10 req/s):     {t_seq:7.2f} s")
+    print(f"Concurrente ({args.max_in_flight} en vuelo, {args.rps:g} req/s): {t_conc:7.2f} s")
+    print(f"Speedup: x{t_seq / t_conc:.1f} | DataFrames idénticos: {same}")
+
+
+if __name__ == "__main__":
+    main()
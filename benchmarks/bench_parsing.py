@@ -0,0 +1,95 @@
+"""
+Benchmark: coste por fila del parseo de columnas anidadas.
+
+Compara el preprocesado anterior (tres pasadas .apply con ast.literal_eval sobre
+'data' y 'hero.data.sortid') con src.parsing.add_parsed_columns (una sola
+decodificación JSON por celda y roles parseados una vez por valor distinto).
+
+Uso:
+    python benchmarks/bench_parsing.py --rows 20000
+"""
+import argparse
+import ast
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from src.parsing import add_parsed_columns
+
+SAMPLE_FILES = [os.path.join(parent_dir, "data", "mobile_legends_data.csv"),
+                os.path.join(parent_dir, "data", "mobile_legends_data_clean.csv")]
+
+# --- Implementación anterior (copiada de eda_analysis.py antes del cambio) ---
+
+def legacy_extract_roles(roles_str):
+    if not isinstance(roles_str, str) or pd.isna(roles_str):
+        return "Unknown"
+    try:
+        roles_list = ast.literal_eval(roles_str)
+        roles = [item['data']['sort_title'] for item in roles_list if isinstance(item, dict) and 'data' in item and 'sort_title' in item['data']]
+        return ', '.join(roles) if roles else "Unknown"
+    except (ValueError, SyntaxError, TypeError):
+        return "Unknown"
+
+def legacy_extract_latest(field):
+    def extract(data_str):
+        if not isinstance(data_str, str) or pd.isna(data_str):
+            return np.nan
+        try:
+            data_dict = ast.literal_eval(data_str)
+            if 'win_rate' in data_dict and data_dict['win_rate']:
+                return data_dict['win_rate'][-1].get(field)
+            return np.nan
+        except (ValueError, SyntaxError, TypeError):
+            return np.nan
+    return extract
+
+def legacy_preprocess(df):
+    df = df.copy()
+    df['win_rate'] = df['data'].apply(legacy_extract_latest('win_rate'))
+    df['ban_rate'] = df['data'].apply(legacy_extract_latest('ban_rate'))
+    df.rename(columns={'hero.data.name': 'hero_name', 'hero.data.sortid': 'raw_roles'}, inplace=True)
+    df['role'] = df['raw_roles'].apply(legacy_extract_roles)
+    df['primary_role'] = df['role'].apply(lambda x: x.split(',')[0].strip())
+    df['win_rate_pct'] = df['win_rate'] * 100
+    df['ban_rate_pct'] = df['ban_rate'] * 100
+    return df
+
+# ---------------------------------------------------------------------------
+
+def build_sample(rows):
+    base = pd.concat([pd.read_csv(path) for path in SAMPLE_FILES], ignore_index=True)
+    reps = -(-rows // len(base))
+    return pd.concat([base] * reps, ignore_index=True).head(rows)
+
+def timed(func, df):
+    start = time.perf_counter()
+    out = func(df)
+    return out, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    df = build_sample(args.rows)
+    legacy, t_legacy = timed(legacy_preprocess, df)
+    new, t_new = timed(add_parsed_columns, df)
+
+    cols = ['win_rate_pct', 'ban_rate_pct', 'role', 'primary_role']
+    same = all(legacy[c].astype(str).equals(new[c].astype(str)) for c in cols)
+
+    print(f"Filas: {len(df)}")
+    print(f"Anterior (ast.literal_eval x3): {t_legacy:7.3f} s  ({t_legacy / len(df) * 1e6:8.1f} µs/fila)")
+    print(f"src.parsing (1 pasada):          {t_new:7.3f} s  ({t_new / len(df) * 1e6:8.1f} µs/fila)")
+    print(f"Speedup: x{t_legacy / t_new:.1f} | Columnas derivadas idénticas: {same}")
+
+
+if __name__ == "__main__":
+    main()
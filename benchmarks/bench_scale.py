@@ -0,0 +1,162 @@
+"""
+Benchmark de escalado sobre históricos sintéticos (héroes × días).
+
+Para cada escala genera un histórico con benchmarks/synthetic_history.py y mide
+load_and_preprocess_data, generate_report, run_eda_analysis y el endpoint /data.
+Cada medición corre en un proceso nuevo (cachés vacías y pico de memoria propio):
+- wall_cold_s: primera llamada, sin caché de preprocesado en disco ni en memoria.
+- wall_warm_s: segunda llamada en el mismo proceso (memoria de proceso vaciada,
+  caché en disco caliente; en /data el snapshot ya está en memoria).
+- peak_rss_mb: pico de RSS del proceso (incluye los procesos hijos del pool de gráficos).
+
+Los resultados se guardan como JSON en --output.
+
+Uso:
+    python benchmarks/bench_scale.py --scales 130x30 130x180 130x365 --output results.json
+    python benchmarks/bench_scale.py --scales 130x90 --format csv
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+TARGETS = ("load_and_preprocess_data", "generate_report", "run_eda_analysis", "api_data")
+DEFAULT_SCALES = ("130x30", "130x180", "130x365")
+RESULTS_DIR = os.path.join(parent_dir, "benchmarks", "results")
+
+
+# --- Proceso de medición (una escala × un objetivo) --------------------------
+
+def configure(source, workdir):
+    """Redirige todas las rutas de datos, cachés y salidas al directorio de la escala."""
+    import api_mobilelegends as api
+    from src import eda_analysis, historical_store, preprocess_cache, reporting, rollups
+
+    if source.lower().endswith(".csv"):
+        missing = os.path.join(workdir, "__sin_dataset__")
+        eda_analysis.DATA_FILE_PATH = reporting.DATA_FILE_PATH = api.DATA_FILE_PATH = missing
+        historical_store.LEGACY_CSV_PATH = api.LEGACY_CSV_PATH = source
+    else:
+        eda_analysis.DATA_FILE_PATH = reporting.DATA_FILE_PATH = api.DATA_FILE_PATH = source
+    report_dir = os.path.join(workdir, "reports")
+    os.makedirs(report_dir, exist_ok=True)
+    eda_analysis.REPORT_DIR = reporting.REPORT_OUTPUT_DIR = report_dir
+    preprocess_cache.CACHE_DIR = os.path.join(workdir, "cache")
+    rollups.ROLLUP_DIR = os.path.join(workdir, "rollups")
+    return api, eda_analysis, reporting, preprocess_cache
+
+
+def build_target(target, source, workdir):
+    api, eda_analysis, reporting, preprocess_cache = configure(source, workdir)
+    if target == "load_and_preprocess_data":
+        call = lambda: eda_analysis.load_and_preprocess_data(source)
+    elif target == "generate_report":
+        call = reporting.generate_report
+    elif target == "run_eda_analysis":
+        call = eda_analysis.run_eda_analysis
+    elif target == "api_data":
+        from fastapi.testclient import TestClient
+        client = TestClient(api.app)
+        call = lambda: client.get("/data").content
+    else:
+        raise ValueError(f"Objetivo desconocido: {target}")
+    return call, preprocess_cache
+
+
+def peak_rss_mb():
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    scale = 1 if platform.system() == "Darwin" else 1024
+    peaks = [resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return max(peaks) * scale / 1e6
+
+
+def run_worker(target, source, workdir):
+    call, preprocess_cache = build_target(target, source, workdir)
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(2):
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+            preprocess_cache.clear_memory_cache()
+    print(json.dumps({"wall_cold_s": timings[0], "wall_warm_s": timings[1], "peak_rss_mb": peak_rss_mb()}))
+
+
+# --- Proceso principal -----------------------------------------------------
+
+def measure(target, source, workdir):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", target,
+               "--source", source, "--workdir", workdir]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=parent_dir)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "error"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=list(DEFAULT_SCALES), help="Escalas HÉROESxDÍAS")
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=TARGETS)
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet", help="Formato del histórico")
+    parser.add_argument("--output", default=None, help="Fichero JSON de resultados")
+    parser.add_argument("--keep", action="store_true", help="Conserva los históricos generados")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.source, args.workdir)
+        return
+
+    from synthetic_history import generate_history, write_history
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_scale_{datetime.now():%Y%m%d_%H%M%S}.json")
+    root = tempfile.mkdtemp(prefix="mlbb_bench_")
+    results = []
+    print(f"{'escala':>9} {'filas':>8} {'objetivo':26} {'frío (s)':>9} {'caliente (s)':>13} {'pico RSS (MB)':>14}")
+    try:
+        for scale in args.scales:
+            n_heroes, n_days = (int(x) for x in scale.lower().split("x"))
+            scale_dir = os.path.join(root, scale)
+            source = os.path.join(scale_dir, "historical.csv" if args.format == "csv" else "historical")
+            df = generate_history(n_heroes, n_days)
+            write_history(df, source)
+            rows = len(df)
+            del df
+
+            for target in args.targets:
+                workdir = os.path.join(scale_dir, f"work_{target}")
+                result = measure(target, source, workdir)
+                results.append({"scale": scale, "heroes": n_heroes, "days": n_days, "rows": rows,
+                                "format": args.format, "target": target, **result})
+                if "error" in result:
+                    print(f"{scale:>9} {rows:8d} {target:26} ERROR: {result['error']}")
+                else:
+                    print(f"{scale:>9} {rows:8d} {target:26} {result['wall_cold_s']:9.3f} "
+                          f"{result['wall_warm_s']:13.3f} {result['peak_rss_mb']:14.1f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"),
+                   "python": platform.python_version(), "results": results}, f, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Generador de históricos sintéticos con el layout exacto de mobile_legends_data_clean.csv.
+
+Produce N héroes × D días con las mismas 14 columnas del CSV limpio: los blobs de
+héroe (roadsort, sortid, smallmap, relaciones) se copian de las filas reales como
+plantilla y el blob 'data' (JSON) lleva la ventana de 7 días de win/ban/app rate
+con un paseo aleatorio por héroe, como lo devuelve la API.
+
+Uso:
+    python benchmarks/synthetic_history.py --heroes 130 --days 365 --out /tmp/hist
+    python benchmarks/synthetic_history.py --heroes 130 --days 30 --out /tmp/hist.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from src import historical_store
+
+TEMPLATE_FILE = os.path.join(parent_dir, "data", "mobile_legends_data_clean.csv")
+WINDOW_DAYS = 7  # Puntos diarios dentro de cada blob 'data'
+
+
+def generate_history(n_heroes, n_days, end_date="2025-10-29", seed=0):
+    """DataFrame sintético (n_heroes × n_days filas) con las columnas del CSV limpio."""
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(TEMPLATE_FILE, dtype=str, keep_default_na=False)
+    columns = list(template.columns)
+    dates = pd.date_range(end=pd.Timestamp(end_date), periods=n_days, freq="D")
+    calendar = pd.date_range(end=dates[-1] - pd.Timedelta(days=1), periods=n_days + WINDOW_DAYS - 1, freq="D")
+    calendar_text = calendar.strftime("%Y-%m-%d").tolist()
+
+    # Paseos aleatorios (calendario × héroe) acotados a rangos realistas
+    win = np.clip(rng.normal(0.5, 0.03, n_heroes) + np.cumsum(rng.normal(0, 0.002, (len(calendar), n_heroes)), axis=0), 0.35, 0.65)
+    ban = np.clip(rng.beta(1.2, 8, n_heroes) + np.cumsum(rng.normal(0, 0.003, (len(calendar), n_heroes)), axis=0), 0.0, 0.9)
+    app = np.clip(rng.gamma(2.0, 0.006, n_heroes) + np.cumsum(rng.normal(0, 0.0003, (len(calendar), n_heroes)), axis=0), 0.0005, 0.1)
+
+    heroes = []
+    for i in range(n_heroes):
+        row = template.iloc[i % len(template)].to_dict()
+        suffix = f" {i // len(template) + 1}" if i >= len(template) else ""
+        row["hero_id"] = str(i + 1)
+        row["hero.data.name"] = f"{row['hero.data.name']}{suffix}"
+        heroes.append(row)
+
+    rows = []
+    for d, date in enumerate(dates):
+        created_ms = int(date.timestamp() * 1000)
+        for h, hero in enumerate(heroes):
+            # El blob trae los 7 días anteriores a la extracción, del más reciente al más antiguo
+            points = [{"app_rate": round(float(app[t, h]), 6), "ban_rate": round(float(ban[t, h]), 6),
+                       "date": calendar_text[t], "win_rate": round(float(win[t, h]), 6)}
+                      for t in range(d + WINDOW_DAYS - 1, d - 1, -1)]
+            blob = {"bigrank": "8", "camp_type": "1", "main_heroid": int(hero["hero_id"]),
+                    "match_type": "1", "win_rate": points}
+            row = dict(hero)
+            row.update({
+                "_createdAt": str(created_ms - 86_400_000),
+                "_id": f"{rng.integers(0, 16 ** 12):012x}{d:06x}{h:06x}",
+                "_updatedAt": str(created_ms + 3_600_000),
+                "data": json.dumps(blob),
+                "extraction_date": date.strftime("%Y-%m-%d"),
+            })
+            rows.append(row)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def write_history(df, out):
+    """Escribe el histórico como CSV (QUOTE_ALL, si 'out' acaba en .csv) o como dataset Parquet."""
+    if str(out).lower().endswith(".csv"):
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        df.to_csv(out, index=False, quoting=csv.QUOTE_ALL)
+        return [out]
+    return historical_store.write_partition(df, out, upsert=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=int, default=130)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--end-date", default="2025-10-29")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Directorio del dataset Parquet o fichero .csv")
+    args = parser.parse_args()
+
+    df = generate_history(args.heroes, args.days, args.end_date, args.seed)
+    written = write_history(df, args.out)
+    print(f"Generadas {len(df)} filas ({args.heroes} héroes × {args.days} días) en {args.out} ({len(written)} ficheros)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,49 @@
 # config.py
+import os
 
-# URL Base de la API
+# URL Base de la API (MLBB_API_BASE_URL permite apuntar al servidor local de src/api_replay.py)
 
-API_BASE_URL = "https://mlbb-stats.ridwaanhall.com/api/"
+API_BASE_URL = os.environ.get("MLBB_API_BASE_URL", "https://mlbb-stats.ridwaanhall.com/api/")
 
+# Transporte HTTP de fetch_data: "live" (red), "record" (red + guarda cada respuesta)
+# o "replay" (sirve las respuestas grabadas, sin red)
+API_TRANSPORT = os.environ.get("MLBB_API_TRANSPORT", "live")
+API_RECORDINGS_DIR = os.environ.get("MLBB_API_RECORDINGS_DIR", "data/recordings")
+
+
+# Extracción concurrente de ratings (hero-rate/{id}/)
+MAX_IN_FLIGHT = 8           # Peticiones simultáneas máximas (1 = modo secuencial)
+REQUESTS_PER_SECOND = 10    # Límite global de peticiones por segundo (None = sin límite)
+
+# Barrido de ratings por rango y modo: hero-rate/{id}/?rank=...&match_type=...
+# Cada combinación rango × modo es una petición más por héroe extraído (tupla vacía = sin barrido).
+# Desactivado por defecto: activar solo combinaciones comprobadas con
+# `python -m src.rate_cube sweep --ranks ... --modes ...` (el cubo guarda el bigrank/match_type
+# que devuelve la API) y con nombres de parámetro verificados, p. ej.:
+#   RATE_SWEEP_RANKS = ("all", "mythic")
+#   RATE_SWEEP_MODES = ("0",)
+RATE_SWEEP_RANKS = ()
+RATE_SWEEP_MODES = ()
+RATE_SWEEP_RANK_PARAM = "rank"
+RATE_SWEEP_MODE_PARAM = "match_type"
+RATE_CUBE_DIR = "data/cube"         # Cubo héroe × fecha × rango × modo (un .npz por fecha)
+
+# Caché HTTP en disco para fetch_data (ruta relativa a la raíz del proyecto)
+HTTP_CACHE_DIR = "data/cache/http"
+HTTP_CACHE_TTL_SECONDS = {          # TTL por prefijo de endpoint
+    "hero-position/": 12 * 3600,
+    "hero-rate/": 12 * 3600,
+}
+HTTP_CACHE_DEFAULT_TTL = 3600
+HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024   # Tamaño máximo antes de expulsar entradas (LRU)
+
+# Reintentos con backoff exponencial + jitter y circuit breaker en fetch_data
+REQUEST_TIMEOUT_SECONDS = 20        # Timeout por petición (conexión + lectura)
+RETRY_ATTEMPTS = 4                  # Intentos totales por petición (1 = sin reintentos)
+RETRY_BACKOFF_BASE = 0.5            # Segundos; la espera máxima del intento n es base * 2^n
+RETRY_BACKOFF_MAX = 10.0            # Tope de la espera entre intentos
+CIRCUIT_FAILURE_THRESHOLD = 8       # Fallos consecutivos que abren el circuito
+CIRCUIT_RESET_SECONDS = 30          # Tiempo con el circuito abierto antes de una petición de prueba
+
+# Checkpoint de la extracción de ratings (permite reanudar una ejecución interrumpida)
+CHECKPOINT_DIR = "data/cache/checkpoints"
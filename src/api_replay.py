@@ -0,0 +1,284 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# ---------------------------------------------------
+# Añadir el directorio padre al path para importar config
+# ---------------------------------------------------
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from config.config import API_BASE_URL, API_RECORDINGS_DIR
+
+# Cabeceras de la respuesta original que se conservan en la grabación
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+TRANSPORTS = ("live", "record", "replay")
+
+# ----------------------------------------------------
+# --- 1. ALMACÉN DE GRABACIONES ---
+# ----------------------------------------------------
+
+class RecordingStore:
+    """
+    Respuestas grabadas de la API, un fichero JSON por endpoint (ruta relativa a
+    la URL base, con su query string): estado, cabeceras relevantes y cuerpo.
+    """
+
+    def __init__(self, recordings_dir=None, base_url=None):
+        self.recordings_dir = recordings_dir or os.path.join(parent_dir, API_RECORDINGS_DIR)
+        self.base_url = base_url or API_BASE_URL
+
+    def endpoint_for(self, url):
+        """'https://.../api/hero-rate/5/' -> 'hero-rate/5/' (o la ruta sin la barra inicial)."""
+        if url.startswith(self.base_url):
+            return url[len(self.base_url):]
+        parts = urlsplit(url)
+        endpoint = parts.path.lstrip("/")
+        return f"{endpoint}?{parts.query}" if parts.query else endpoint
+
+    def _path(self, endpoint):
+        key = hashlib.sha1(endpoint.encode("utf-8")).hexdigest()
+        return os.path.join(self.recordings_dir, f"{key}.json")
+
+    def load(self, endpoint):
+        try:
+            with open(self._path(endpoint), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, endpoint, status, headers, body):
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        record = {"endpoint": endpoint, "status": status,
+                  "headers": {k: headers[k] for k in RECORDED_HEADERS if k in headers},
+                  "body": body}
+        path = self._path(endpoint)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def endpoints(self):
+        if not os.path.isdir(self.recordings_dir):
+            return []
+        found = []
+        for name in os.listdir(self.recordings_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.recordings_dir, name), "r", encoding="utf-8") as f:
+                    found.append(json.load(f)["endpoint"])
+        return sorted(found)
+
+def _etag(record):
+    """ETag grabado o, si la API no lo mandó, uno derivado del cuerpo (para poder responder 304)."""
+    if record["headers"].get("ETag"):
+        return record["headers"]["ETag"]
+    digest = hashlib.sha1(json.dumps(record["body"], sort_keys=True).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+# ----------------------------------------------------
+# --- 2. TRANSPORTES PARA requests.Session ---
+# ----------------------------------------------------
+
+class RecordingAdapter(HTTPAdapter):
+    """Transporte real que además graba cada respuesta 200 en el almacén."""
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            try:
+                body = response.json()
+            except ValueError:
+                return response
+            self.store.save(self.store.endpoint_for(request.url), response.status_code, response.headers, body)
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transporte sin red: responde con la grabación del endpoint (404 si no existe)
+    y con 304 si la petición trae el ETag de esa grabación.
+    """
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+
+    def send(self, request, **kwargs):
+        record = self.store.load(self.store.endpoint_for(request.url))
+        response = Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        if record is None:
+            response.status_code, response.reason = 404, "Not Recorded"
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+            response._content = b'{"error": "sin grabacion"}'
+            return response
+
+        headers = CaseInsensitiveDict(record["headers"])
+        headers["ETag"] = _etag(record)
+        response.headers = headers
+        if request.headers.get("If-None-Match") == headers["ETag"]:
+            response.status_code, response.reason, response._content = 304, "Not Modified", b""
+        else:
+            response.status_code, response.reason = record["status"], "OK"
+            response._content = json.dumps(record["body"], ensure_ascii=False).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+def make_transport(mode, recordings_dir=None, base_url=None, **adapter_kwargs):
+    """Adaptador para montar en la sesión según el modo ('live' devuelve None: transporte normal)."""
+    if mode == "live":
+        return None
+    store = RecordingStore(recordings_dir, base_url)
+    if mode == "record":
+        return RecordingAdapter(store, **adapter_kwargs)
+    if mode == "replay":
+        return ReplayAdapter(store)
+    raise ValueError(f"Transporte desconocido: {mode!r} (use {', '.join(TRANSPORTS)})")
+
+# ----------------------------------------------------
+# --- 3. SERVIDOR LOCAL QUE SIRVE LAS GRABACIONES ---
+# ----------------------------------------------------
+
+def make_handler(store, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, reset_rate=0.0, seed=None):
+    """
+    Handler que sirve las grabaciones bajo /api/ simulando la API real:
+    - latency/jitter: espera por petición (segundos; jitter uniforme ±).
+    - error_rate: fracción de peticiones que responden 'error_status'.
+    - reset_rate: fracción de peticiones en las que se corta la conexión sin responder.
+    Con 'seed' la secuencia de errores es reproducible.
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    stats = {"requests": 0, "errors": 0, "resets": 0, "not_found": 0}
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+
+        def do_GET(self):
+            with rng_lock:
+                stats["requests"] += 1
+                delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+                roll = rng.random()
+            time.sleep(delay)
+
+            if roll < reset_rate:
+                stats["resets"] += 1
+                self.close_connection = True
+                self.connection.close()
+                return
+            if roll < reset_rate + error_rate:
+                stats["errors"] += 1
+                self._send(error_status, {"error": "error inyectado"})
+                return
+
+            path = self.path[len("/api/"):] if self.path.startswith("/api/") else self.path.lstrip("/")
+            record = store.load(path)
+            if record is None:
+                stats["not_found"] += 1
+                self._send(404, {"error": "sin grabacion"})
+                return
+            etag = _etag(record)
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, None, {"ETag": etag})
+                return
+            self._send(record["status"], record["body"], {**record["headers"], "ETag": etag})
+
+        def _send(self, status, body, headers=None):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                if name.lower() not in ("content-length", "content-type"):
+                    self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    ReplayHandler.stats = stats
+    return ReplayHandler
+
+def start_server(recordings_dir=None, host="127.0.0.1", port=0, **options):
+    """Arranca el servidor en un hilo. Devuelve (servidor, url_base, stats)."""
+    handler = make_handler(RecordingStore(recordings_dir), **options)
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/api/", handler.stats
+
+# ----------------------------------------------------
+# --- 4. GRABACIÓN DE UNA EXTRACCIÓN COMPLETA ---
+# ----------------------------------------------------
+
+def record_extraction(recordings_dir=None):
+    """Pide hero-position y todos los hero-rate a la API real guardando cada respuesta."""
+    from src import eda_mobilelegends
+
+    eda_mobilelegends.set_transport("record", recordings_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        positions = eda_mobilelegends.fetch_data("hero-position/?size=200", use_cache=False)
+        records = eda_mobilelegends.extract_list_from_api_response(positions, "hero-position/")
+        hero_ids = sorted({rec["data"].get("hero_id") for rec in records
+                           if isinstance(rec, dict) and isinstance(rec.get("data"), dict)} - {None})
+        df_rates = eda_mobilelegends.fetch_all_hero_rates(hero_ids, use_cache=False)
+    eda_mobilelegends.set_transport("live")
+    store = RecordingStore(recordings_dir)
+    print(f"🎙️ Grabadas {len(store.endpoints())} respuestas ({len(df_rates)} héroes) en {store.recordings_dir}")
+    return store
+
+# ----------------------------------------------------
+# --- 5. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grabación/reproducción de la API de MLBB y servidor local")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Graba una extracción completa de la API real")
+    record_parser.add_argument("--out", default=None, help="Directorio de grabaciones")
+
+    serve_parser = subparsers.add_parser("serve", help="Sirve las grabaciones en un servidor local")
+    serve_parser.add_argument("--recordings", default=None)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Latencia por petición (s)")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="Variación uniforme ± de la latencia (s)")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas con error")
+    serve_parser.add_argument("--error-status", type=int, default=503)
+    serve_parser.add_argument("--reset-rate", type=float, default=0.0, help="Fracción de conexiones cortadas")
+    serve_parser.add_argument("--seed", type=int, default=None)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_extraction(args.out)
+    elif args.command == "serve":
+        server, url, _ = start_server(args.recordings, args.host, args.port, latency=args.latency,
+                                      jitter=args.jitter, error_rate=args.error_rate,
+                                      error_status=args.error_status, reset_rate=args.reset_rate, seed=args.seed)
+        print(f"🛰️ Sirviendo grabaciones en {url} (MLBB_API_BASE_URL={url}). Ctrl+C para parar.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
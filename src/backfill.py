@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import eda_analysis, historical_store, preprocess_cache, rate_cube, reporting, rollups, trends
+
+# ----------------------------------------------------
+# --- 1. REGENERACIÓN DEL HISTÓRICO COMPLETO ---
+# ----------------------------------------------------
+
+def resolve_source():
+    if historical_store.list_partition_dates(eda_analysis.DATA_FILE_PATH):
+        return eda_analysis.DATA_FILE_PATH
+    return historical_store.LEGACY_CSV_PATH
+
+def _by_date(df, column):
+    if df.empty:
+        return {}
+    keys = df[column].dt.strftime('%Y-%m-%d') if column == 'extraction_date' else df[column]
+    return {key: group for key, group in df.groupby(keys.to_numpy(), sort=True)}
+
+def run_backfill(start_date=None, end_date=None, source=None, max_workers=None):
+    """
+    Regenera el reporte de tendencia y los tres gráficos de cada fecha del rango.
+
+    El histórico se carga y preprocesa una sola vez (más los días previos al rango
+    que necesita el motor de tendencias), las tendencias de todas las fechas se
+    calculan en una sola pasada y el resto se trocea por fecha en memoria. Los
+    gráficos de todas las fechas se envían juntos al pool de procesos del EDA, que
+    omite los PNG cuyo hash de entrada no ha cambiado.
+    """
+    source = source or resolve_source()
+    all_dates = historical_store.list_partition_dates(source)
+    start = pd.Timestamp(start_date).strftime('%Y-%m-%d') if start_date else None
+    end = pd.Timestamp(end_date).strftime('%Y-%m-%d') if end_date else None
+    dates = [d for d in all_dates if (start is None or d >= start) and (end is None or d <= end)]
+    if not dates:
+        print("⚠️ No hay fechas en el rango indicado. Nada que regenerar.")
+        return {"dates": [], "reports": [], "charts": {"rendered": [], "skipped": []}}
+
+    started = time.perf_counter()
+    lookback_start = pd.Timestamp(dates[0]) - pd.Timedelta(days=trends.LOOKBACK_DAYS)
+    load_start = min(lookback_start, pd.Timestamp(all_dates[max(all_dates.index(dates[0]) - 1, 0)]))
+    print(f"🔁 Backfill de {len(dates)} fecha(s) ({dates[0]} → {dates[-1]}) desde {source}")
+
+    # Una sola carga del histórico y de los agregados de todo el rango. Mismo esquema
+    # compacto que el EDA y el reporte: el hash de entrada de cada gráfico coincide
+    # con el del EDA y los PNG ya generados se omiten
+    df_history = preprocess_cache.compact_frame(
+        preprocess_cache.load_preprocessed(source, start_date=load_start, end_date=dates[-1]))
+    rollups.update_rollups(source)
+    days = _by_date(df_history, 'extraction_date')
+    df_trends = trends.compute_trends(df_history)
+    role_stats = _by_date(rollups.load_rollup("role_stats", dates[0], dates[-1]), 'date')
+    lane_stats = _by_date(rollups.load_rollup("lane_stats", dates[0], dates[-1]), 'date')
+    df_top = rollups.load_rollup("top_heroes", dates[0], dates[-1])
+    cube = rate_cube.load_cube(dates[0], dates[-1])
+
+    reports, chart_jobs = [], []
+    for date in dates:
+        df_day = days.get(date)
+        if df_day is None or df_day.empty:
+            continue
+        latest_date = pd.Timestamp(date)
+        report_text = reporting.build_report_text(latest_date, df_top, trends.trends_at(df_trends, latest_date), cube)
+        reports.append(reporting.save_report(report_text, latest_date))
+
+        chart_date = latest_date.strftime('%Y%m%d')
+        chart_jobs += [
+            ("ban_vs_win_rate", df_day, chart_date),
+            ("win_rate_by_role", role_stats.get(date, pd.DataFrame()), chart_date),
+            ("win_rate_by_lane", lane_stats.get(date, pd.DataFrame()), chart_date),
+        ]
+
+    charts = eda_analysis.render_charts(chart_jobs, max_workers=max_workers)
+    print(f"✅ Backfill completado en {time.perf_counter() - started:.1f}s: {len(reports)} reportes, "
+          f"{len(charts['rendered'])} gráficos generados, {len(charts['skipped'])} sin cambios.")
+    return {"dates": dates, "reports": reports, "charts": charts}
+
+# ----------------------------------------------------
+# --- 2. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenera reportes y gráficos de todas las fechas (o de un rango)")
+    parser.add_argument("--start", default=None, help="Primera fecha (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Última fecha (YYYY-MM-DD)")
+    parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para renderizar gráficos")
+
+    args = parser.parse_args()
+    run_backfill(args.start, args.end, args.source, args.workers)
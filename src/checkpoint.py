@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import threading
+
+# ---------------------------------------------------
+# Añadir el directorio padre al path para importar config
+# ---------------------------------------------------
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from config.config import CHECKPOINT_DIR
+
+# ----------------------------------------------------
+# --- CHECKPOINT DE LA EXTRACCIÓN DE RATINGS ---
+# ----------------------------------------------------
+
+class RunCheckpoint:
+    """
+    Registros de hero-rate ya extraídos en la ejecución del día (JSON lines, una
+    línea por héroe completado, escrita y volcada a disco en cuanto llega).
+    Si el proceso muere, la siguiente ejecución del mismo día carga el fichero y
+    solo pide los héroes que faltan.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def load(self):
+        """{hero_id: registro} de los héroes ya completados (ignora una última línea truncada)."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "hero_id" in record:
+                    records[record["hero_id"]] = record
+        return records
+
+    def add(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def checkpoint_for(run_date, checkpoint_dir=None):
+    """Checkpoint de la ejecución de 'run_date' (YYYY-MM-DD); borra los de otros días."""
+    checkpoint_dir = checkpoint_dir or os.path.join(parent_dir, CHECKPOINT_DIR)
+    name = f"hero_rates_{run_date}.jsonl"
+    if os.path.isdir(checkpoint_dir):
+        for old in os.listdir(checkpoint_dir):
+            if old.startswith("hero_rates_") and old != name:
+                os.remove(os.path.join(checkpoint_dir, old))
+    return RunCheckpoint(os.path.join(checkpoint_dir, name))
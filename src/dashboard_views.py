@@ -0,0 +1,101 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import rollups
+
+# ----------------------------------------------------
+# --- 1. ÍNDICE DE RANGOS DE FILAS POR CLAVE ---
+# ----------------------------------------------------
+
+class SliceIndex:
+    """
+    Frame ordenado por (clave, orden) y el rango de filas [inicio, fin) de cada
+    clave: obtener las filas de un héroe es una búsqueda en un dict y un slice
+    posicional, sin recorrer el frame.
+    """
+
+    def __init__(self, df, key, order=None):
+        sort_by = [key] + ([order] if order else [])
+        self.df = df.sort_values(sort_by, kind="stable").reset_index(drop=True) if not df.empty else df
+        self.ranges = {}
+        if not self.df.empty:
+            values = self.df[key].to_numpy()
+            starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+            stops = np.r_[starts[1:], len(values)]
+            self.ranges = {values[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+    def get(self, value):
+        """Filas de la clave (vacío si no existe). No modificar: es un slice del frame compartido."""
+        start, stop = self.ranges.get(value, (0, 0))
+        return self.df.iloc[start:stop]
+
+    def keys(self):
+        return list(self.ranges)
+
+# ----------------------------------------------------
+# --- 2. FRAMES DERIVADOS DEL DASHBOARD ---
+# ----------------------------------------------------
+
+class DashboardViews:
+    """
+    Todo lo que el dashboard deriva del histórico, calculado una sola vez por
+    versión de datos: frame de la última fecha, win rate por rol, media global,
+    lista de héroes, índices héroe→filas (histórico y serie diaria) y el último
+    delta de tendencia de cada héroe. En cada rerun solo quedan búsquedas O(1).
+    """
+
+    def __init__(self, df, rollup_tables=None, df_trends=None, df_series=None):
+        rollup_tables = rollup_tables or {}
+        role_stats = rollup_tables.get("role_stats", pd.DataFrame())
+        meta_daily = rollup_tables.get("meta_daily", pd.DataFrame())
+
+        self.df = df
+        self.latest_date = df['extraction_date'].max().date()
+        self.df_current = df[df['extraction_date'].dt.date == self.latest_date]
+
+        # Win rate por rol: de los agregados por fecha si existen; si no, del histórico
+        if not role_stats.empty:
+            self.role_winrate = rollups.overall_group_means(role_stats, 'primary_role')
+        else:
+            primary_role = df['role'].str.split(',').str[0].str.strip()
+            self.role_winrate = (df.groupby(primary_role.to_numpy())['win_rate_pct'].mean()
+                                 .rename_axis('primary_role').reset_index())
+
+        if not meta_daily.empty:
+            self.avg_win_rate = rollups.global_meta_average(meta_daily)
+        else:
+            self.avg_win_rate = df['win_rate_pct'].mean()
+
+        self.heroes = SliceIndex(df, 'hero_name', 'extraction_date')
+        self.hero_list = sorted(self.heroes.keys())
+        self.hero_names = df[['hero_id', 'hero_name']].drop_duplicates('hero_id', keep='last')
+
+        df_series = df_series if df_series is not None else pd.DataFrame()
+        self.series = SliceIndex(df_series, 'hero_id', 'date') if not df_series.empty else None
+
+        # Última fila de tendencia de cada héroe (lo que devolvía trends.hero_trend sin fecha)
+        self.trend_deltas = {}
+        if df_trends is not None and not df_trends.empty:
+            last = df_trends.groupby(level='hero_id', sort=False).tail(1).droplevel('extraction_date')
+            self.trend_deltas = last['win_rate_pct_delta_prev'].to_dict()
+
+    def hero(self, hero_name):
+        """Histórico de un héroe ordenado por fecha (slice O(1) del índice)."""
+        return self.heroes.get(hero_name)
+
+    def hero_series(self, hero_id):
+        """Serie diaria del héroe (vacía si no hay serie larga)."""
+        return self.series.get(hero_id) if self.series is not None else pd.DataFrame()
+
+    def hero_delta(self, hero_id):
+        """Cambio de win rate frente a la extracción anterior (0.0 si no hay)."""
+        delta = self.trend_deltas.get(hero_id)
+        return float(delta) if delta is not None and pd.notna(delta) else 0.0
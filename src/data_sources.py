@@ -0,0 +1,131 @@
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store
+from src import preprocess_cache
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+API_URL = "http://127.0.0.1:8000/data"
+# Export del frame de análisis que el pipeline diario versiona en el repo (el CSV
+# histórico ya no se actualiza desde que el histórico es un dataset Parquet)
+REMOTE_URL = "https://raw.githubusercontent.com/STpipa/MLBB-EDA-Project/main/data/analysis_frame.parquet"
+
+# La API es local: si no acepta la conexión en este tiempo es que no está levantada
+API_CONNECT_TIMEOUT = 0.5
+API_READ_TIMEOUT = 30
+REMOTE_TIMEOUT = 30
+
+# Copia local (Parquet, ya preprocesada) de la última descarga del export remoto.
+# Mientras sea más reciente que el TTL, un arranque en frío no vuelve a descargar.
+REMOTE_SNAPSHOT_PATH = os.path.join(historical_store.DATA_DIR, "cache", "remote_snapshot.parquet")
+REMOTE_SNAPSHOT_TTL_SECONDS = 6 * 3600
+
+# Último ETag y DataFrame recibidos de la API: permite recibir un 304 en lugar del histórico completo
+_api_cache = {}
+
+# ----------------------------------------------------
+# --- 2. ORÍGENES DE DATOS ---
+# ----------------------------------------------------
+
+def load_local():
+    """Histórico local (Parquet o CSV legado) con la caché de preprocesado; None si no hay."""
+    source = historical_store.default_source()
+    if not historical_store.list_partition_dates(source):
+        return None
+    return preprocess_cache.load_preprocessed(source)
+
+def load_remote_snapshot(max_age=None):
+    """Copia Parquet de la última descarga remota si existe y no ha caducado; None si no."""
+    max_age = REMOTE_SNAPSHOT_TTL_SECONDS if max_age is None else max_age
+    if not os.path.exists(REMOTE_SNAPSHOT_PATH):
+        return None
+    if time.time() - os.path.getmtime(REMOTE_SNAPSHOT_PATH) > max_age:
+        return None
+    return pd.read_parquet(REMOTE_SNAPSHOT_PATH)
+
+def fetch_api():
+    """
+    Pide /data a la API como stream Arrow IPC (columnar, sin pasar por JSON) con
+    If-None-Match; si responde 304 reutiliza la última copia.
+    """
+    import pyarrow as pa
+    import requests
+
+    headers = {"Accept": "application/vnd.apache.arrow.stream"}
+    if _api_cache.get("etag"):
+        headers["If-None-Match"] = _api_cache["etag"]
+    response = requests.get(API_URL, timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT), headers=headers)
+    if response.status_code == 304 and "df" in _api_cache:
+        return _api_cache["df"].copy()
+    response.raise_for_status()
+
+    df = pa.ipc.open_stream(response.content).read_pandas()
+    _api_cache.update(etag=response.headers.get("ETag"), df=df)
+    return df.copy()
+
+def download_remote_export():
+    """Descarga de GitHub el export del frame de análisis y guarda la copia local."""
+    import requests
+
+    response = requests.get(REMOTE_URL, timeout=REMOTE_TIMEOUT)
+    response.raise_for_status()
+    # Ya viene preprocesado (preprocess_cache.export_analysis_frame): solo se normaliza el esquema
+    df = preprocess_cache.to_analysis_frame(pd.read_parquet(io.BytesIO(response.content)))
+
+    os.makedirs(os.path.dirname(REMOTE_SNAPSHOT_PATH), exist_ok=True)
+    tmp_path = f"{REMOTE_SNAPSHOT_PATH}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, REMOTE_SNAPSHOT_PATH)
+    return df
+
+# ----------------------------------------------------
+# --- 3. CARGA DEL DASHBOARD ---
+# ----------------------------------------------------
+
+def load_dashboard_data():
+    """
+    Frame de análisis para el dashboard y el nombre del origen usado.
+
+    Primero los orígenes locales, que no esperan a la red: el histórico local y la
+    copia Parquet de la última descarga remota. Si no hay ninguno, la API local y
+    el export remoto se piden a la vez y se usa el primero que responda bien (una API
+    caída ya no retrasa la descarga). Todos los orígenes devuelven el mismo
+    esquema compacto (preprocess_cache.compact_frame).
+    """
+    for name, load in (("local", load_local), ("snapshot", load_remote_snapshot)):
+        try:
+            df = load()
+        except Exception as e:
+            print(f"⚠️ Origen '{name}' no disponible: {e}")
+            continue
+        if df is not None and not df.empty:
+            return preprocess_cache.compact_frame(df), name
+
+    errors = []
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = {executor.submit(fetch_api): "api", executor.submit(download_remote_export): "remote"}
+    try:
+        for future in as_completed(futures):
+            try:
+                df = future.result()
+            except Exception as e:
+                errors.append(f"{futures[future]}: {e}")
+                continue
+            if not df.empty:
+                return preprocess_cache.compact_frame(df), futures[future]
+    finally:
+        # La descarga que siga en curso termina en segundo plano (y deja su copia Parquet)
+        executor.shutdown(wait=False, cancel_futures=True)
+    raise RuntimeError("; ".join(errors) or "Ningún origen devolvió datos")
@@ -0,0 +1,184 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store, star_schema
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+MATRICES_PATH = os.path.join(historical_store.DATA_DIR, "draft", "relation_matrices.npz")
+
+# Pesos de la puntuación de un pick:
+# - meta: win rate actual (z-score entre héroes); ban: ban rate actual (prioridad del meta)
+# - synergy: aliados con los que hace buena pareja ('assist', en cualquier sentido)
+# - counter: enemigos a los que contrarresta ('strong' del candidato o 'weak' del enemigo)
+# - threat: enemigos que lo contrarrestan ('weak' del candidato o 'strong' del enemigo)
+DRAFT_WEIGHTS = {"meta": 1.0, "ban": 0.3, "synergy": 0.6, "counter": 0.8, "threat": 0.8}
+
+# ----------------------------------------------------
+# --- 2. COMPILACIÓN DE LAS MATRICES (EN LA INGESTA) ---
+# ----------------------------------------------------
+
+def _zscore(values):
+    values = np.where(np.isnan(values), np.nanmean(values) if np.isfinite(values).any() else 0.0, values)
+    std = values.std()
+    return (values - values.mean()) / std if std else np.zeros_like(values)
+
+def compile_matrices(star_dir=None, path=None):
+    """
+    Compila las relaciones vigentes de cada héroe (dim_relation del esquema en
+    estrella) en matrices densas héroe×héroe y las guarda junto a los rates de la
+    última fecha. Fila i, columna j: relación del héroe i con el héroe j.
+    """
+    path = path or MATRICES_PATH
+    dim_hero = star_schema.load_table("dim_hero", star_dir)
+    manifest = star_schema.load_table(star_schema.MANIFEST_TABLE, star_dir)
+    if dim_hero.empty or manifest.empty:
+        print("⚠️ No hay esquema en estrella. Ejecuta primero: python -m src.star_schema update")
+        return None
+
+    # Versión vigente de cada héroe y sus relaciones
+    latest = dim_hero.sort_values("valid_from", kind="stable").drop_duplicates("hero_id", keep="last")
+    latest = latest.sort_values("hero_id").reset_index(drop=True)
+    hero_ids = latest["hero_id"].to_numpy(dtype="int64")
+    position = pd.Series(np.arange(len(hero_ids)), index=hero_ids)
+
+    relations = star_schema.load_table("dim_relation", star_dir)
+    relations = relations.merge(latest[["hero_id", "valid_from"]], on=["hero_id", "valid_from"])
+    relations = relations[relations["target_hero_id"].isin(position.index)]
+
+    n = len(hero_ids)
+    adjacency = {}
+    for relation in star_schema.RELATION_TYPES:
+        matrix = np.zeros((n, n), dtype="float32")
+        rel = relations[relations["relation"] == relation]
+        matrix[position[rel["hero_id"]].to_numpy(), position[rel["target_hero_id"]].to_numpy()] = 1.0
+        adjacency[relation] = matrix
+
+    # Rates actuales: la última partición de hechos
+    latest_date = manifest["date"].max()
+    facts = historical_store.load_history(star_schema.fact_dir(star_dir), start_date=latest_date, end_date=latest_date)
+    rates = facts.drop_duplicates("hero_id", keep="last").set_index("hero_id").reindex(hero_ids)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, hero_ids=hero_ids, hero_names=latest["hero_name"].to_numpy(dtype=str),
+             assist=adjacency["assist"], strong=adjacency["strong"], weak=adjacency["weak"],
+             win_rate=rates["win_rate"].to_numpy(dtype="float64"), ban_rate=rates["ban_rate"].to_numpy(dtype="float64"),
+             app_rate=rates["app_rate"].to_numpy(dtype="float64"), date=np.array(latest_date))
+    os.replace(tmp_path, path)
+    print(f"🧮 Matrices de relaciones compiladas ({n}×{n}, {len(relations)} relaciones, rates de {latest_date}) en {path}")
+    return path
+
+# ----------------------------------------------------
+# --- 3. MODELO DE DRAFT (PUNTUACIÓN VECTORIZADA) ---
+# ----------------------------------------------------
+
+class DraftModel:
+    """
+    Matrices de relaciones y rates actuales listos para puntuar picks.
+
+    Al cargar se precalculan las matrices de sinergia, counter y amenaza; puntuar
+    un draft son tres productos matriz-vector sobre vectores 0/1 de aliados y
+    enemigos, sin bucles de Python por héroe.
+    """
+
+    def __init__(self, arrays, weights=None):
+        self.weights = {**DRAFT_WEIGHTS, **(weights or {})}
+        self.hero_ids = arrays["hero_ids"]
+        self.hero_names = arrays["hero_names"]
+        self.date = str(arrays["date"])
+        self.win_rate = arrays["win_rate"]
+        self.ban_rate = arrays["ban_rate"]
+        assist, strong, weak = arrays["assist"], arrays["strong"], arrays["weak"]
+        self.synergy = np.maximum(assist, assist.T)
+        self.counter = np.maximum(strong, weak.T)
+        self.threat = np.maximum(weak, strong.T)
+        self.base_score = (self.weights["meta"] * _zscore(self.win_rate)
+                           + self.weights["ban"] * _zscore(self.ban_rate))
+        self._position = {int(h): i for i, h in enumerate(self.hero_ids)}
+        self._position.update({name.lower(): i for i, name in enumerate(self.hero_names)})
+
+    @classmethod
+    def load(cls, path=None, weights=None):
+        with np.load(path or MATRICES_PATH) as arrays:
+            return cls({key: arrays[key] for key in arrays.files}, weights)
+
+    def positions(self, heroes):
+        """Índices de los héroes indicados por ID o nombre (se ignoran los desconocidos)."""
+        found = []
+        for hero in heroes or []:
+            key = int(hero) if str(hero).isdigit() else str(hero).lower()
+            if key in self._position:
+                found.append(self._position[key])
+        return found
+
+    def recommend(self, allies=None, enemies=None, bans=None, limit=10):
+        """Picks ordenados por puntuación para el draft parcial (aliados, enemigos y baneos)."""
+        n = len(self.hero_ids)
+        ally_idx, enemy_idx, ban_idx = self.positions(allies), self.positions(enemies), self.positions(bans)
+        ally_vec = np.zeros(n, dtype="float32")
+        ally_vec[ally_idx] = 1.0
+        enemy_vec = np.zeros(n, dtype="float32")
+        enemy_vec[enemy_idx] = 1.0
+
+        synergy = self.synergy @ ally_vec
+        counter = self.counter @ enemy_vec
+        threat = self.threat @ enemy_vec
+        score = (self.base_score + self.weights["synergy"] * synergy
+                 + self.weights["counter"] * counter - self.weights["threat"] * threat)
+
+        # Héroes ya elegidos o baneados no se pueden recomendar
+        score[ally_idx + enemy_idx + ban_idx] = -np.inf
+        limit = max(0, min(limit, n - len(set(ally_idx + enemy_idx + ban_idx))))
+        top = np.argpartition(-score, limit - 1)[:limit] if limit else np.array([], dtype=int)
+        top = top[np.argsort(-score[top], kind="stable")]
+
+        return [{"hero_id": int(self.hero_ids[i]), "hero_name": str(self.hero_names[i]),
+                 "score": round(float(score[i]), 4),
+                 "win_rate_pct": round(float(self.win_rate[i]) * 100, 2) if np.isfinite(self.win_rate[i]) else None,
+                 "ban_rate_pct": round(float(self.ban_rate[i]) * 100, 2) if np.isfinite(self.ban_rate[i]) else None,
+                 "synergy": int(synergy[i]), "counters": int(counter[i]), "threats": int(threat[i])}
+                for i in top]
+
+# ----------------------------------------------------
+# --- 4. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matrices de sinergia/counter y recomendación de draft")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Compila las matrices desde el esquema en estrella")
+    build_parser.add_argument("--star-dir", default=None)
+    build_parser.add_argument("--out", default=None)
+
+    recommend_parser = subparsers.add_parser("recommend", help="Recomienda picks para un draft parcial")
+    recommend_parser.add_argument("--ally", nargs="*", default=[], help="Aliados (ID o nombre)")
+    recommend_parser.add_argument("--enemy", nargs="*", default=[], help="Enemigos (ID o nombre)")
+    recommend_parser.add_argument("--ban", nargs="*", default=[], help="Baneados (ID o nombre)")
+    recommend_parser.add_argument("--limit", type=int, default=10)
+    recommend_parser.add_argument("--matrices", default=None)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        compile_matrices(args.star_dir, args.out)
+    elif args.command == "recommend":
+        model = DraftModel.load(args.matrices)
+        start = time.perf_counter()
+        picks = model.recommend(args.ally, args.enemy, args.ban, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"🎯 Recomendaciones (rates de {model.date}, {elapsed_ms:.2f} ms):")
+        for rank, pick in enumerate(picks, start=1):
+            print(f"{rank:2d}. {pick['hero_name']} (ID {pick['hero_id']}): {pick['score']:+.2f} | "
+                  f"WR {pick['win_rate_pct']}% | sinergias {pick['synergy']}, counters {pick['counters']}, "
+                  f"amenazas {pick['threats']}")
@@ -1,98 +1,65 @@
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Backend sin pantalla: permite renderizar en procesos del pool
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-import ast # Para parsear strings de listas/diccionarios
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import os
 from pandas import DataFrame
+import sys
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store
+from src import preprocess_cache
+from src import rollups
+from src import sqlite_store
 
 # ----------------------------------------------------
 # ------------- 1. CONFIGURACIÓN ---------------------
 # ----------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE_PATH = os.path.join(BASE_DIR,"..","data","mobile_legends_data_historical.csv")
+DATA_FILE_PATH = historical_store.DATASET_DIR # Dataset Parquet particionado por extraction_date
 # REPORT_DIR = os.path.abspath(os.path.join(BASE_DIR,"..","reports")) # Carpeta para guardar los reportes/gráficos
 REPORT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'reports'))
 
 
+# Procesos para renderizar gráficos en paralelo
+CHART_WORKERS = min(4, os.cpu_count() or 1)
+
+# Clave del hash de entrada guardada en los metadatos del PNG. Subir CHART_VERSION
+# fuerza a regenerar todos los gráficos cuando cambia el código de dibujo.
+CHART_HASH_KEY = "InputHash"
+CHART_VERSION = 1
+
 # Asegurarse de que la carpeta de reportes exista
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 # ----------------------------------------------------
-# ----------- 2. FUNCIONES AUXILIARES ----------------
+# --- 2. FUNCIONES DE ANÁLISIS Y VISUALIZACIÓN ---
 # ----------------------------------------------------
 
-def extract_roles(roles_str):
-    if not isinstance(roles_str, str) or pd.isna(roles_str):
-        return "Unknown"
-    try:
-        roles_list = ast.literal_eval(roles_str)
-        roles = [item['data']['sort_title'] for item in roles_list if isinstance(item, dict) and 'data' in item and 'sort_title' in item['data']]
-        return ', '.join(roles) if roles else "Unknown"
-    except (ValueError, SyntaxError, TypeError):
-        return "Unknown"
-
-def extract_latest_win_rate(data_str):
-    if not isinstance(data_str, str) or pd.isna(data_str):
-        return np.nan
-    try:
-        data_dict = ast.literal_eval(data_str)
-        if 'win_rate' in data_dict and data_dict['win_rate']:
-            # Verifica si la lista no está vacía antes de acceder a [-1]
-            if data_dict['win_rate']:
-                return data_dict['win_rate'][-1].get('win_rate')
-        return np.nan
-    except (ValueError, SyntaxError, TypeError):
-        return np.nan
-
-def extract_latest_ban_rate(data_str):
-    if not isinstance(data_str, str) or pd.isna(data_str):
-        return np.nan
+def load_and_preprocess_data(file_path: str, start_date=None, end_date=None, hero_ids=None) -> DataFrame:
+    """
+    Carga el histórico (dataset Parquet o CSV legado) leyendo solo las particiones
+    del rango de fechas pedido y las columnas necesarias, y deriva las métricas.
+    Las particiones ya preprocesadas se reutilizan desde la caché. Si la base
+    SQLite indexada está al día con el origen, la consulta se resuelve en ella.
+    Devuelve el frame con el esquema compacto (ver preprocess_cache.compact_frame).
+    """
     try:
-        data_dict = ast.literal_eval(data_str)
-        if 'win_rate' in data_dict and data_dict['win_rate']:
-            # Verifica si la lista no está vacía antes de acceder a [-1]
-            if data_dict['win_rate']:
-                return data_dict['win_rate'][-1].get('ban_rate')
-        return np.nan
-    except (ValueError, SyntaxError, TypeError):
-        return np.nan
-
-# ----------------------------------------------------
-# --- 3. FUNCIONES DE ANÁLISIS Y VISUALIZACIÓN ---
-# ----------------------------------------------------
+        if sqlite_store.is_current(file_path):
+            return preprocess_cache.compact_frame(sqlite_store.query_history(start_date, end_date, hero_ids=hero_ids))
 
-def load_and_preprocess_data(file_path: str) -> DataFrame:
-    try:
-        df = pd.read_csv(file_path)
-        # Aplicar las funciones de extracción para limpiar las columnas 'data' y 'hero.data.sortid'
-        df['win_rate'] = df['data'].apply(extract_latest_win_rate)
-        df['ban_rate'] = df['data'].apply(extract_latest_ban_rate)
-        
-        df.rename(columns={'hero.data.name': 'hero_name',
-                        'hero.data.sortid': 'raw_roles'}, inplace=True)
-        
-        df['role'] = df['raw_roles'].apply(extract_roles)
-        df['primary_role'] = df['role'].apply(lambda x: x.split(',')[0].strip()) # Para agrupar por rol principal
-        
-        df['win_rate_pct'] = df['win_rate'] * 100
-        df['ban_rate_pct'] = df['ban_rate'] * 100
-        
-        df['extraction_date'] = pd.to_datetime(df['extraction_date'])
-
-        # 🧩 Crear la columna 'lane_clean' si existe alguna con ese dato
-        if 'lane' in df.columns:
-            df['lane_clean'] = df['lane'].str.strip().fillna('Desconocido')
-        elif 'data.lane' in df.columns:
-            df['lane_clean'] = df['data.lane'].str.strip().fillna('Desconocido')
-        else:
-            df['lane_clean'] = 'Desconocido'
-        
-        # Eliminar filas con valores nulos en columnas críticas para el análisis
-        df_clean = df.dropna(subset=['hero_name', 'win_rate_pct', 'ban_rate_pct', 'primary_role']).copy()
-        
-        return df_clean
+        # Preprocesado canónico con caché por partición (compartida con reporting y el dashboard)
+        return preprocess_cache.compact_frame(preprocess_cache.load_preprocessed(
+            file_path, start_date=start_date, end_date=end_date, hero_ids=hero_ids))
 
     except FileNotFoundError:
         print(f"Error: El archivo '{file_path}' no fue encontrado.")
@@ -101,18 +68,12 @@ def load_and_preprocess_data(file_path: str) -> DataFrame:
         print(f"Ocurrió un error al cargar o preprocesar los datos: {e}")
         return pd.DataFrame()
 
-def plot_win_rate_vs_ban_rate(df: DataFrame, current_date: str):
-    """Genera un scatter plot de Win Rate vs Ban Rate y lo guarda."""
-    
-    if 'lane_clean' not in df.columns:
-        print("⚠️ Columna 'lane_clean' no encontrada. No se puede generar el gráfico por Línea.")
-        return
-    
-    df_grouped = df.groupby('lane_clean')['win_rate_pct'].mean().reset_index()
-
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x='lane_clean', y='win_rate_pct', data=df_grouped, hue='lane_clean', palette="rocket", legend=False)
+def save_chart(file_name: str, input_hash=None):
+    """Guarda la figura actual; el hash de entrada queda en los metadatos del PNG."""
+    plt.savefig(file_name, metadata={CHART_HASH_KEY: input_hash} if input_hash else None)
 
+def plot_win_rate_vs_ban_rate(df: DataFrame, current_date: str, input_hash=None):
+    """Genera un scatter plot de Win Rate vs Ban Rate y lo guarda."""
     plt.figure(figsize=(12, 8))
     sns.scatterplot(
         data=df,
@@ -136,37 +97,48 @@ def plot_win_rate_vs_ban_rate(df: DataFrame, current_date: str):
     plt.grid(True, linestyle='--', alpha=0.6)
     plt.legend(title='Rol Principal', bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.tight_layout()
-    plt.savefig(os.path.join(REPORT_DIR, f"{current_date}_ban_vs_win_rate.png"))
+    save_chart(os.path.join(REPORT_DIR, f"{current_date}_ban_vs_win_rate.png"), input_hash)
     plt.close()
     print(f"📈 Gráfico de Win Rate vs Ban Rate guardado en {os.path.join(REPORT_DIR, f'{current_date}_ban_vs_win_rate.png')}")
 
 
     
-def plot_win_rate_by_role(df, current_date):
-    """Genera un box plot del Win Rate por rol principal y lo guarda."""
-    plt.figure(figsize=(12, 8))
-    sns.boxplot(data=df, x='primary_role', y='win_rate_pct', hue='primary_role', palette='coolwarm', legend=False)
-    plt.title(f'Distribución de Win Rate por Rol Principal (Al {current_date})', fontsize=16)
-    plt.xlabel('Rol Principal', fontsize=12)
-    plt.ylabel('Tasa de Victoria (%)', fontsize=12)
+def plot_win_rate_by_role(df_role_stats: DataFrame, current_date: str, input_hash=None):
+    """
+    Genera un box plot del Win Rate por rol principal y lo guarda.
+    Se dibuja directamente desde los estadísticos precalculados (agregados diarios).
+    """
+    stats = [
+        {"label": row['primary_role'], "med": row['median'], "q1": row['q1'], "q3": row['q3'],
+         "whislo": row['whislo'], "whishi": row['whishi'], "fliers": list(row['fliers']), "mean": row['mean']}
+        for _, row in df_role_stats.sort_values('primary_role').iterrows()
+    ]
+    fig, ax = plt.subplots(figsize=(12, 8))
+    boxes = ax.bxp(stats, patch_artist=True, showfliers=True)
+    for patch, color in zip(boxes['boxes'], sns.color_palette('coolwarm', len(stats))):
+        patch.set_facecolor(color)
+    ax.set_title(f'Distribución de Win Rate por Rol Principal (Al {current_date})', fontsize=16)
+    ax.set_xlabel('Rol Principal', fontsize=12)
+    ax.set_ylabel('Tasa de Victoria (%)', fontsize=12)
     plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y', linestyle='--', alpha=0.6)
+    ax.grid(axis='y', linestyle='--', alpha=0.6)
     plt.tight_layout()
-    plt.savefig(os.path.join(REPORT_DIR, f"{current_date}_win_rate_by_role.png"))
+    save_chart(os.path.join(REPORT_DIR, f"{current_date}_win_rate_by_role.png"), input_hash)
     plt.close()
     print(f"📊 Gráfico de Win Rate por Rol guardado en {os.path.join(REPORT_DIR, f'{current_date}_win_rate_by_role.png')}")
 
-def plot_win_rate_by_lane(df: DataFrame, current_date: str):
+def plot_win_rate_by_lane(df_lane_stats: DataFrame, current_date: str, input_hash=None):
     """
-    Calcula y grafica el Win Rate promedio por Línea (Lane).
+    Grafica el Win Rate promedio por Línea (Lane) a partir de los agregados diarios.
     """
-    # 1. Agrupar por la columna de Línea
-    # NOTA: Asegúrate que la columna 'lane_clean' o similar exista en tu DataFrame limpio.
-    if 'lane_clean' not in df.columns:
-        print("⚠️ Columna 'lane_clean' no encontrada. No se puede generar el gráfico por Línea.")
+    # 1. Medias por línea ya materializadas en la ingesta
+    if df_lane_stats.empty:
+        print("⚠️ No hay agregados por Línea. No se puede generar el gráfico por Línea.")
         return
 
-    df_grouped = df.groupby('lane_clean')['win_rate_pct'].mean().reset_index()
+    df_grouped = (df_lane_stats.sort_values('lane_clean')
+                  .rename(columns={'mean': 'win_rate_pct'})[['lane_clean', 'win_rate_pct']]
+                  .reset_index(drop=True))
 
     plt.figure(figsize=(10, 6))
     sns.barplot(x='lane_clean', y='win_rate_pct', data=df_grouped, hue='lane_clean', palette="rocket", legend=False)
@@ -185,10 +157,80 @@ def plot_win_rate_by_lane(df: DataFrame, current_date: str):
 
     # Guardar con el nombre solicitado: win_rate_by_lane.png
     file_name = os.path.join(REPORT_DIR, f"{current_date}_win_rate_by_lane.png")
-    plt.savefig(file_name)
+    save_chart(file_name, input_hash)
     plt.close()
     print(f"📊 Gráfico de Win Rate por Línea guardado en {file_name}")
 
+# ----------------------------------------------------
+# --- 3. RENDERIZADO EN PARALELO CON MEMOIZACIÓN ---
+# ----------------------------------------------------
+
+# Gráfico -> (función de dibujo, sufijo del fichero, columnas de entrada que usa)
+CHARTS = {
+    "ban_vs_win_rate": (plot_win_rate_vs_ban_rate, "ban_vs_win_rate.png",
+                        ['hero_name', 'primary_role', 'win_rate_pct', 'ban_rate_pct']),
+    "win_rate_by_role": (plot_win_rate_by_role, "win_rate_by_role.png", None),
+    "win_rate_by_lane": (plot_win_rate_by_lane, "win_rate_by_lane.png", None),
+}
+
+def chart_path(chart: str, current_date: str) -> str:
+    return os.path.join(REPORT_DIR, f"{current_date}_{CHARTS[chart][1]}")
+
+def chart_input_hash(chart: str, df: DataFrame, current_date: str) -> str:
+    """Hash del gráfico, la fecha (va en el título) y el contenido exacto de su trozo de datos."""
+    payload = df.to_csv(index=False).encode("utf-8")
+    key = f"{chart}|{CHART_VERSION}|{current_date}|".encode("utf-8") + payload
+    return hashlib.sha1(key).hexdigest()
+
+def stored_chart_hash(file_name: str):
+    """Hash de entrada con el que se generó un PNG existente (None si no hay o no se puede leer)."""
+    if not os.path.exists(file_name):
+        return None
+    try:
+        from PIL import Image
+        with Image.open(file_name) as image:
+            return image.text.get(CHART_HASH_KEY)
+    except Exception:
+        return None
+
+def _render_chart(chart, df, current_date, input_hash, report_dir):
+    """Trabajo de un proceso del pool: dibuja un gráfico y devuelve su ruta."""
+    global REPORT_DIR
+    REPORT_DIR = report_dir
+    CHARTS[chart][0](df, current_date, input_hash=input_hash)
+    return chart_path(chart, current_date)
+
+def render_charts(jobs, max_workers=None):
+    """
+    Renderiza una lista de (gráfico, df, fecha). Se omiten los gráficos sin datos
+    (p. ej. una fecha sin agregados) y los que ya existen con el mismo hash de
+    entrada; el resto se reparte en un pool de procesos.
+    Devuelve {'rendered': [...], 'skipped': [...]} con las rutas.
+    """
+    max_workers = CHART_WORKERS if max_workers is None else max_workers
+    pending, skipped = [], []
+    for chart, df, current_date in jobs:
+        if df is None or df.empty:
+            print(f"⚠️ Sin datos para el gráfico '{chart}' del {current_date}: no se genera.")
+            continue
+        columns = CHARTS[chart][2]
+        df = df[columns] if columns else df
+        input_hash = chart_input_hash(chart, df, current_date)
+        if stored_chart_hash(chart_path(chart, current_date)) == input_hash:
+            skipped.append(chart_path(chart, current_date))
+        else:
+            pending.append((chart, df, current_date, input_hash, REPORT_DIR))
+
+    if max_workers <= 1 or len(pending) <= 1:
+        rendered = [_render_chart(*job) for job in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            rendered = list(executor.map(_render_chart, *zip(*pending)))
+
+    if skipped:
+        print(f"⏭️ {len(skipped)} gráfico(s) sin cambios en sus datos: se reutiliza el PNG existente.")
+    return {"rendered": rendered, "skipped": skipped}
+
 # ----------------------------------------------------
 # --- 4. FUNCIÓN PRINCIPAL DE EJECUCIÓN DEL ANÁLISIS ---
 # ----------------------------------------------------
@@ -196,7 +238,14 @@ def plot_win_rate_by_lane(df: DataFrame, current_date: str):
 def run_eda_analysis():
     print("Iniciando Análisis Exploratorio de Datos (EDA)...")
     
-    df_historical = load_and_preprocess_data(DATA_FILE_PATH)
+    source = DATA_FILE_PATH if historical_store.list_partition_dates(DATA_FILE_PATH) else historical_store.LEGACY_CSV_PATH
+    available_dates = historical_store.list_partition_dates(source)
+    if not available_dates:
+        print("No se pudo cargar o preprocesar los datos. Saliendo del EDA.")
+        return
+
+    # Solo se necesita la partición más reciente para los gráficos del meta actual
+    df_historical = load_and_preprocess_data(source, start_date=available_dates[-1])
     
     if df_historical.empty:
         print("No se pudo cargar o preprocesar los datos. Saliendo del EDA.")
@@ -206,16 +255,25 @@ def run_eda_analysis():
     print(f"Analizando datos hasta la última fecha de extracción: {latest_date.strftime('%Y-%m-%d')}")
 
     # Filtrar datos de la fecha más reciente para los gráficos de meta actual
-    df_latest = df_historical[df_historical['extraction_date'] == latest_date].copy()
+    df_latest = df_historical.loc[latest_date:latest_date].copy()
 
     if df_latest.empty:
         print("No hay datos para la fecha más reciente. No se generarán gráficos.")
         return
 
-    # Generar y guardar los gráficos
-    plot_win_rate_vs_ban_rate(df_latest, latest_date.strftime('%Y%m%d'))
-    plot_win_rate_by_role(df_latest, latest_date.strftime('%Y%m%d'))
-    plot_win_rate_by_lane(df_latest,latest_date.strftime('%Y%m%d'))
+    # Agregados por rol y línea: se leen de las tablas materializadas (solo se calcula lo nuevo)
+    rollups.update_rollups(source)
+    latest_key = latest_date.strftime('%Y-%m-%d')
+    df_role_stats = rollups.load_rollup("role_stats", start_date=latest_key, end_date=latest_key)
+    df_lane_stats = rollups.load_rollup("lane_stats", start_date=latest_key, end_date=latest_key)
+
+    # Generar y guardar los gráficos (en paralelo; se omiten los que no cambiaron)
+    current_date = latest_date.strftime('%Y%m%d')
+    render_charts([
+        ("ban_vs_win_rate", df_latest, current_date),
+        ("win_rate_by_role", df_role_stats, current_date),
+        ("win_rate_by_lane", df_lane_stats, current_date),
+    ])
     print("EDA completado y gráficos generados.")
 
 # ----------------------------------------------------
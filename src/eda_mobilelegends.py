@@ -6,6 +6,12 @@ import sys
 import json
 from datetime import datetime
 import csv   
+import ast
+from datetime import timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode
 
 # ---------------------------------------------------
 # Añadir el directorio padre al path para importar config
@@ -16,23 +22,183 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 
 from config.config import API_BASE_URL # Debe existir este archivo con la URL base de la API
+from config.config import MAX_IN_FLIGHT, REQUESTS_PER_SECOND
+from config.config import API_TRANSPORT, API_RECORDINGS_DIR
+from config.config import (REQUEST_TIMEOUT_SECONDS, RETRY_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+                           CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+from src.http_cache import ResponseCache, get_response_cache
+from src.http_resilience import RETRY_STATUSES, CircuitBreaker, backoff_delay
+from src.checkpoint import checkpoint_for
+from src.api_replay import TRANSPORTS, make_transport
+from src import historical_store
+from src import metrics
+from src.rate_series import update_rate_series
+from src.rollups import update_rollups
+from src.star_schema import update_star_schema
+from src.draft_matrices import compile_matrices
+from src.rate_cube import update_rate_cube
+from src.sqlite_store import sync_store
+from src.preprocess_cache import export_analysis_frame, prime_partition
+
+DATA_DIR = os.path.join(parent_dir, 'data')
+HISTORICAL_DATASET_DIR = historical_store.DATASET_DIR
+
+# Columnas que aporta hero-rate/ID/ (se reutilizan tal cual para los héroes no re-extraídos)
+RATE_COLUMNS = ['_createdAt', '_id', '_updatedAt', 'data', 'sourceId']
+
+# '_updatedAt' del registro de hero-position (json_normalize de 'data' lo descarta): se guarda
+# aparte para que el modo incremental compare la posición con la posición, no con el rating
+POSITION_UPDATED_COLUMN = 'position_updated_at'
+
+# --- CONEXIÓN HTTP COMPARTIDA ---
+
+_session = None
+_session_lock = threading.Lock()
+
+# Transporte de la sesión: "live", "record" o "replay" (ver src/api_replay.py)
+_transport = API_TRANSPORT
+_recordings_dir = os.path.join(parent_dir, API_RECORDINGS_DIR)
+
+def get_session():
+    """
+    Devuelve una única sesión HTTP (keep-alive) compartida por todas las peticiones.
+    El pool de conexiones se dimensiona con MAX_IN_FLIGHT para el modo concurrente.
+    En modo "record" o "replay" el transporte correspondiente se monta sobre API_BASE_URL.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = max(1, MAX_IN_FLIGHT)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            transport = make_transport(_transport, _recordings_dir, API_BASE_URL,
+                                       pool_connections=1, pool_maxsize=pool_size)
+            if transport is not None:
+                _session.mount(API_BASE_URL, transport)
+        return _session
+
+def set_transport(mode, recordings_dir=None):
+    """Cambia el transporte de fetch_data ("live", "record" o "replay") y reinicia la sesión."""
+    global _session, _transport, _recordings_dir
+    if mode not in TRANSPORTS:
+        raise ValueError(f"Transporte desconocido: {mode!r} (use {', '.join(TRANSPORTS)})")
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _transport = mode
+        _recordings_dir = recordings_dir or os.path.join(parent_dir, API_RECORDINGS_DIR)
+
+_circuit_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+
+def get_circuit_breaker():
+    """Circuit breaker compartido por todas las llamadas a la API."""
+    return _circuit_breaker
+
+class RateLimiter:
+    """
+    Limitador global de peticiones por segundo, seguro entre hilos.
+    Reparte las llamadas en ranuras equiespaciadas en lugar de un sleep fijo.
+    """
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
 # --- FUNCIONES AUXILIARES ---
 
-def fetch_data(endpoint):
+def fetch_data(endpoint, use_cache=True):
     """
     Función robusta para hacer la llamada a la API y retornar el objeto JSON crudo.
+
+    Con use_cache=True las respuestas se guardan en la caché de disco: una entrada
+    fresca (dentro de su TTL) se devuelve sin tocar la red, y una caducada con
+    ETag/Last-Modified se revalida con una petición condicional (304 = reutilizar).
+
+    Los fallos transitorios (errores de red, timeouts, 429 y 5xx) se reintentan
+    con backoff exponencial y jitter. Si la API acumula fallos consecutivos, el
+    circuit breaker deja de enviar peticiones durante un tiempo. Devuelve None
+    si no se obtiene respuesta válida.
     """
     url_completa = f"{API_BASE_URL}{endpoint}"
+    # Grabando o reproduciendo, cada llamada debe llegar al transporte (no a la caché de disco)
+    cache = get_response_cache() if use_cache and _transport == "live" else None
+    entry = cache.get(endpoint) if cache else None
+
+    if entry is not None and cache.is_fresh(endpoint, entry):
+        print(f"-> Caché (fresca): /{endpoint}")
+        metrics.record_http(endpoint, "cache", 0.0)
+        return entry["body"]
+
     print(f"-> Extrayendo datos de: /{endpoint}")
+    breaker = get_circuit_breaker()
+    headers = ResponseCache.conditional_headers(entry) if entry else {}
     
-    try:
-        response = requests.get(url_completa)
-        response.raise_for_status() 
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error al conectar con la API en /{endpoint}: {e}")
-        return None
+    for attempt in range(max(1, RETRY_ATTEMPTS)):
+        if not breaker.allow():
+            metrics.record_http(endpoint, "circuit_open", 0.0)
+            print(f"❌ Circuito abierto: se omite /{endpoint}")
+            return None
+
+        retry_after = None
+        body = None
+        start = time.perf_counter()
+        # Cada intento registra un único resultado (métrica + breaker): el cuerpo se
+        # interpreta antes de dar la respuesta por buena
+        try:
+            response = get_session().get(url_completa, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+            outcome = response.status_code
+            if response.status_code in RETRY_STATUSES:
+                retry_after = response.headers.get("Retry-After")
+                error = f"HTTP {response.status_code}"
+            elif response.ok and not (response.status_code == 304 and entry is not None):
+                body = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # Sin respuesta HTTP válida (timeout, conexión rechazada, JSON cortado...)
+            outcome = type(e).__name__
+            error = str(e)
+        metrics.record_http(endpoint, outcome, time.perf_counter() - start, retries=int(attempt > 0))
+
+        if not isinstance(outcome, int) or outcome in RETRY_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()  # El upstream responde (aunque sea un 4xx)
+
+            if outcome == 304 and entry is not None:
+                cache.refresh(endpoint, entry)
+                return entry["body"]
+
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                # 4xx distinto de 429: reintentar no lo va a arreglar
+                print(f"❌ Error al conectar con la API en /{endpoint}: {e}")
+                return None
+            if cache is not None:
+                cache.put(endpoint, body,
+                          etag=response.headers.get("ETag"),
+                          last_modified=response.headers.get("Last-Modified"))
+            return body
+
+        if attempt + 1 < RETRY_ATTEMPTS:
+            delay = backoff_delay(attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX, retry_after)
+            print(f"↻ Reintento {attempt + 1}/{RETRY_ATTEMPTS - 1} de /{endpoint} en {delay:.1f}s ({error})")
+            time.sleep(delay)
+
+    print(f"❌ Error al conectar con la API en /{endpoint} tras {RETRY_ATTEMPTS} intentos: {error}")
+    return None
 
 def extract_list_from_api_response(raw_json, _endpoint_name):
     """ 
@@ -47,44 +213,177 @@ def extract_list_from_api_response(raw_json, _endpoint_name):
         
     return []
 
-def fetch_all_hero_rates(hero_ids):
+def fetch_latest_hero_rate(hero_id, limiter=None, use_cache=True, params=None):
     """
-    Itera sobre una lista de IDs y hace una petición individual a hero-rate/ID/.
+    Pide hero-rate/ID/ y devuelve el registro más reciente de la serie (o None).
+    'params' añade filtros de la API a la query string (p. ej. rango y modo).
     """
-    all_rates = []
-    total_heroes = len(hero_ids)
+    if limiter is not None:
+        limiter.wait()
+
+    # Endpoint para el rating de un héroe, usando el ID como parámetro de ruta.
+    endpoint = f"hero-rate/{hero_id}/" 
+    if params:
+        endpoint += f"?{urlencode(params)}"
     
-    print(f"\n--- FASE 2: EXTRACCIÓN INDIVIDUAL DE RATINGS ({total_heroes} héroes) ---")
+    rate_raw = fetch_data(endpoint, use_cache=use_cache) # Obtiene el JSON crudo
     
-    for i, hero_id in enumerate(hero_ids):
-        # Endpoint para el rating de un héroe, usando el ID como parámetro de ruta.
-        endpoint = f"hero-rate/{hero_id}/" 
+    # Desempaquetado para hero-rate: 'data' -> 'records'
+    if rate_raw and 'data' in rate_raw and 'records' in rate_raw['data']:
+        rate_data_records = rate_raw['data']['records']
         
-        rate_raw = fetch_data(endpoint) # Obtiene el JSON crudo
-        
-        # Desempaquetado para hero-rate: 'data' -> 'records'
-        if rate_raw and 'data' in rate_raw and 'records' in rate_raw['data']:
-            rate_data_records = rate_raw['data']['records']
-            
-            if rate_data_records:
-                # Seleccionamos la data más reciente de la serie de tiempo para el EDA.
-                latest_rate = rate_data_records[-1] 
-                
-                # Añadimos el ID para poder hacer el merge (¡Usamos el ID correcto!)
-                latest_rate['hero_id'] = hero_id 
-                all_rates.append(latest_rate)
+        if rate_data_records:
+            # Seleccionamos la data más reciente de la serie de tiempo para el EDA.
+            latest_rate = rate_data_records[-1] 
             
-        time.sleep(0.1) 
-        print(f"Procesando ratings... {i + 1}/{total_heroes}", end='\r')
+            # Añadimos el ID para poder hacer el merge (¡Usamos el ID correcto!)
+            latest_rate['hero_id'] = hero_id 
+            return latest_rate
+    return None
+
+def fetch_all_hero_rates(hero_ids, max_in_flight=MAX_IN_FLIGHT, requests_per_second=REQUESTS_PER_SECOND,
+                         use_cache=True, checkpoint=None):
+    """
+    Hace una petición individual a hero-rate/ID/ por cada ID de la lista.
+
+    Con max_in_flight > 1 las peticiones se lanzan en un pool de hilos acotado que
+    comparte la misma sesión keep-alive; requests_per_second limita el ritmo global.
+    El DataFrame resultante conserva el orden de hero_ids en ambos modos.
+
+    Con un 'checkpoint' (ver src.checkpoint), los héroes ya completados en esta
+    ejecución se cargan de él en lugar de pedirse, y cada héroe nuevo se anota en
+    cuanto llega. Los IDs sin datos quedan en df.attrs['missing_hero_ids'].
+    """
+    done = checkpoint.load() if checkpoint is not None else {}
+    pending_ids = [hero_id for hero_id in hero_ids if hero_id not in done]
+    total_heroes = len(pending_ids)
+    limiter = RateLimiter(requests_per_second)
+
+    def fetch_one(hero_id):
+        latest_rate = fetch_latest_hero_rate(hero_id, limiter, use_cache)
+        if latest_rate is not None and checkpoint is not None:
+            checkpoint.add(latest_rate)
+        return latest_rate
+    
+    print(f"\n--- FASE 2: EXTRACCIÓN INDIVIDUAL DE RATINGS ({total_heroes} héroes) ---")
+    if done:
+        print(f"♻️ Reanudando desde el checkpoint: {len(hero_ids) - total_heroes}/{len(hero_ids)} héroes ya completados.")
+    
+    if max_in_flight <= 1:
+        results = (fetch_one(hero_id) for hero_id in pending_ids)
+        for i, latest_rate in enumerate(results):
+            if latest_rate is not None:
+                done[latest_rate['hero_id']] = latest_rate
+            print(f"Procesando ratings... {i + 1}/{total_heroes}", end='\r')
+    else:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            # executor.map respeta el orden de entrada aunque las respuestas lleguen desordenadas
+            results = executor.map(fetch_one, pending_ids)
+            for i, latest_rate in enumerate(results):
+                if latest_rate is not None:
+                    done[latest_rate['hero_id']] = latest_rate
+                print(f"Procesando ratings... {i + 1}/{total_heroes}", end='\r')
+
+    all_rates = [done[hero_id] for hero_id in hero_ids if hero_id in done]
+    missing = [hero_id for hero_id in hero_ids if hero_id not in done]
         
     print(f"\n✔️ Extracción de {len(all_rates)} ratings individuales completada.")
-    return pd.DataFrame(all_rates)
+    if missing:
+        print(f"⚠️ Sin datos para {len(missing)} héroe(s): {missing}")
+    df_rates = pd.DataFrame(all_rates)
+    df_rates.attrs['missing_hero_ids'] = missing
+    return df_rates
+
+# --- DESCUBRIMIENTO DE HÉROES Y DETECCIÓN DE CAMBIOS ---
+
+def discover_hero_ids(df_positions):
+    """
+    Deriva la lista de IDs a extraer a partir de la respuesta de hero-position.
+    """
+    ids = pd.to_numeric(df_positions['hero_id'], errors='coerce').dropna().astype(int)
+    return sorted(ids.unique().tolist())
+
+def _latest_series_date(data_value):
+    """Fecha más reciente de la serie 'win_rate' de un blob 'data' (JSON o repr de Python)."""
+    if isinstance(data_value, str):
+        try:
+            data_value = json.loads(data_value)
+        except ValueError:
+            try:
+                data_value = ast.literal_eval(data_value)
+            except (ValueError, SyntaxError):
+                return None
+    if not isinstance(data_value, dict) or not data_value.get('win_rate'):
+        return None
+    return max(point.get('date', '') for point in data_value['win_rate']) or None
+
+def load_stored_hero_state(dataset_dir=None):
+    """
+    Último registro guardado por héroe en el histórico: columnas del rating, el
+    '_updatedAt' de su posición y la fecha más reciente de su serie de ratings.
+    Solo se lee la partición más reciente del dataset.
+    """
+    dataset_dir = dataset_dir or HISTORICAL_DATASET_DIR
+    dates = historical_store.list_partition_dates(dataset_dir)
+    if not dates:
+        return pd.DataFrame()
+
+    # Se lee el fichero de la partición directamente: el esquema del dataset se infiere de
+    # la partición más antigua, que puede no tener la columna de la posición
+    wanted = ['hero_id'] + RATE_COLUMNS + [POSITION_UPDATED_COLUMN]
+    df = pd.read_parquet(historical_store.partition_path(dates[-1], dataset_dir))
+    if df.empty or 'hero_id' not in df.columns:
+        return pd.DataFrame()
+
+    df = df[[c for c in wanted if c in df.columns]].drop_duplicates('hero_id', keep='last')
+    df['latest_series_date'] = df['data'].apply(_latest_series_date)
+    return df.set_index('hero_id')
+
+def plan_incremental_fetch(hero_ids, position_updated_at, stored_state, today=None):
+    """
+    Decide qué héroes hay que volver a pedir a hero-rate/ID/.
+
+    Un héroe está al día si el histórico ya contiene la fecha de serie más reciente
+    que puede publicar la API (ayer) y su registro en hero-position no ha cambiado
+    desde el '_updatedAt' de posición guardado (POSITION_UPDATED_COLUMN). Sin ese
+    valor guardado (particiones anteriores) no se detecta cambio de posición.
+    Devuelve (ids_a_extraer, ids_omitidos).
+    """
+    if stored_state is None or stored_state.empty:
+        return list(hero_ids), []
+
+    today = today or datetime.now().date()
+    expected_series_date = (today - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    stale, fresh = [], []
+    for hero_id in hero_ids:
+        if hero_id not in stored_state.index:
+            stale.append(hero_id)
+            continue
+        stored = stored_state.loc[hero_id]
+        series_date = stored.get('latest_series_date')
+        stored_updated = pd.to_numeric(stored.get(POSITION_UPDATED_COLUMN), errors='coerce')
+        upstream_updated = pd.to_numeric(position_updated_at.get(hero_id), errors='coerce')
+
+        series_is_current = isinstance(series_date, str) and series_date >= expected_series_date
+        upstream_changed = (pd.notna(upstream_updated) and pd.notna(stored_updated)
+                            and upstream_updated > stored_updated)
+
+        if series_is_current and not upstream_changed:
+            fresh.append(hero_id)
+        else:
+            stale.append(hero_id)
+    return stale, fresh
 
 # --- PIPELINE PRINCIPAL ---
 
-def data_extraction_pipeline():
+def data_extraction_pipeline(incremental=False):
     """ 
     Orquesta la extracción, combinación y guardado de datos.
+
+    Los IDs a extraer se descubren en la respuesta de hero-position. Con
+    incremental=True solo se piden los ratings de héroes desactualizados en el
+    histórico; el resto reutiliza su último registro guardado.
     """
     
     print("--- FASE 1: EXTRACCIÓN MASIVA DE DATOS ---")
@@ -99,11 +398,20 @@ def data_extraction_pipeline():
         return None
     
     
+    # '_updatedAt' de cada registro de posición: señal de cambio para el modo incremental
+    position_updated_at = {
+        rec['data'].get('hero_id'): rec.get('_updatedAt')
+        for rec in positions_list
+        if isinstance(rec, dict) and isinstance(rec.get('data'), dict)
+    }
+
     # Convertimos la columna 'data' (que contiene un diccionario) en nuevas columnas
     # Esto expone 'hero_id', 'role', 'lane', etc., como columnas principales.
     try:
         if 'data' in df_positions.columns:
             df_positions = pd.json_normalize(df_positions['data'])
+            # El '_updatedAt' de la posición se conserva en su propia columna (se guarda en el histórico)
+            df_positions[POSITION_UPDATED_COLUMN] = df_positions['hero_id'].map(position_updated_at)
     except Exception as e:
         print(f"❌ Error al desanidar el DataFrame de Posiciones: {e}")
         return None
@@ -111,12 +419,41 @@ def data_extraction_pipeline():
     
     print(f"\n✔️ Extracción de posiciones exitosa. Héroes encontrados: {len(df_positions)}.")
     
-    # 2. **GENERACIÓN DE ID:** Creamos la lista de IDs secuenciales
-    hero_ids = list(range(1, 131)) 
-    df_rates = fetch_all_hero_rates(hero_ids)
+    # 2. **DESCUBRIMIENTO DE IDs:** Los IDs salen de la propia respuesta de posiciones
+    hero_ids = discover_hero_ids(df_positions)
+    fetch_ids, skipped_ids = hero_ids, []
+    stored_state = pd.DataFrame()
+
+    if incremental:
+        stored_state = load_stored_hero_state()
+        fetch_ids, skipped_ids = plan_incremental_fetch(hero_ids, position_updated_at, stored_state)
+        print(f"⏭️ Modo incremental: {len(skipped_ids)}/{len(hero_ids)} fetches omitidos (sin cambios), "
+              f"{len(fetch_ids)} por extraer.")
+
+    # Checkpoint del día: si una ejecución anterior murió a medias, solo se piden los que faltan
+    run_date = datetime.now().strftime('%Y-%m-%d')
+    checkpoint = checkpoint_for(run_date)
+    df_rates = fetch_all_hero_rates(fetch_ids, checkpoint=checkpoint) if fetch_ids else pd.DataFrame()
+    missing_ids = df_rates.attrs.get('missing_hero_ids', [])
+    metrics.count("rows_fetched", len(df_rates))
+    metrics.count("rows_skipped", len(skipped_ids))
+    metrics.count("rows_failed", len(missing_ids))
+
+    if missing_ids:
+        # Se guarda lo obtenido (el upsert permite completar el día después), pero sin ocultarlo
+        names = (df_positions.drop_duplicates('hero_id').set_index('hero_id')['hero.data.name']
+                 if 'hero.data.name' in df_positions.columns else {})
+        missing_names = [f"{hero_id} ({names.get(hero_id, '?')})" for hero_id in missing_ids]
+        print(f"🟠 EXTRACCIÓN PARCIAL: faltan {len(missing_ids)}/{len(hero_ids)} héroes: {', '.join(missing_names)}. "
+              f"El checkpoint se conserva: volver a ejecutar hoy pedirá solo estos héroes.")
+
+    if skipped_ids:
+        # Reutilizamos el último registro de rating guardado de los héroes al día
+        df_reused = stored_state.loc[skipped_ids, [c for c in RATE_COLUMNS if c in stored_state.columns]]
+        df_rates = pd.concat([df_rates, df_reused.reset_index()], ignore_index=True)
     
     if df_rates.empty:
-        print("\n❌ Extracción de ratings fallida. La API no devolvió datos para los IDs secuenciales.")
+        print("\n❌ Extracción de ratings fallida. La API no devolvió datos para los IDs descubiertos.")
         return None
     
     # 3. Preparación y Combinación (Merge)
@@ -141,45 +478,86 @@ def data_extraction_pipeline():
         df_final.drop_duplicates(subset=['hero_id'], inplace=True) 
 
         if 'data' in df_final.columns:
-            df_final['data'] = df_final['data'].apply(lambda x: json.dumps(x, ensure_ascii=False))
+            # Los registros reutilizados del histórico ya vienen serializados
+            df_final['data'] = df_final['data'].apply(lambda x: x if isinstance(x, str) else json.dumps(x, ensure_ascii=False))
 
         print(f"✔️ Combinación (Merge) exitosa. Filas finales (Héroes únicos): {len(df_final)}")
         
         # 4. Guardado de los datos limpios en modo histórico
         
         # 4a. Añadir columna de fecha de extracción para el seguimiento
-        df_final['extraction_date'] = datetime.now().strftime('%Y-%m-%d')
+        df_final['extraction_date'] = run_date
 
-        # 4b. Lógica de guardado en modo APPEND al archivo histórico
-        data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
-        historica_file_path = os.path.join(data_dir, "mobile_legends_data_historical.csv")
-
-        # Aseguramos que la carpeta de datos exista
+        # 4b. Upsert en el dataset histórico Parquet (clave única hero_id + extraction_date)
+        data_dir = DATA_DIR
         os.makedirs(data_dir, exist_ok=True)
 
-        # Guardar CSV histórico con comillas para evitar problemas
-        df_final.to_csv(historica_file_path,
-                        mode='a' if os.path.exists(historica_file_path) else 'w',
-                        index=False,
-                        header=not os.path.exists(historica_file_path),
-                        quoting=csv.QUOTE_ALL)
-        print(f"💾 Datos guardados en archivo histórico: {historica_file_path}")
-        
+        written = historical_store.write_partition(df_final, HISTORICAL_DATASET_DIR)
+        metrics.count("rows_written", len(df_final))
+        print(f"💾 Datos guardados en el histórico Parquet: {', '.join(written)}")
+
         # CSV limpio para EDA rápido / Streamlit
         clean_csv_path = os.path.join(data_dir, "mobile_legends_data_clean.csv")
         df_final.to_csv(clean_csv_path, index=False, quoting=csv.QUOTE_ALL)
         print(f"💾 CSV limpio guardado para EDA/Streamlit: {clean_csv_path}")
-
-        return df_final
         
     except Exception as e:
         print(f"❌ Error durante la Combinación (Merge). Error: {e}")
         return None
 
+    # 5. Almacenes derivados: la partición del día ya está guardada, así que un fallo
+    # aquí no invalida la extracción (se reconstruyen con sus propios comandos)
+    update_derived_stores(df_final, fetch_ids, run_date)
+
+    # Día completo y guardado: el checkpoint ya no hace falta
+    if not missing_ids:
+        checkpoint.clear()
+    df_final.attrs['missing_hero_ids'] = missing_ids
+
+    return df_final
+
+def update_derived_stores(df_final, fetch_ids, run_date):
+    """
+    Actualiza los almacenes derivados del histórico a partir de la partición recién
+    escrita. Cada paso tiene su propio try/except: un fallo se informa con el nombre
+    del almacén y el resto de pasos se ejecuta igualmente. Devuelve los pasos fallidos.
+    """
+    extraction_date = df_final['extraction_date'].iloc[0]
+    steps = [
+        # Caché de preprocesado sembrada con df_final: el EDA y el reporte no vuelven a parsear el día
+        ("caché de preprocesado", lambda: prime_partition(df_final, HISTORICAL_DATASET_DIR)),
+        # Serie diaria completa (todos los puntos de la ventana de 7 días) en formato largo
+        ("serie diaria larga", lambda: update_rate_series(df_final)),
+        # Agregados diarios (rol, línea, top-N, meta): solo se calcula la fecha recién escrita
+        ("agregados diarios", lambda: update_rollups(HISTORICAL_DATASET_DIR, dates=[extraction_date])),
+        # Esquema en estrella: hechos del día y dimensiones (solo se reescriben si cambian)
+        ("esquema en estrella", lambda: update_star_schema(HISTORICAL_DATASET_DIR, dates=[extraction_date])),
+        # Matrices héroe×héroe de sinergias/counters para las recomendaciones de draft
+        ("matrices de draft", compile_matrices),
+        # Cubo héroe × rango × modo: barrido de la rejilla configurada (vacía = sin barrido),
+        # solo para los héroes extraídos hoy (respeta el plan incremental)
+        ("cubo de rates", lambda: update_rate_cube(fetch_ids, run_date)),
+        # Base SQLite indexada (API, reporte y EDA): solo se cargan las fechas nuevas o cambiadas
+        ("base SQLite", lambda: sync_store(HISTORICAL_DATASET_DIR)),
+        # Export del frame de análisis que descarga el dashboard remoto (sin histórico local)
+        ("export del frame de análisis", lambda: export_analysis_frame(HISTORICAL_DATASET_DIR)),
+    ]
+
+    failed = []
+    for name, update in steps:
+        try:
+            update()
+        except Exception as e:
+            failed.append(name)
+            print(f"⚠️ Error al actualizar el almacén derivado '{name}' (el histórico del día sí se guardó): {e}")
+    if failed:
+        print(f"🟠 Almacenes derivados sin actualizar: {', '.join(failed)}. Se pueden regenerar con sus comandos.")
+    return failed
+
 
 if __name__ == "__main__":
     final_dataframe = data_extraction_pipeline()
     
     if final_dataframe is not None:
         print("\n✅ ¡LA EXTRACCIÓN HA FINALIZADO CON ÉXITO!")
-        print("El archivo 'mobile_legends_data_historical.csv' es tu fuente de datos lista para el EDA.")
\ No newline at end of file
+        print("El dataset 'data/historical/' es tu fuente de datos lista para el EDA.")
\ No newline at end of file
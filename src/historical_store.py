@@ -0,0 +1,256 @@
+import argparse
+import csv
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "data"))
+DATASET_DIR = os.path.join(DATA_DIR, "historical")
+LEGACY_CSV_PATH = os.path.join(DATA_DIR, "mobile_legends_data_historical.csv")
+
+PARTITION_COLUMN = "extraction_date"
+PARTITION_FILE_NAME = "part-0.parquet"
+
+# Clave única de una fila del histórico: la fecha elige la partición y, dentro de
+# ella, 'hero_id' identifica la fila (la partición hace de índice de la clave)
+KEY_COLUMNS = ["hero_id", PARTITION_COLUMN]
+
+# Columnas mínimas que necesita el preprocesado para el análisis
+ANALYSIS_COLUMNS = ["hero_id", "hero.data.name", "hero.data.sortid", "hero.data.roadsort",
+                    "data", PARTITION_COLUMN]
+
+_PARTITIONING = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+
+# ----------------------------------------------------
+# ----------- 2. ESCRITURA DE PARTICIONES ------------
+# ----------------------------------------------------
+
+def _to_text(value):
+    """Mismo texto que produciría el CSV: listas/diccionarios como repr, nulos como None."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+def _normalize_schema(df):
+    """
+    Esquema estable entre particiones: 'hero_id' entero y el resto como texto
+    (igual que en el CSV histórico; los blobs anidados se parsean al leer).
+    """
+    df = df.copy()
+    df["hero_id"] = pd.to_numeric(df["hero_id"], errors="coerce").astype("int64")
+    for col in df.columns:
+        if col not in ("hero_id", PARTITION_COLUMN):
+            df[col] = df[col].map(_to_text).astype(object)
+    return df
+
+def partition_path(extraction_date, dataset_dir=None):
+    dataset_dir = dataset_dir or DATASET_DIR
+    return os.path.join(dataset_dir, f"{PARTITION_COLUMN}={extraction_date}", PARTITION_FILE_NAME)
+
+def _write_day(df_day, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df_day.drop(columns=[PARTITION_COLUMN], errors="ignore"), preserve_index=False)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+def _dedupe_day(df_day):
+    """Una fila por hero_id dentro de una fecha; ante duplicados gana la última."""
+    return (df_day.drop_duplicates("hero_id", keep="last")
+                  .sort_values("hero_id", kind="stable")
+                  .reset_index(drop=True))
+
+def stored_rows(df):
+    """Filas tal y como quedan en una partición: esquema normalizado y una por hero_id."""
+    df = _normalize_schema(df)
+    df[PARTITION_COLUMN] = pd.to_datetime(df[PARTITION_COLUMN]).dt.strftime("%Y-%m-%d")
+    return _dedupe_day(df)
+
+def write_partition(df, dataset_dir=None, upsert=True):
+    """
+    Escribe las filas en su partición 'extraction_date=YYYY-MM-DD'.
+
+    Con 'upsert' (por defecto) la clave (hero_id, extraction_date) es única: las
+    filas nuevas sustituyen a las existentes del mismo héroe y día, y el resto de
+    la partición se conserva. Solo se leen las particiones de las fechas que
+    llegan, así que el coste depende de las filas nuevas, no del histórico.
+    Con upsert=False cada fecha se reemplaza completa por las filas recibidas.
+    """
+    written = []
+    df = _normalize_schema(df)
+    df[PARTITION_COLUMN] = pd.to_datetime(df[PARTITION_COLUMN]).dt.strftime("%Y-%m-%d")
+
+    for extraction_date, df_day in df.groupby(PARTITION_COLUMN, sort=True):
+        path = partition_path(extraction_date, dataset_dir)
+        if upsert and os.path.exists(path):
+            df_existing = pq.read_table(path).to_pandas()
+            df_existing = df_existing[~df_existing["hero_id"].isin(df_day["hero_id"])]
+            df_day = _normalize_schema(pd.concat([df_existing, df_day.drop(columns=[PARTITION_COLUMN])],
+                                                 ignore_index=True))
+        _write_day(_dedupe_day(df_day), path)
+        written.append(path)
+    return written
+
+# ----------------------------------------------------
+# ----------- 3. LECTURA CON FILTROS -----------------
+# ----------------------------------------------------
+
+def _is_csv(source):
+    return str(source).lower().endswith(".csv")
+
+def list_partition_dates(source=None):
+    """Fechas de extracción disponibles, ordenadas (sin leer ningún fichero de datos)."""
+    source = source or DATASET_DIR
+    if _is_csv(source):
+        if not os.path.exists(source):
+            return []
+        dates = pd.read_csv(source, usecols=[PARTITION_COLUMN])[PARTITION_COLUMN]
+        return sorted(pd.to_datetime(dates).dt.strftime("%Y-%m-%d").unique().tolist())
+    if not os.path.isdir(source):
+        return []
+    prefix = f"{PARTITION_COLUMN}="
+    return sorted(name[len(prefix):] for name in os.listdir(source)
+                  if name.startswith(prefix) and os.path.exists(os.path.join(source, name, PARTITION_FILE_NAME)))
+
+def load_history(source=None, start_date=None, end_date=None, hero_ids=None, columns=None):
+    """
+    Carga el histórico aplicando filtros de fecha/héroe y proyección de columnas.
+
+    Sobre el dataset Parquet los filtros de fecha descartan particiones enteras y
+    solo se leen las columnas pedidas. Si 'source' es un .csv (histórico legado)
+    se aplican los mismos filtros en pandas tras la lectura.
+    """
+    source = source or DATASET_DIR
+    start_date = pd.Timestamp(start_date).strftime("%Y-%m-%d") if start_date is not None else None
+    end_date = pd.Timestamp(end_date).strftime("%Y-%m-%d") if end_date is not None else None
+
+    if _is_csv(source):
+        df = pd.read_csv(source, usecols=(lambda c: c in columns) if columns else None)
+        dates = pd.to_datetime(df[PARTITION_COLUMN]).dt.strftime("%Y-%m-%d") if PARTITION_COLUMN in df.columns else None
+        mask = pd.Series(True, index=df.index)
+        if dates is not None and start_date:
+            mask &= dates >= start_date
+        if dates is not None and end_date:
+            mask &= dates <= end_date
+        if hero_ids is not None and "hero_id" in df.columns:
+            mask &= df["hero_id"].isin(list(hero_ids))
+        return df[mask].reset_index(drop=True)
+
+    if not list_partition_dates(source):
+        raise FileNotFoundError(f"No hay particiones en el dataset histórico: {source}")
+
+    dataset = ds.dataset(source, format="parquet", partitioning=_PARTITIONING)
+    expr = None
+    conditions = []
+    if start_date:
+        conditions.append(ds.field(PARTITION_COLUMN) >= start_date)
+    if end_date:
+        conditions.append(ds.field(PARTITION_COLUMN) <= end_date)
+    if hero_ids is not None:
+        conditions.append(ds.field("hero_id").isin([int(h) for h in hero_ids]))
+    for condition in conditions:
+        expr = condition if expr is None else expr & condition
+
+    if columns:
+        columns = [c for c in columns if c in dataset.schema.names]
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas().sort_values(PARTITION_COLUMN, kind="stable").reset_index(drop=True)
+
+def default_source():
+    """El dataset Parquet si existe; si no, el CSV histórico legado."""
+    return DATASET_DIR if list_partition_dates(DATASET_DIR) else LEGACY_CSV_PATH
+
+# ----------------------------------------------------
+# ----------- 4. COMPACTACIÓN (DEDUPLICADO) ----------
+# ----------------------------------------------------
+
+def compact_history(source=None):
+    """
+    Elimina filas duplicadas por (hero_id, extraction_date), conservando la última.
+    En el dataset solo se reescriben las particiones que tienen duplicados; un CSV
+    legado se reescribe completo si hace falta. Devuelve el nº de filas eliminadas.
+    """
+    source = source or default_source()
+    if _is_csv(source):
+        if not os.path.exists(source):
+            print(f"❌ No se encontró el CSV histórico: {source}")
+            return 0
+        df = pd.read_csv(source, dtype=str, keep_default_na=False, na_values=[""])
+        keys = [pd.to_numeric(df["hero_id"], errors="coerce"),
+                pd.to_datetime(df[PARTITION_COLUMN]).dt.strftime("%Y-%m-%d")]
+        duplicated = pd.concat(keys, axis=1).duplicated(keep="last")
+        removed = int(duplicated.sum())
+        if removed:
+            tmp_path = f"{source}.tmp"
+            df[~duplicated].to_csv(tmp_path, index=False, quoting=csv.QUOTE_ALL)
+            os.replace(tmp_path, source)
+        print(f"🧹 Compactación de {source}: {removed} filas duplicadas eliminadas.")
+        return removed
+
+    removed = 0
+    for extraction_date in list_partition_dates(source):
+        path = partition_path(extraction_date, source)
+        hero_ids = pq.read_table(path, columns=["hero_id"]).column("hero_id").to_pandas()
+        if not hero_ids.duplicated().any():
+            continue
+        df_day = pq.read_table(path).to_pandas()
+        df_compact = _dedupe_day(df_day)
+        removed += len(df_day) - len(df_compact)
+        _write_day(df_compact, path)
+    print(f"🧹 Compactación de {source}: {removed} filas duplicadas eliminadas.")
+    return removed
+
+# ----------------------------------------------------
+# ----------- 5. MIGRACIÓN DESDE EL CSV --------------
+# ----------------------------------------------------
+
+def migrate_csv_to_parquet(csv_path=None, dataset_dir=None, force=False):
+    """Convierte el CSV histórico (QUOTE_ALL) en el dataset particionado por fecha."""
+    csv_path = csv_path or LEGACY_CSV_PATH
+    dataset_dir = dataset_dir or DATASET_DIR
+
+    if list_partition_dates(dataset_dir) and not force:
+        print(f"ℹ️ El dataset '{dataset_dir}' ya existe. Usa --force para regenerarlo.")
+        return []
+    if not os.path.exists(csv_path):
+        print(f"❌ No se encontró el CSV histórico: {csv_path}")
+        return []
+    if force and os.path.isdir(dataset_dir):
+        shutil.rmtree(dataset_dir)
+
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[""])
+    written = write_partition(df, dataset_dir, upsert=False)
+    csv_mb = os.path.getsize(csv_path) / 1e6
+    parquet_mb = sum(os.path.getsize(p) for p in written) / 1e6
+    print(f"✔️ Migradas {len(df)} filas en {len(written)} particiones "
+          f"({csv_mb:.1f} MB CSV -> {parquet_mb:.1f} MB Parquet) en {dataset_dir}")
+    return written
+
+# ----------------------------------------------------
+# --- 6. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén histórico Parquet particionado por extraction_date")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Migra el CSV histórico al dataset Parquet")
+    migrate_parser.add_argument("--csv", default=LEGACY_CSV_PATH)
+    migrate_parser.add_argument("--dataset", default=DATASET_DIR)
+    migrate_parser.add_argument("--force", action="store_true", help="Regenera el dataset aunque ya exista")
+
+    compact_parser = subparsers.add_parser("compact", help="Deduplica el histórico por (hero_id, extraction_date)")
+    compact_parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate_csv_to_parquet(args.csv, args.dataset, force=args.force)
+    elif args.command == "compact":
+        compact_history(args.source)
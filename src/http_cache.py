@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+# ---------------------------------------------------
+# Añadir el directorio padre al path para importar config
+# ---------------------------------------------------
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from config.config import (HTTP_CACHE_DIR, HTTP_CACHE_TTL_SECONDS,
+                           HTTP_CACHE_DEFAULT_TTL, HTTP_CACHE_MAX_BYTES)
+
+# ----------------------------------------------------
+# --- CACHÉ PERSISTENTE DE RESPUESTAS HTTP ---
+# ----------------------------------------------------
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas JSON, una entrada por endpoint.
+
+    Cada entrada guarda el cuerpo, el momento de la descarga y los validadores
+    (ETag / Last-Modified) para poder revalidar con una petición condicional.
+    La expulsión es LRU por mtime (cada acierto "toca" el fichero) cuando el
+    tamaño total supera max_bytes.
+    """
+
+    def __init__(self, cache_dir, ttl_by_prefix=None, default_ttl=3600, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.ttl_by_prefix = ttl_by_prefix or {}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, endpoint):
+        key = hashlib.sha1(endpoint.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def ttl_for(self, endpoint):
+        # Gana el prefijo más largo que coincida con el endpoint
+        matches = [p for p in self.ttl_by_prefix if endpoint.startswith(p)]
+        if not matches:
+            return self.default_ttl
+        return self.ttl_by_prefix[max(matches, key=len)]
+
+    def get(self, endpoint):
+        """Devuelve la entrada guardada (fresca o caducada) o None."""
+        path = self._path(endpoint)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Marca de uso reciente para la expulsión LRU
+            return entry
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, endpoint, entry):
+        return time.time() - entry.get("stored_at", 0) < self.ttl_for(endpoint)
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Cabeceras If-None-Match / If-Modified-Since para revalidar una entrada."""
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, endpoint, body, etag=None, last_modified=None):
+        entry = {
+            "endpoint": endpoint,
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }
+        self._write(endpoint, entry)
+        self.evict()
+
+    def refresh(self, endpoint, entry):
+        """Tras un 304 la entrada vuelve a contar como fresca durante todo su TTL."""
+        entry["stored_at"] = time.time()
+        self._write(endpoint, entry)
+
+    def _write(self, endpoint, entry):
+        path = self._path(endpoint)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)  # Escritura atómica
+
+    def evict(self):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            files = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+_default_cache = None
+
+def get_response_cache():
+    """Instancia compartida configurada desde config/config.py."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache(
+            os.path.join(parent_dir, HTTP_CACHE_DIR),
+            ttl_by_prefix=HTTP_CACHE_TTL_SECONDS,
+            default_ttl=HTTP_CACHE_DEFAULT_TTL,
+            max_bytes=HTTP_CACHE_MAX_BYTES,
+        )
+    return _default_cache
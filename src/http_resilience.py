@@ -0,0 +1,76 @@
+import random
+import threading
+import time
+
+# ----------------------------------------------------
+# --- BACKOFF EXPONENCIAL CON JITTER ---
+# ----------------------------------------------------
+
+# Respuestas que indican un fallo transitorio del servidor: se reintentan
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def backoff_delay(attempt, base, max_delay, retry_after=None):
+    """
+    Espera antes del reintento 'attempt' (0, 1, 2...): "full jitter", un valor
+    aleatorio entre 0 y base * 2^attempt (acotado). Si el servidor manda
+    Retry-After (segundos), se respeta como mínimo.
+    """
+    delay = random.uniform(0, min(max_delay, base * (2 ** attempt)))
+    try:
+        if retry_after is not None:
+            delay = max(delay, min(max_delay, float(retry_after)))
+    except (TypeError, ValueError):
+        pass  # Retry-After con fecha HTTP: se usa el backoff normal
+    return delay
+
+# ----------------------------------------------------
+# --- CIRCUIT BREAKER ---
+# ----------------------------------------------------
+
+class CircuitBreaker:
+    """
+    Corta las peticiones a un upstream que está fallando.
+
+    - Cerrado: todo pasa; 'failure_threshold' fallos consecutivos lo abren.
+    - Abierto: ninguna petición pasa durante 'reset_seconds'.
+    - Semiabierto: pasado ese tiempo se deja pasar una única petición de prueba;
+      si va bien se cierra, si falla se vuelve a abrir.
+    Es seguro entre hilos (lo comparten todas las peticiones del pool).
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                return True  # Petición de prueba
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"🔌 Circuito abierto tras {self.consecutive_failures} fallos consecutivos: "
+                          f"pausa de {self.reset_seconds}s antes de volver a probar la API.")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        self.record_success()
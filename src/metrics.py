@@ -0,0 +1,286 @@
+import argparse
+import bisect
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+METRICS_DIR = os.path.join(parent_dir, "data", "metrics")
+
+# Límites superiores (segundos) de los buckets del histograma de latencia HTTP
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Cada cuánto se muestrea el RSS durante una etapa
+RSS_SAMPLE_INTERVAL = 0.05
+
+# ----------------------------------------------------
+# --- 2. MEMORIA DEL PROCESO ---
+# ----------------------------------------------------
+
+def current_rss_mb():
+    """
+    RSS actual del proceso (Linux: /proc/self/statm; en otro Unix, el pico histórico
+    de getrusage). None donde no se puede medir (p. ej. Windows, sin 'resource').
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource  # Solo existe en Unix
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+def _round_mb(value):
+    return round(value, 1) if value is not None else None
+
+class _RssSampler(threading.Thread):
+    """Hilo que muestrea el RSS mientras dura una etapa y guarda el pico (None si no se puede medir)."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss_mb()
+        self._stop_event = threading.Event()
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_INTERVAL):
+            self._sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self._sample()
+        return self.peak
+
+# ----------------------------------------------------
+# --- 3. COLECTOR DE MÉTRICAS DE UNA EJECUCIÓN ---
+# ----------------------------------------------------
+
+def endpoint_template(endpoint):
+    """Agrupa endpoints por plantilla: 'hero-rate/12/' -> 'hero-rate/{id}/' (sin query string)."""
+    return re.sub(r"\d+", "{id}", endpoint.split("?")[0])
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+class RunMetrics:
+    """
+    Métricas de una ejecución del pipeline: tiempo y pico de RSS por etapa,
+    latencias HTTP por endpoint (histograma, estados y reintentos) y contadores
+    de filas. Es seguro entre hilos (fetch_data se llama desde un pool).
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._started = time.perf_counter()
+        self.stages = []
+        self.http = {}
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        sampler = _RssSampler()
+        sampler.start()
+        rss_start = current_rss_mb()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            peak = sampler.stop()
+            with self._lock:
+                self.stages.append({"stage": name, "status": status, "wall_s": round(wall, 4),
+                                    "rss_start_mb": _round_mb(rss_start), "peak_rss_mb": _round_mb(peak),
+                                    "rss_end_mb": _round_mb(current_rss_mb())})
+
+    def record_http(self, endpoint, status, latency_s, retries=0):
+        key = endpoint_template(endpoint)
+        with self._lock:
+            entry = self.http.setdefault(key, {"latencies": [], "statuses": Counter(), "retries": 0,
+                                               "buckets": [0] * (len(LATENCY_BUCKETS) + 1)})
+            entry["latencies"].append(latency_s)
+            entry["statuses"][str(status)] += 1
+            entry["retries"] += retries
+            entry["buckets"][bisect.bisect_left(LATENCY_BUCKETS, latency_s)] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def to_records(self, status="ok"):
+        """Líneas JSONL de la ejecución: una por etapa, una por endpoint, contadores y resumen."""
+        records = [{"type": "stage", "run_id": self.run_id, **stage} for stage in self.stages]
+        for endpoint, entry in sorted(self.http.items()):
+            latencies = entry["latencies"]
+            labels = [f"le_{b:g}" for b in LATENCY_BUCKETS] + ["le_inf"]
+            records.append({
+                "type": "http", "run_id": self.run_id, "endpoint": endpoint,
+                "requests": len(latencies), "retries": entry["retries"],
+                "statuses": dict(entry["statuses"]),
+                "histogram": dict(zip(labels, entry["buckets"])),
+                "p50_s": _percentile(latencies, 0.5), "p95_s": _percentile(latencies, 0.95),
+                "max_s": max(latencies) if latencies else None,
+            })
+        records.append({"type": "counters", "run_id": self.run_id, **dict(self.counters)})
+        records.append({"type": "run", "run_id": self.run_id, "started_at": self.started_at,
+                        "status": status, "wall_s": round(time.perf_counter() - self._started, 4)})
+        return records
+
+    def write(self, status="ok", metrics_dir=None):
+        metrics_dir = metrics_dir or METRICS_DIR
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = os.path.join(metrics_dir, f"run_{self.run_id}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.to_records(status):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return path
+
+# ----------------------------------------------------
+# --- 4. EJECUCIÓN ACTIVA (API DEL MÓDULO) ---
+# ----------------------------------------------------
+
+# Ejecución en curso; sin ella las funciones de registro no hacen nada
+_active_run = None
+
+def start_run(run_id=None):
+    global _active_run
+    _active_run = RunMetrics(run_id)
+    return _active_run
+
+def active_run():
+    return _active_run
+
+def finish_run(status="ok", metrics_dir=None):
+    """Escribe el fichero JSONL de la ejecución activa y la cierra. Devuelve la ruta."""
+    global _active_run
+    if _active_run is None:
+        return None
+    path = _active_run.write(status, metrics_dir)
+    _active_run = None
+    print(f"📏 Métricas de la ejecución guardadas en {path}")
+    return path
+
+def stage(name):
+    return _active_run.stage(name) if _active_run is not None else nullcontext()
+
+def record_http(endpoint, status, latency_s, retries=0):
+    if _active_run is not None:
+        _active_run.record_http(endpoint, status, latency_s, retries)
+
+def count(name, n=1):
+    if _active_run is not None:
+        _active_run.count(name, n)
+
+# ----------------------------------------------------
+# --- 5. RESUMEN Y COMPARACIÓN DE EJECUCIONES ---
+# ----------------------------------------------------
+
+def load_runs(metrics_dir=None, last=5):
+    """Últimas 'last' ejecuciones como {run_id: [registros]} (orden cronológico)."""
+    paths = sorted(glob.glob(os.path.join(metrics_dir or METRICS_DIR, "run_*.jsonl")))[-last:]
+    runs = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if records:
+            runs[records[0]["run_id"]] = records
+    return runs
+
+def summarize_runs(metrics_dir=None, last=5):
+    runs = load_runs(metrics_dir, last)
+    if not runs:
+        print("ℹ️ No hay métricas de ejecuciones guardadas.")
+        return []
+
+    stage_names = []
+    for records in runs.values():
+        for r in records:
+            if r["type"] == "stage" and r["stage"] not in stage_names:
+                stage_names.append(r["stage"])
+
+    header = f"{'run':17} {'estado':7} {'total (s)':>9} " + " ".join(f"{s[:12] + ' (s)':>16}" for s in stage_names)
+    header += f" {'pico RSS':>9} {'filas ok/omit/fallo':>20} {'HTTP p95 (s)':>12} {'errores':>7}"
+    print(header)
+
+    rows = []
+    for run_id, records in runs.items():
+        by_type = {}
+        for r in records:
+            by_type.setdefault(r["type"], []).append(r)
+        run = by_type.get("run", [{}])[0]
+        stages = {r["stage"]: r for r in by_type.get("stage", [])}
+        counters = by_type.get("counters", [{}])[0]
+        http = by_type.get("http", [])
+        p95 = max((h["p95_s"] for h in http if h.get("p95_s") is not None), default=None)
+        errors = sum(n for h in http for status, n in h["statuses"].items()
+                     if not status.isdigit() or int(status) >= 400)
+        peak = max((s["peak_rss_mb"] for s in stages.values() if s.get("peak_rss_mb") is not None), default=None)
+        row = {"run_id": run_id, "status": run.get("status"), "wall_s": run.get("wall_s"),
+               "stages": {name: stages[name]["wall_s"] for name in stages}, "peak_rss_mb": peak,
+               "rows": (counters.get("rows_fetched", 0), counters.get("rows_skipped", 0), counters.get("rows_failed", 0)),
+               "http_p95_s": p95, "http_errors": errors}
+        rows.append(row)
+
+        stage_cells = " ".join(f"{row['stages'][s]:16.2f}" if s in row["stages"] else f"{'-':>16}" for s in stage_names)
+        rows_cell = "/".join(str(n) for n in row["rows"])
+        p95_cell = f"{p95:12.3f}" if p95 is not None else f"{'-':>12}"
+        peak_cell = f"{peak:9.1f}" if peak is not None else f"{'-':>9}"
+        print(f"{run_id:17} {str(row['status']):7} {row['wall_s'] or 0:9.2f} {stage_cells} "
+              f"{peak_cell} {rows_cell:>20} {p95_cell} {errors:7d}")
+
+    # Última ejecución frente a la media de las anteriores
+    if len(rows) >= 2:
+        latest, previous = rows[-1], rows[:-1]
+        print(f"\nÚltima ejecución vs. media de las {len(previous)} anteriores:")
+        for name in stage_names:
+            history = [r["stages"][name] for r in previous if name in r["stages"]]
+            if name in latest["stages"] and history:
+                mean = sum(history) / len(history)
+                change = (latest["stages"][name] - mean) / mean * 100 if mean else 0.0
+                print(f"- {name}: {latest['stages'][name]:.2f}s (media {mean:.2f}s, {change:+.0f}%)")
+    return rows
+
+# ----------------------------------------------------
+# --- 6. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Métricas por ejecución del pipeline diario")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Compara las últimas ejecuciones")
+    summary_parser.add_argument("--last", type=int, default=5)
+    summary_parser.add_argument("--dir", default=METRICS_DIR)
+
+    args = parser.parse_args()
+    if args.command == "summary":
+        summarize_runs(args.dir, args.last)
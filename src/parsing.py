@@ -0,0 +1,131 @@
+import ast
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------
+# --- PARSEO COMPARTIDO DE LAS COLUMNAS ANIDADAS ---
+# ----------------------------------------------------
+# Un único punto de parseo para 'data' (serie de ratings) y para los blobs de
+# roles/líneas ('hero.data.sortid' / 'hero.data.roadsort'). Cada celda distinta
+# se decodifica una sola vez y todas las columnas derivadas salen de esa pasada.
+
+# Los blobs de roles/líneas se guardan como repr de Python (comillas simples, None),
+# que no es JSON: se extrae el título directamente del texto en una sola pasada.
+_SORT_TITLE_RE = re.compile(r"""'sort_title': (['"])(.*?)\1""")
+_ROAD_TITLE_RE = re.compile(r"""'road_sort_title': (['"])(.*?)\1""")
+
+
+def decode_blob(value):
+    """
+    Decodifica un blob 'data': JSON (formato actual) o repr de Python (filas antiguas).
+    Devuelve None si no se puede interpretar.
+    """
+    if isinstance(value, (dict, list)):
+        return value
+    if not isinstance(value, str):
+        return None
+    if not value.startswith("{'"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return None
+
+
+def _latest_point(value):
+    """Punto de la serie que usan las métricas del análisis (último elemento de 'win_rate')."""
+    blob = decode_blob(value)
+    if not isinstance(blob, dict) or not blob.get("win_rate"):
+        return None
+    point = blob["win_rate"][-1]
+    return point if isinstance(point, dict) else None
+
+
+def _map_unique(values, func):
+    """Aplica 'func' una vez por valor distinto (los blobs se repiten entre días)."""
+    values = pd.Series(values)
+    try:
+        codes, uniques = pd.factorize(values)
+    except TypeError:
+        pass  # Blobs ya decodificados (dict/list, no hashables): se indexan por su repr
+    else:
+        results = np.array([func(v) for v in uniques] + [None], dtype=object)
+        return pd.Series(results[codes], index=values.index, name=values.name)
+    keys = values.map(lambda v: repr(v) if isinstance(v, (list, dict)) else v)
+    first = ~keys.duplicated()
+    cache = dict(zip(keys[first], (func(v) for v in values[first])))
+    return keys.map(lambda k: cache.get(k) if isinstance(k, str) else None)
+
+
+def parse_rate_column(values):
+    """
+    Extrae win_rate, ban_rate, app_rate y la fecha del punto de la serie de cada
+    celda de 'data'. Los blobs idénticos (días consecutivos de un héroe repiten la
+    misma ventana de 7 días) se decodifican una única vez.
+    """
+    values = pd.Series(values)
+    points = _map_unique(values, _latest_point).to_numpy()
+    out = {}
+    for field in ("win_rate", "ban_rate", "app_rate"):
+        out[field] = np.array([p.get(field, np.nan) if p else np.nan for p in points], dtype="float64")
+    out["rate_date"] = [p.get("date") if p else None for p in points]
+    return pd.DataFrame(out, index=values.index)
+
+
+def _titles(value, pattern, key):
+    if isinstance(value, list):
+        titles = [item["data"].get(key) for item in value
+                  if isinstance(item, dict) and isinstance(item.get("data"), dict)]
+        titles = [t for t in titles if t]
+    elif isinstance(value, str):
+        titles = [m.group(2) for m in pattern.finditer(value)]
+    else:
+        titles = []
+    return ", ".join(titles) if titles else None
+
+
+def parse_role_column(values):
+    """Roles como texto 'Rol1, Rol2' ('Unknown' si no hay ninguno)."""
+    return _map_unique(values, lambda v: _titles(v, _SORT_TITLE_RE, "sort_title")).fillna("Unknown")
+
+
+def parse_lane_column(values):
+    """Líneas como texto 'Línea1, Línea2' (NaN si no hay ninguna)."""
+    return _map_unique(values, lambda v: _titles(v, _ROAD_TITLE_RE, "road_sort_title"))
+
+
+def parse_hero_frame(df):
+    """
+    Devuelve todas las columnas derivadas de un DataFrame crudo del histórico:
+    win_rate, ban_rate, app_rate, rate_date, role, primary_role, lane,
+    win_rate_pct y ban_rate_pct.
+    """
+    roles_col = "raw_roles" if "raw_roles" in df.columns else "hero.data.sortid"
+    parsed = parse_rate_column(df["data"]) if "data" in df.columns else pd.DataFrame(index=df.index)
+
+    parsed["role"] = parse_role_column(df[roles_col]) if roles_col in df.columns else "Unknown"
+    parsed["primary_role"] = parsed["role"].str.split(",").str[0].str.strip()
+    if "hero.data.roadsort" in df.columns:
+        parsed["lane"] = parse_lane_column(df["hero.data.roadsort"])
+
+    if "win_rate" in parsed.columns:
+        parsed["win_rate_pct"] = parsed["win_rate"] * 100
+        parsed["ban_rate_pct"] = parsed["ban_rate"] * 100
+    return parsed
+
+
+def add_parsed_columns(df):
+    """
+    Renombra las columnas clave ('hero_name', 'raw_roles') y añade las columnas
+    derivadas de parse_hero_frame al DataFrame.
+    """
+    df = df.rename(columns={"hero.data.name": "hero_name", "hero.data.sortid": "raw_roles"})
+    parsed = parse_hero_frame(df)
+    df = df.drop(columns=[c for c in parsed.columns if c in df.columns])
+    return pd.concat([df, parsed], axis=1)
@@ -4,6 +4,7 @@ from datetime import datetime
 from src.eda_mobilelegends import data_extraction_pipeline
 from src.eda_analysis import run_eda_analysis
 from src.reporting import generate_report
+from src import metrics
 import sys
 
 # Agregamos la ruta del directorio padre al path de Python 
@@ -31,20 +32,34 @@ def run_daily_pipeline():
     print(f"🚀 INICIANDO PIPELINE DIARIO - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"=====================================================")
 
-    # 1. ETAPA: EXTRACCIÓN Y LIMPIEZA (ETL)
-    print(f"\n--- 1. Ejecutando Extracción(eda_mobilelegends) ---")
-    df_new_data = data_extraction_pipeline()
+    # Métricas de la ejecución (tiempo y RSS por etapa, HTTP, filas) -> data/metrics/run_*.jsonl
+    metrics.start_run()
 
-    if df_new_data is None or df_new_data.empty:
-        print("🔴 ERROR CRÍTICO: No se pudieron extraer datos. Deteniendo pipeline.")
-        return
-    
-    print("--- 2. ETAPA: ANÁLISIS EXPLORATORIO DE DATOS (EDA)")
-    run_eda_analysis() 
-    
-    # 2. ETAPA: GENERACIÓN DE GRÁFICOS (EDA analysis)
-    print("\n--- 3. Ejecutando Análisis y Generación de Gráficos (eda_analysis) ---")
-    generate_report()
+    try:
+        # 1. ETAPA: EXTRACCIÓN Y LIMPIEZA (ETL)
+        print(f"\n--- 1. Ejecutando Extracción(eda_mobilelegends) ---")
+        with metrics.stage("extraction"):
+            df_new_data = data_extraction_pipeline(incremental=True)
+
+        if df_new_data is None or df_new_data.empty:
+            print("🔴 ERROR CRÍTICO: No se pudieron extraer datos. Deteniendo pipeline.")
+            metrics.finish_run(status="failed")
+            return
+        
+        print("--- 2. ETAPA: ANÁLISIS EXPLORATORIO DE DATOS (EDA)")
+        with metrics.stage("eda"):
+            run_eda_analysis() 
+        
+        # 2. ETAPA: GENERACIÓN DE GRÁFICOS (EDA analysis)
+        print("\n--- 3. Ejecutando Análisis y Generación de Gráficos (eda_analysis) ---")
+        with metrics.stage("report"):
+            generate_report()
+    except Exception:
+        # La ejecución fallida también deja su fichero de métricas
+        metrics.finish_run(status="error")
+        raise
+
+    metrics.finish_run(status="ok")
 
     # 3. ETAPA: GENERACIÓN DE REPORTES (reporting)
     print("\n--- 3. Generando Reportes (reporting) ---")
@@ -0,0 +1,311 @@
+import argparse
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store
+from src.parsing import add_parsed_columns
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+CACHE_DIR = os.path.join(historical_store.DATA_DIR, "cache", "preprocessed")
+
+# Export del frame de análisis completo (versionado en el repo): es lo que descarga
+# el dashboard desplegado cuando no tiene histórico local
+EXPORT_PATH = os.path.join(historical_store.DATA_DIR, "analysis_frame.parquet")
+
+# Subir este número invalida todas las entradas cuando cambia la lógica de preprocesado
+PREPROCESS_VERSION = 2
+
+# Blobs crudos del histórico: una vez parseados no los necesita nadie y son las
+# columnas más pesadas, así que no entran en el frame preprocesado ni en la caché
+RAW_BLOB_COLUMNS = ["data", "raw_roles", "hero.data.roadsort"]
+
+# Columnas del frame de análisis que comparten todos los orígenes del dashboard
+# (histórico local, API, export remoto): las derivadas, sin los blobs crudos
+FRAME_COLUMNS = ["hero_id", "extraction_date", "hero_name", "role", "primary_role", "lane", "lane_clean",
+                 "win_rate", "ban_rate", "app_rate", "rate_date", "win_rate_pct", "ban_rate_pct"]
+FRAME_FLOAT_COLUMNS = ["win_rate", "ban_rate", "app_rate", "win_rate_pct", "ban_rate_pct"]
+FRAME_TEXT_COLUMNS = ["hero_name", "role", "primary_role", "lane", "lane_clean", "rate_date"]
+
+# Esquema compacto (frame canónico del reporte, el EDA y el dashboard): texto de
+# baja cardinalidad como categorías, rates en float32 e índice por fecha
+COMPACT_FLOAT_DTYPE = "float32"
+COMPACT_INDEX_NAME = "date"
+
+# Caché en memoria del proceso: evita releer el Parquet entre etapas del mismo run.
+# Acotada (LRU por clave) porque la API y el dashboard son procesos de larga duración;
+# una entrada es una partición (un día) o el CSV legado completo
+MEMORY_CACHE_MAX_ENTRIES = 400
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+# ----------------------------------------------------
+# --- 2. PREPROCESADO CANÓNICO DEL HISTÓRICO ---
+# ----------------------------------------------------
+
+def preprocess_history(df):
+    """
+    Deriva las columnas de análisis de un DataFrame crudo del histórico:
+    rates, roles, línea principal ('lane_clean') y fecha como datetime. Los
+    blobs crudos (RAW_BLOB_COLUMNS) se descartan tras el parseo.
+    """
+    df = add_parsed_columns(df)
+    df['extraction_date'] = pd.to_datetime(df['extraction_date'])
+
+    # 🧩 Línea principal (la primera listada en 'hero.data.roadsort')
+    if 'lane' in df.columns:
+        df['lane_clean'] = df['lane'].str.split(',').str[0].str.strip().fillna('Desconocido')
+    elif 'data.lane' in df.columns:
+        df['lane_clean'] = df['data.lane'].str.strip().fillna('Desconocido')
+    else:
+        df['lane_clean'] = 'Desconocido'
+
+    df = df.drop(columns=[c for c in RAW_BLOB_COLUMNS if c in df.columns])
+
+    # Eliminar filas con valores nulos en columnas críticas para el análisis
+    return df.dropna(subset=['hero_name', 'win_rate_pct', 'ban_rate_pct', 'primary_role']).reset_index(drop=True)
+
+def to_analysis_frame(df):
+    """
+    Esquema común del frame de análisis: columnas FRAME_COLUMNS en ese orden,
+    hero_id entero, rates float64, texto como object y fecha datetime, venga de
+    donde venga.
+    """
+    df = df.reindex(columns=FRAME_COLUMNS).copy()
+    df['hero_id'] = df['hero_id'].astype('int64')
+    df['extraction_date'] = pd.to_datetime(df['extraction_date'])
+    df[FRAME_FLOAT_COLUMNS] = df[FRAME_FLOAT_COLUMNS].astype('float64')
+    df[FRAME_TEXT_COLUMNS] = df[FRAME_TEXT_COLUMNS].astype(object)
+    return df.reset_index(drop=True)
+
+def compact_frame(df):
+    """
+    Frame de análisis con el esquema compacto: sin los blobs crudos (ya
+    parseados), texto como categorías, rates en float32 y filas ordenadas por
+    fecha con un DatetimeIndex ('date') para cortar rangos con .loc. La columna
+    'extraction_date' se mantiene para el código que filtra o agrupa por ella.
+    """
+    df = to_analysis_frame(df).sort_values('extraction_date', kind='stable')
+    df[FRAME_TEXT_COLUMNS] = df[FRAME_TEXT_COLUMNS].astype('category')
+    df[FRAME_FLOAT_COLUMNS] = df[FRAME_FLOAT_COLUMNS].astype(COMPACT_FLOAT_DTYPE)
+    df.index = pd.DatetimeIndex(df['extraction_date'], name=COMPACT_INDEX_NAME)
+    return df
+
+def memory_report(df, compact=None):
+    """Bytes por fila (memoria profunda, índice incluido) del frame original y del compacto, por columna."""
+    compact = compact_frame(df) if compact is None else compact
+    rows = max(len(df), 1)
+    before = df.memory_usage(deep=True) / rows
+    after = compact.memory_usage(deep=True) / rows
+    report = pd.DataFrame({"before": before, "after": after}).fillna(0.0).rename(index={"Index": "(índice)"})
+    report.loc["TOTAL"] = report.sum()
+    return report.round(1)
+
+# ----------------------------------------------------
+# --- 3. CACHÉ POR HUELLA DEL FICHERO DE ORIGEN ---
+# ----------------------------------------------------
+
+def _hash(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+def file_fingerprint(path):
+    """Huella barata de un fichero (mtime + tamaño): cambia en cuanto se reescribe."""
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+def source_version(source=None):
+    """
+    Versión de los datos de origen: huella combinada de todas las particiones
+    (o del CSV). Cambia en cuanto llega una fecha nueva o se reescribe una existente.
+    """
+    source = source or historical_store.default_source()
+    if str(source).lower().endswith(".csv"):
+        return _hash(source, file_fingerprint(source)) if os.path.exists(source) else None
+    dates = historical_store.list_partition_dates(source)
+    if not dates:
+        return None
+    return _hash(source, *(f"{d}:{file_fingerprint(historical_store.partition_path(d, source))}" for d in dates))
+
+def _load_cached(name, fingerprint, build):
+    """
+    Devuelve el frame preprocesado de 'name' para esa huella: primero memoria,
+    luego el Parquet en disco y, si no existe, lo construye y guarda.
+    Las entradas antiguas del mismo 'name' se borran al guardar una nueva.
+    """
+    key = _hash(name, fingerprint, PREPROCESS_VERSION)
+    with _memory_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+
+    path = os.path.join(CACHE_DIR, f"{name}-{key}.parquet")
+    if os.path.exists(path):
+        df = pd.read_parquet(path)
+    else:
+        df = build()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        for old in os.listdir(CACHE_DIR):
+            if old.startswith(f"{name}-") and old != os.path.basename(path):
+                os.remove(os.path.join(CACHE_DIR, old))
+
+    _remember(key, df)
+    return df
+
+def _remember(key, df):
+    with _memory_lock:
+        _memory_cache[key] = df
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_MAX_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+def _is_cached(name, fingerprint):
+    key = _hash(name, fingerprint, PREPROCESS_VERSION)
+    with _memory_lock:
+        if key in _memory_cache:
+            return True
+    return os.path.exists(os.path.join(CACHE_DIR, f"{name}-{key}.parquet"))
+
+def _frames_from_star(dates, fingerprints):
+    """
+    Frames preprocesados de las fechas que el esquema en estrella ya tiene construidas
+    desde la misma partición (misma huella), reconstruidos en una sola lectura de
+    hechos y dimensiones sin decodificar blobs. {fecha: frame}.
+    """
+    from src import star_schema  # star_schema importa este módulo
+
+    built = star_schema.built_partitions()
+    dates = [d for d in dates if built.get(d) == fingerprints[d]]
+    if not dates:
+        return {}
+    df = star_schema.load_analysis_frame(min(dates), max(dates))
+    by_date = df["extraction_date"].dt.strftime("%Y-%m-%d")
+    return {d: df[by_date == d].reset_index(drop=True) for d in dates}
+
+def load_preprocessed(source=None, start_date=None, end_date=None, hero_ids=None):
+    """
+    Histórico ya preprocesado, reutilizando la caché siempre que el origen no cambie.
+
+    Sobre el dataset Parquet la caché es por partición (clave: fecha + mtime/tamaño
+    del fichero), así que una fecha nueva solo obliga a preparar esa partición, y
+    si el esquema en estrella ya la tiene se lee de sus hechos y dimensiones.
+    Sobre el CSV legado la clave es la huella del fichero completo.
+    """
+    source = source or historical_store.default_source()
+    source_id = _hash(os.path.abspath(source))
+    start = pd.Timestamp(start_date).strftime("%Y-%m-%d") if start_date is not None else None
+    end = pd.Timestamp(end_date).strftime("%Y-%m-%d") if end_date is not None else None
+
+    if str(source).lower().endswith(".csv"):
+        df = _load_cached(
+            f"{source_id}-csv", file_fingerprint(source),
+            lambda: preprocess_history(historical_store.load_history(source, columns=historical_store.ANALYSIS_COLUMNS)))
+        dates = df['extraction_date'].dt.strftime("%Y-%m-%d")
+        mask = pd.Series(True, index=df.index)
+        if start:
+            mask &= dates >= start
+        if end:
+            mask &= dates <= end
+        frames = [df[mask]]
+    else:
+        dates = [d for d in historical_store.list_partition_dates(source)
+                 if (start is None or d >= start) and (end is None or d <= end)]
+        if not dates and not historical_store.list_partition_dates(source):
+            raise FileNotFoundError(f"No hay particiones en el dataset histórico: {source}")
+        fingerprints = {d: file_fingerprint(historical_store.partition_path(d, source)) for d in dates}
+        missing = [d for d in dates if not _is_cached(f"{source_id}-{d}", fingerprints[d])]
+        from_star = _frames_from_star(missing, fingerprints) if missing else {}
+        frames = [
+            _load_cached(
+                f"{source_id}-{d}", fingerprints[d],
+                lambda d=d: from_star[d] if d in from_star else preprocess_history(historical_store.load_history(
+                    source, start_date=d, end_date=d, columns=historical_store.ANALYSIS_COLUMNS)))
+            for d in dates
+        ]
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if hero_ids is not None and not df.empty:
+        df = df[df['hero_id'].isin(list(hero_ids))].reset_index(drop=True)
+    return df
+
+def clear_memory_cache():
+    with _memory_lock:
+        _memory_cache.clear()
+
+def prime_partition(df_day, source=None):
+    """
+    Siembra la caché con una partición recién escrita a partir de las filas que ya
+    están en memoria (el df_final del extractor), sin volver a leer ni parsear el
+    Parquet en el EDA y el reporte. Solo se siembra si la partición contiene
+    exactamente esas filas (un upsert sobre un día a medias obliga a leerla).
+    """
+    source = source or historical_store.DATASET_DIR
+    rows = historical_store.stored_rows(df_day)
+    dates = rows[historical_store.PARTITION_COLUMN].unique()
+    if len(dates) != 1:
+        return None
+    date = dates[0]
+    path = historical_store.partition_path(date, source)
+    if not os.path.exists(path) or pq.read_metadata(path).num_rows != len(rows):
+        return None
+    columns = [c for c in historical_store.ANALYSIS_COLUMNS if c in rows.columns]
+    # Paso por Arrow (en memoria): mismos tipos que al leer la partición de disco
+    table = pa.Table.from_pandas(rows[columns], preserve_index=False)
+    return _load_cached(f"{_hash(os.path.abspath(source))}-{date}", file_fingerprint(path),
+                        lambda: preprocess_history(table.to_pandas()))
+
+def export_analysis_frame(source=None, path=None):
+    """
+    Escribe el frame de análisis de todo el histórico (to_analysis_frame) en un
+    único Parquet. Lo genera el pipeline diario y lo descarga el dashboard remoto.
+    """
+    source = source or historical_store.default_source()
+    path = path or EXPORT_PATH
+    if not historical_store.list_partition_dates(source):
+        print(f"⚠️ No hay histórico en {source}: no se exporta el frame de análisis.")
+        return None
+    df = to_analysis_frame(load_preprocessed(source))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False, compression="zstd")
+    os.replace(tmp_path, path)
+    print(f"💾 Frame de análisis exportado en {path}: {len(df)} filas.")
+    return path
+
+# ----------------------------------------------------
+# --- 4. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Caché de preprocesado y esquema compacto del frame de análisis")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("memory-report", help="Bytes por fila del frame preprocesado y del compacto")
+    report_parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+    export_parser = subparsers.add_parser("export", help="Exporta el frame de análisis completo a un Parquet")
+    export_parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+    export_parser.add_argument("--output", default=EXPORT_PATH)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_analysis_frame(args.source, args.output)
+    if args.command == "memory-report":
+        df = load_preprocessed(args.source)
+        report = memory_report(df)
+        print(f"🧠 Memoria por fila ({len(df)} filas), en bytes:")
+        print(report.to_string())
+        before, after = report.loc["TOTAL", "before"], report.loc["TOTAL", "after"]
+        print(f"Total: {before:.0f} → {after:.0f} bytes/fila ({1 - after / before:.0%} menos)")
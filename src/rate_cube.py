@@ -0,0 +1,261 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from config.config import MAX_IN_FLIGHT, REQUESTS_PER_SECOND
+from config.config import (RATE_SWEEP_RANKS, RATE_SWEEP_MODES, RATE_SWEEP_RANK_PARAM, RATE_SWEEP_MODE_PARAM,
+                           RATE_CUBE_DIR)
+from src.parsing import parse_rate_column
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+CUBE_DIR = os.path.join(parent_dir, RATE_CUBE_DIR)
+CUBE_FILE_PREFIX = "rates_"
+
+# Última dimensión del cubo
+METRICS = ("win_rate", "ban_rate", "app_rate")
+
+# ----------------------------------------------------
+# --- 2. CUBO HÉROE × FECHA × RANGO × MODO ---
+# ----------------------------------------------------
+
+class RateCube:
+    """
+    Rates en un array denso float32 de forma (fecha, rango, modo, héroe, métrica),
+    con las etiquetas de cada eje. Las selecciones indexan el array en memoria
+    (sin volver a leer disco) y devuelven otro RateCube.
+    """
+
+    def __init__(self, values, dates, ranks, modes, hero_ids, metrics=METRICS):
+        self.values = values
+        self.dates = np.asarray(dates, dtype=str)
+        self.ranks = np.asarray(ranks, dtype=str)
+        self.modes = np.asarray(modes, dtype=str)
+        self.hero_ids = np.asarray(hero_ids, dtype="int64")
+        self.metrics = tuple(metrics)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 0, 0, 0, len(METRICS)), dtype="float32"), [], [], [], [])
+
+    @property
+    def is_empty(self):
+        return self.values.size == 0
+
+    @property
+    def latest_date(self):
+        return str(self.dates[-1]) if len(self.dates) else None
+
+    @staticmethod
+    def _index(labels, wanted):
+        if wanted is None:
+            return np.arange(len(labels))
+        wanted = [str(w) for w in np.atleast_1d(wanted)]
+        return np.flatnonzero(np.isin(labels, wanted))
+
+    def sel(self, rank=None, mode=None, start_date=None, end_date=None, hero_ids=None):
+        """Sub-cubo por rango(s), modo(s), rango de fechas ('YYYY-MM-DD') y/o héroes."""
+        date_mask = np.ones(len(self.dates), dtype=bool)
+        if start_date is not None:
+            date_mask &= self.dates >= pd.Timestamp(start_date).strftime("%Y-%m-%d")
+        if end_date is not None:
+            date_mask &= self.dates <= pd.Timestamp(end_date).strftime("%Y-%m-%d")
+        d, r, m = np.flatnonzero(date_mask), self._index(self.ranks, rank), self._index(self.modes, mode)
+        h = (np.arange(len(self.hero_ids)) if hero_ids is None
+             else np.flatnonzero(np.isin(self.hero_ids, np.atleast_1d(hero_ids).astype("int64"))))
+        values = self.values[np.ix_(d, r, m, h, np.arange(len(self.metrics)))]
+        return RateCube(values, self.dates[d], self.ranks[r], self.modes[m], self.hero_ids[h], self.metrics)
+
+    def metric(self, name):
+        """Array (fecha, rango, modo, héroe) de una métrica."""
+        return self.values[..., self.metrics.index(name)]
+
+    def to_frame(self, dropna=True):
+        """Formato largo: una fila por héroe × fecha × rango × modo (con rates en % como el análisis)."""
+        if self.is_empty:
+            return pd.DataFrame(columns=["hero_id", "extraction_date", "rank", "mode", *self.metrics])
+        shape = self.values.shape[:4]
+        d, r, m, h = (idx.ravel() for idx in np.indices(shape))
+        df = pd.DataFrame({"hero_id": self.hero_ids[h], "extraction_date": pd.to_datetime(self.dates[d]),
+                           "rank": self.ranks[r], "mode": self.modes[m]})
+        for k, name in enumerate(self.metrics):
+            df[name] = self.values[..., k].ravel().astype("float64")
+        if dropna:
+            df = df.dropna(subset=list(self.metrics), how="all").reset_index(drop=True)
+        df["win_rate_pct"] = df["win_rate"] * 100
+        df["ban_rate_pct"] = df["ban_rate"] * 100
+        return df
+
+    def tier_table(self, metric="win_rate", date=None, mode=None):
+        """Tabla héroe × rango de una métrica (en %) para una fecha (por defecto la última) y un modo."""
+        if self.is_empty:
+            return pd.DataFrame()
+        date = pd.Timestamp(date).strftime("%Y-%m-%d") if date is not None else self.latest_date
+        mode = str(mode) if mode is not None else self.modes[0]
+        cube = self.sel(mode=mode, start_date=date, end_date=date)
+        if cube.is_empty:
+            return pd.DataFrame()
+        table = cube.metric(metric)[0, :, 0, :].T * 100
+        return pd.DataFrame(table, index=pd.Index(cube.hero_ids, name="hero_id"), columns=cube.ranks)
+
+# ----------------------------------------------------
+# --- 3. LECTURA Y ESCRITURA (UN .npz POR FECHA) ---
+# ----------------------------------------------------
+
+def cube_path(date, cube_dir=None):
+    return os.path.join(cube_dir or CUBE_DIR, f"{CUBE_FILE_PREFIX}{date}.npz")
+
+def list_cube_dates(cube_dir=None):
+    cube_dir = cube_dir or CUBE_DIR
+    if not os.path.isdir(cube_dir):
+        return []
+    return sorted(name[len(CUBE_FILE_PREFIX):-len(".npz")] for name in os.listdir(cube_dir)
+                  if name.startswith(CUBE_FILE_PREFIX) and name.endswith(".npz"))
+
+def write_cube_day(values, date, ranks, modes, hero_ids, returned=None, cube_dir=None):
+    """
+    Guarda el corte (rango, modo, héroe, métrica) de una fecha. 'returned' son los
+    (bigrank, match_type) que la API declaró en cada combinación, para comprobar
+    que el filtro pedido se aplicó.
+    """
+    path = cube_path(date, cube_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    returned = returned if returned is not None else np.full((len(ranks), len(modes), 2), "", dtype=object)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(tmp_path, values=values.astype("float32"), ranks=np.asarray(ranks, dtype=str),
+                        modes=np.asarray(modes, dtype=str), hero_ids=np.asarray(hero_ids, dtype="int64"),
+                        metrics=np.asarray(METRICS), returned=np.asarray(returned, dtype=str))
+    os.replace(tmp_path, path)
+    return path
+
+def load_cube(start_date=None, end_date=None, cube_dir=None):
+    """Carga las fechas del rango y las apila en un RateCube (ejes alineados por etiqueta)."""
+    start = pd.Timestamp(start_date).strftime("%Y-%m-%d") if start_date is not None else None
+    end = pd.Timestamp(end_date).strftime("%Y-%m-%d") if end_date is not None else None
+    dates = [d for d in list_cube_dates(cube_dir) if (start is None or d >= start) and (end is None or d <= end)]
+    if not dates:
+        return RateCube.empty()
+
+    days = []
+    for date in dates:
+        with np.load(cube_path(date, cube_dir)) as arrays:
+            days.append({key: arrays[key] for key in ("values", "ranks", "modes", "hero_ids")})
+
+    # Normalmente todos los días comparten ejes; si no, se alinean sobre la unión (NaN donde falte)
+    ranks = list(dict.fromkeys(r for day in days for r in day["ranks"]))
+    modes = list(dict.fromkeys(m for day in days for m in day["modes"]))
+    hero_ids = np.unique(np.concatenate([day["hero_ids"] for day in days]))
+    values = np.full((len(dates), len(ranks), len(modes), len(hero_ids), len(METRICS)), np.nan, dtype="float32")
+    for d, day in enumerate(days):
+        r = [ranks.index(x) for x in day["ranks"]]
+        m = [modes.index(x) for x in day["modes"]]
+        h = np.searchsorted(hero_ids, day["hero_ids"])
+        values[d][np.ix_(r, m, h, np.arange(len(METRICS)))] = day["values"]
+    return RateCube(values, dates, ranks, modes, hero_ids)
+
+# ----------------------------------------------------
+# --- 4. BARRIDO CONCURRENTE DE LA API ---
+# ----------------------------------------------------
+
+def sweep_rates(hero_ids, ranks=RATE_SWEEP_RANKS, modes=RATE_SWEEP_MODES, max_in_flight=MAX_IN_FLIGHT,
+                requests_per_second=REQUESTS_PER_SECOND, use_cache=True):
+    """
+    Pide hero-rate/ID/ para cada héroe × rango × modo en un pool de hilos acotado
+    (misma sesión keep-alive, limitador y reintentos que la extracción diaria).
+    Devuelve (values, returned): el array (rango, modo, héroe, métrica) con NaN
+    donde no hubo datos y los (bigrank, match_type) devueltos por combinación.
+    """
+    from src import eda_mobilelegends
+
+    jobs = [(r, m, h) for r in range(len(ranks)) for m in range(len(modes)) for h in range(len(hero_ids))]
+    limiter = eda_mobilelegends.RateLimiter(requests_per_second)
+
+    def fetch_one(job):
+        r, m, h = job
+        params = {RATE_SWEEP_RANK_PARAM: ranks[r], RATE_SWEEP_MODE_PARAM: modes[m]}
+        return eda_mobilelegends.fetch_latest_hero_rate(hero_ids[h], limiter, use_cache, params=params)
+
+    print(f"\n--- BARRIDO DE RATINGS: {len(hero_ids)} héroes × {len(ranks)} rangos × {len(modes)} modos "
+          f"({len(jobs)} peticiones) ---")
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        records = list(executor.map(fetch_one, jobs))
+
+    values = np.full((len(ranks), len(modes), len(hero_ids), len(METRICS)), np.nan, dtype="float32")
+    returned = np.full((len(ranks), len(modes), 2), "", dtype=object)
+    found = [(job, rec) for job, rec in zip(jobs, records) if rec is not None]
+    if found:
+        rates = parse_rate_column([rec.get("data") for _, rec in found])
+        r, m, h = (np.array(axis) for axis in zip(*(job for job, _ in found)))
+        values[r, m, h] = rates[list(METRICS)].to_numpy(dtype="float32")
+        for (r_i, m_i, _), rec in found:
+            blob = rec.get("data") if isinstance(rec.get("data"), dict) else {}
+            returned[r_i, m_i] = (str(blob.get("bigrank", "")), str(blob.get("match_type", "")))
+    print(f"✔️ Barrido completado: {len(found)}/{len(jobs)} combinaciones con datos.")
+    declared = {tuple(pair) for pair in returned.reshape(-1, 2).tolist() if any(pair)}
+    if len(ranks) * len(modes) > 1 and len(declared) == 1:
+        # Todas las combinaciones devolvieron el mismo filtro: la API ignora los parámetros
+        print(f"⚠️ La API devolvió el mismo (bigrank, match_type) {declared.pop()} en todas las combinaciones: "
+              f"revise RATE_SWEEP_RANK_PARAM/RATE_SWEEP_MODE_PARAM.")
+    return values, returned
+
+def update_rate_cube(hero_ids, date=None, ranks=RATE_SWEEP_RANKS, modes=RATE_SWEEP_MODES, cube_dir=None, **kwargs):
+    """Barre la API para la rejilla configurada y guarda el corte del día en el cubo."""
+    if not ranks or not modes or not len(hero_ids):
+        return None
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    hero_ids = np.asarray(sorted(int(h) for h in hero_ids), dtype="int64")
+    values, returned = sweep_rates(hero_ids.tolist(), list(ranks), list(modes), **kwargs)
+    path = write_cube_day(values, date, ranks, modes, hero_ids, returned, cube_dir)
+    print(f"🧊 Cubo de rates guardado en {path}")
+    return path
+
+# ----------------------------------------------------
+# --- 5. CONSULTAS PARA REPORTE Y DASHBOARD ---
+# ----------------------------------------------------
+
+def top_by_tier(cube, date=None, mode=None, metric="win_rate", n=3):
+    """{rango: [(hero_id, valor %), ...]} con los n mejores héroes de cada rango en una fecha."""
+    table = cube.tier_table(metric, date, mode)
+    return {rank: list(table[rank].dropna().nlargest(n).items()) for rank in table.columns}
+
+# ----------------------------------------------------
+# --- 6. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cubo de rates héroe × fecha × rango × modo")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sweep_parser = subparsers.add_parser("sweep", help="Barre la API y guarda el corte de hoy")
+    sweep_parser.add_argument("--ranks", nargs="+", default=list(RATE_SWEEP_RANKS))
+    sweep_parser.add_argument("--modes", nargs="+", default=list(RATE_SWEEP_MODES))
+
+    show_parser = subparsers.add_parser("show", help="Top por rango de una fecha")
+    show_parser.add_argument("--date", default=None)
+    show_parser.add_argument("--mode", default=None)
+
+    args = parser.parse_args()
+    if args.command == "sweep" and (not args.ranks or not args.modes):
+        print("⚠️ Rejilla vacía: indique --ranks y --modes (o configure RATE_SWEEP_RANKS/RATE_SWEEP_MODES).")
+    elif args.command == "sweep":
+        from src import historical_store
+        dates = historical_store.list_partition_dates()
+        if not dates:
+            print("❌ No hay histórico del que sacar la lista de héroes.")
+        else:
+            stored = historical_store.load_history(start_date=dates[-1], columns=["hero_id"])
+            update_rate_cube(stored["hero_id"].unique(), ranks=args.ranks, modes=args.modes)
+    elif args.command == "show":
+        cube = load_cube()
+        for rank, heroes in top_by_tier(cube, args.date, args.mode).items():
+            print(f"{rank}: " + ", ".join(f"{hero_id} ({value:.2f}%)" for hero_id, value in heroes))
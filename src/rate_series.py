@@ -0,0 +1,138 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store
+from src.parsing import decode_blob
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+SERIES_FILE_PATH = os.path.join(historical_store.DATA_DIR, "rate_series.parquet")
+
+KEY_COLUMNS = ["hero_id", "date"]
+RATE_COLUMNS = ["win_rate", "ban_rate", "app_rate"]
+SERIES_COLUMNS = KEY_COLUMNS + RATE_COLUMNS + ["pulled_on"]
+
+# ----------------------------------------------------
+# --- 2. TABLA LARGA (hero_id, date) DE LA SERIE ---
+# ----------------------------------------------------
+
+def _empty_series():
+    return pd.DataFrame({
+        "hero_id": pd.Series(dtype="int32"),
+        "date": pd.Series(dtype="datetime64[ns]"),
+        "win_rate": pd.Series(dtype="float32"),
+        "ban_rate": pd.Series(dtype="float32"),
+        "app_rate": pd.Series(dtype="float32"),
+        "pulled_on": pd.Series(dtype="datetime64[ns]"),
+    })
+
+def _compact(df):
+    df = df.astype({"hero_id": "int32", "win_rate": "float32", "ban_rate": "float32", "app_rate": "float32"})
+    df["date"] = pd.to_datetime(df["date"])
+    df["pulled_on"] = pd.to_datetime(df["pulled_on"])
+    return df[SERIES_COLUMNS]
+
+def explode_rate_series(df):
+    """
+    Convierte cada blob 'data' en todos sus puntos diarios: una fila por
+    (hero_id, date) con win_rate, ban_rate, app_rate y la fecha de extracción
+    ('pulled_on') de la que procede el punto.
+    """
+    rows = []
+    for hero_id, blob, pulled_on in zip(df["hero_id"].to_numpy(), df["data"].to_numpy(),
+                                        df["extraction_date"].to_numpy()):
+        blob = decode_blob(blob)
+        if not isinstance(blob, dict):
+            continue
+        for point in blob.get("win_rate") or []:
+            if isinstance(point, dict) and point.get("date"):
+                rows.append((hero_id, point["date"], point.get("win_rate"),
+                             point.get("ban_rate"), point.get("app_rate"), pulled_on))
+    if not rows:
+        return _empty_series()
+    exploded = pd.DataFrame(rows, columns=SERIES_COLUMNS)
+    return dedupe_rate_series(_compact(exploded))
+
+def dedupe_rate_series(df):
+    """Una fila por (hero_id, date); ante ventanas solapadas gana la extracción más reciente."""
+    return (df.sort_values("pulled_on", kind="stable")
+              .drop_duplicates(KEY_COLUMNS, keep="last")
+              .sort_values(KEY_COLUMNS)
+              .reset_index(drop=True))
+
+def merge_rate_series(existing, new):
+    """Fusiona una extracción nueva con la tabla existente sin duplicar días."""
+    if existing is None or existing.empty:
+        return dedupe_rate_series(new)
+    return dedupe_rate_series(pd.concat([existing, new], ignore_index=True))
+
+# ----------------------------------------------------
+# ----------- 3. LECTURA Y ESCRITURA -----------------
+# ----------------------------------------------------
+
+def load_rate_series(path=None, hero_ids=None, start_date=None, end_date=None):
+    """Lee la tabla larga con filtros por héroe y rango de fechas."""
+    path = path or SERIES_FILE_PATH
+    if not os.path.exists(path):
+        return _empty_series()
+    filters = []
+    if hero_ids is not None:
+        filters.append(("hero_id", "in", [int(h) for h in hero_ids]))
+    if start_date is not None:
+        filters.append(("date", ">=", pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append(("date", "<=", pd.Timestamp(end_date)))
+    table = pq.read_table(path, filters=filters or None)
+    return table.to_pandas()
+
+def save_rate_series(df, path=None):
+    path = path or SERIES_FILE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+def update_rate_series(df_new, path=None):
+    """Etapa de ingesta: añade todos los puntos de la extracción nueva a la tabla larga."""
+    merged = merge_rate_series(load_rate_series(path), explode_rate_series(df_new))
+    save_rate_series(merged, path)
+    print(f"💾 Serie diaria actualizada: {len(merged)} filas (hero_id, date), "
+          f"{merged['hero_id'].nunique()} héroes, {merged['date'].nunique()} días.")
+    return merged
+
+def rebuild_rate_series(source=None, path=None):
+    """Reconstruye la tabla completa a partir de todo el histórico (backfill)."""
+    source = source or historical_store.default_source()
+    if not historical_store.list_partition_dates(source):
+        print(f"⚠️ No hay histórico en {source}: no se reconstruye la serie diaria.")
+        return None
+    df = historical_store.load_history(source, columns=["hero_id", "data", "extraction_date"])
+    merged = explode_rate_series(df)
+    save_rate_series(merged, path)
+    print(f"✔️ Serie diaria reconstruida desde {source}: {len(merged)} filas.")
+    return merged
+
+# ----------------------------------------------------
+# --- 4. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tabla larga (hero_id, date) con la serie diaria de ratings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Reconstruye la tabla desde el histórico")
+    rebuild_parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+    rebuild_parser.add_argument("--output", default=SERIES_FILE_PATH)
+
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        rebuild_rate_series(args.source, args.output)
@@ -1,8 +1,20 @@
 import pandas as pd
 import numpy as np
-import ast
 from datetime import datetime
 import os
+import sys
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store
+from src import preprocess_cache
+from src import rate_cube
+from src import rollups
+from src import sqlite_store
+from src import trends
 
 # ----------------------------------------------------
 # ------------- 1. CONFIGURACIÓN ---------------------
@@ -10,77 +22,29 @@ import os
 
 # Ruta relativa al archivo de datos, sube un nivel (..) y entra a 'data/'
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE_PATH = os.path.join(BASE_DIR, "..", "data", "mobile_legends_data_historical.csv")
+DATA_FILE_PATH = historical_store.DATASET_DIR # Dataset Parquet particionado por extraction_date
 REPORT_OUTPUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'reports'))
 
 # Asegurarse de que la carpeta de reportes exista
 os.makedirs(REPORT_OUTPUT_DIR, exist_ok=True)
 
 # ----------------------------------------------------
-# ------ 2. FUNCIONES AUXILIARES DE PARSEO -----------
+# --- 2. FUNCIONES DE CARGA Y PREPROCESAMIENTO ---
 # ----------------------------------------------------
 
-def extract_roles(roles_str):
-    if not isinstance(roles_str, str) or pd.isna(roles_str):
-        return "Unknown"
-    try:
-        roles_list = ast.literal_eval(roles_str)
-        roles = [item['data']['sort_title'] for item in roles_list if isinstance(item, dict) and 'data' in item and 'sort_title' in item['data']]
-        return ', '.join(roles) if roles else "Unknown"
-    except (ValueError, SyntaxError, TypeError):
-        return "Unknown"
-
-def extract_latest_win_rate(data_str):
-    if not isinstance(data_str, str) or pd.isna(data_str):
-        return np.nan
-    try:
-        data_dict = ast.literal_eval(data_str)
-        if 'win_rate' in data_dict and data_dict['win_rate']:
-            if data_dict['win_rate']: # Asegurarse de que la lista no esté vacía
-                return data_dict['win_rate'][-1].get('win_rate')
-        return np.nan
-    except (ValueError, SyntaxError, TypeError):
-        return np.nan
-
-def extract_latest_ban_rate(data_str):
-    if not isinstance(data_str, str) or pd.isna(data_str):
-        return np.nan
-    try:
-        data_dict = ast.literal_eval(data_str)
-        if 'win_rate' in data_dict and data_dict['win_rate']:
-            if data_dict['win_rate']: # Asegurarse de que la lista no esté vacía
-                return data_dict['win_rate'][-1].get('ban_rate') 
-        return np.nan
-    except (ValueError, SyntaxError, TypeError):
-        return np.nan
-
-# ----------------------------------------------------
-# --- 3. FUNCIONES DE CARGA Y PREPROCESAMIENTO ---
-# ----------------------------------------------------
-
-def load_and_preprocess_data(file_path):
+def load_and_preprocess_data(file_path, start_date=None, end_date=None, hero_ids=None):
     print(f"\n🔍 Leyendo archivo desde: {os.path.abspath(file_path)}")
     try:
-        df = pd.read_csv(file_path)
-        print("📅 Fechas únicas detectadas:", df['extraction_date'].unique())
-        
-        # Aplicar las funciones de extracción
-        df['win_rate'] = df['data'].apply(extract_latest_win_rate)
-        df['ban_rate'] = df['data'].apply(extract_latest_ban_rate)
-        
-        df.rename(columns={'hero.data.name': 'hero_name',
-                        'hero.data.sortid': 'raw_roles'}, inplace=True)
-        
-        df['role'] = df['raw_roles'].apply(extract_roles)
-        df['primary_role'] = df['role'].apply(lambda x: x.split(',')[0].strip())
-        
-        df['win_rate_pct'] = df['win_rate'] * 100
-        df['ban_rate_pct'] = df['ban_rate'] * 100
-        
-        df['extraction_date'] = pd.to_datetime(df['extraction_date'])
-        
-        # Eliminar filas con valores nulos en columnas críticas para el análisis
-        df_clean = df.dropna(subset=['hero_name', 'win_rate_pct', 'ban_rate_pct', 'primary_role']).copy()
+        if sqlite_store.is_current(file_path):
+            # Base SQLite indexada al día con el origen: solo se leen las filas del rango
+            df_clean = sqlite_store.query_history(start_date, end_date, hero_ids=hero_ids)
+        else:
+            # Preprocesado canónico con caché por partición (compartida con el EDA y el dashboard)
+            df_clean = preprocess_cache.load_preprocessed(file_path, start_date=start_date, end_date=end_date,
+                                                          hero_ids=hero_ids)
+        # Esquema compacto: sin blobs crudos, categorías, rates float32 e índice por fecha
+        df_clean = preprocess_cache.compact_frame(df_clean)
+        print("📅 Fechas únicas detectadas:", df_clean['extraction_date'].dt.strftime('%Y-%m-%d').unique())
         
         return df_clean
 
@@ -92,82 +56,128 @@ def load_and_preprocess_data(file_path):
         return pd.DataFrame()
 
 # ----------------------------------------------------
-# --- 4. FUNCIÓN PARA GENERAR EL REPORTE DE TEXTO ---
+# --- 3. FUNCIÓN PARA GENERAR EL REPORTE DE TEXTO ---
 # ----------------------------------------------------
 
-def generate_report():
-    print("Generando reporte de tendencias del meta...")
-    
-    df_historical = load_and_preprocess_data(DATA_FILE_PATH)
-    
-    if df_historical.empty:
-        return "ERROR: No se pudo cargar o preprocesar los datos para generar el reporte."
-
-    latest_date = df_historical['extraction_date'].max()
-    df_latest = df_historical[df_historical['extraction_date'] == latest_date].copy()
-    
-    if df_latest.empty:
-        return "ERROR: No hay datos recientes para generar el reporte."
-
+def build_report_text(latest_date, df_top, df_trends_day, cube=None):
+    """
+    Texto del reporte de una fecha: top 5 (desde los agregados 'top_heroes') y
+    cambios de Win Rate leídos del motor de tendencias ('df_trends_day' son las
+    filas de esa fecha, ver trends.trends_at). Con un cubo de rates (ver
+    src/rate_cube.py) se añade el top 3 de cada rango.
+    """
     report_content = []
     report_content.append(f"--- Reporte de Tendencia del Meta de MLBB ({latest_date.strftime('%Y-%m-%d')}) ---\n")
     report_content.append("Este reporte analiza los cambios más significativos en el meta del juego.\n")
 
+    latest_key = latest_date.strftime('%Y-%m-%d')
+
     # Top 5 Héroes con mayor Win Rate
-    top_win_rate = df_latest.nlargest(5, 'win_rate_pct')
+    top_win_rate = rollups.top_heroes(df_top, latest_key, 'win_rate_pct')
     report_content.append("\n👑 Top 5 Héroes por Tasa de Victoria:")
     for _, row in top_win_rate.iterrows():
-        report_content.append(f"- {row['hero_name']}: {row['win_rate_pct']:.2f}% Win Rate ({row['primary_role']})")
+        report_content.append(f"- {row['hero_name']}: {row['value']:.2f}% Win Rate ({row['primary_role']})")
 
     # Top 5 Héroes con mayor Ban Rate
-    top_ban_rate = df_latest.nlargest(5, 'ban_rate_pct')
+    top_ban_rate = rollups.top_heroes(df_top, latest_key, 'ban_rate_pct')
     report_content.append("\n🚫 Top 5 Héroes por Tasa de Ban:")
     for _, row in top_ban_rate.iterrows():
-        report_content.append(f"- {row['hero_name']}: {row['ban_rate_pct']:.2f}% Ban Rate ({row['primary_role']})")
+        report_content.append(f"- {row['hero_name']}: {row['value']:.2f}% Ban Rate ({row['primary_role']})")
 
-    # Héroes con mayor cambio de Win Rate (requiere datos históricos de al menos 2 fechas)
-    if len(df_historical['extraction_date'].unique()) >= 2:
-        df_prev_date = df_historical.sort_values(by='extraction_date', ascending=False).drop_duplicates(subset=['hero_name'])
-        
-        # Obtener datos de la penúltima fecha
-        second_latest_date = df_historical['extraction_date'].unique()[-2]
-        df_previous = df_historical[df_historical['extraction_date'] == second_latest_date].copy()
-
-        # Fusionar para calcular el cambio
-        df_merged = pd.merge(df_latest[['hero_name', 'win_rate_pct']], 
-                        df_previous[['hero_name', 'win_rate_pct']], 
-                        on='hero_name', 
-                        suffixes=('_latest', '_previous'))
-        
-        df_merged['win_rate_change'] = df_merged['win_rate_pct_latest'] - df_merged['win_rate_pct_previous']
-        
-        top_gainers = df_merged.nlargest(3, 'win_rate_change')
-        top_losers = df_merged.nsmallest(3, 'win_rate_change')
+    # Héroes con mayor cambio de Win Rate frente a la extracción anterior de cada héroe
+    df_changes = df_trends_day.dropna(subset=['win_rate_pct_delta_prev'])
+    if not df_changes.empty:
+        top_gainers = df_changes.nlargest(3, 'win_rate_pct_delta_prev')
+        top_losers = df_changes.nsmallest(3, 'win_rate_pct_delta_prev')
 
         report_content.append("\n🚀 Héroes con Mayor Ganancia de Win Rate (vs. última semana):")
         for _, row in top_gainers.iterrows():
-            report_content.append(f"- {row['hero_name']}: +{row['win_rate_change']:.2f} pp")
+            report_content.append(f"- {row['hero_name']}: +{row['win_rate_pct_delta_prev']:.2f} pp")
 
         report_content.append("\📉 Héroes con Mayor Pérdida de Win Rate (vs. última semana):")
         for _, row in top_losers.iterrows():
-            report_content.append(f"- {row['hero_name']}: {row['win_rate_change']:.2f} pp")
+            report_content.append(f"- {row['hero_name']}: {row['win_rate_pct_delta_prev']:.2f} pp")
             
     else:
         report_content.append("\nNo hay suficientes datos históricos para calcular cambios de Win Rate.")
 
-
-    report_text = "\n".join(report_content)
-    
-    # Guardar el reporte en la carpeta de reports
+    # Tendencia a medio plazo (solo si hay histórico suficiente para el horizonte)
+    for horizon in (7, 30):
+        column = f'win_rate_pct_delta_{horizon}d'
+        df_horizon = df_trends_day.dropna(subset=[column])
+        if df_horizon.empty:
+            continue
+        up, down = df_horizon.nlargest(1, column).iloc[0], df_horizon.nsmallest(1, column).iloc[0]
+        report_content.append(f"\n📆 Tendencia a {horizon} días: mayor subida {up['hero_name']} "
+                              f"({up[column]:+.2f} pp), mayor caída {down['hero_name']} ({down[column]:+.2f} pp)")
+
+    # Valores atípicos frente a su propio histórico de 30 días
+    zscore_column = f'win_rate_pct_zscore_{trends.ZSCORE_WINDOW}d'
+    df_outliers = df_trends_day[df_trends_day[zscore_column].abs() >= 2].sort_values(zscore_column, ascending=False)
+    if not df_outliers.empty:
+        report_content.append(f"\n⚠️ Win Rate atípico respecto a sus últimos {trends.ZSCORE_WINDOW} días (|z| ≥ 2):")
+        for _, row in df_outliers.iterrows():
+            report_content.append(f"- {row['hero_name']}: {row['win_rate_pct']:.2f}% (z = {row[zscore_column]:+.2f})")
+
+    # Meta por rango: el corte de esa fecha del cubo héroe × rango × modo
+    tiers = rate_cube.top_by_tier(cube, latest_key) if cube is not None and latest_key in cube.dates else {}
+    if any(tiers.values()):
+        names = dict(zip(df_trends_day['hero_id'], df_trends_day['hero_name']))
+        report_content.append(f"\n🏅 Top 3 por Win Rate en cada rango (modo {cube.modes[0]}):")
+        for rank, heroes in tiers.items():
+            if heroes:
+                report_content.append(f"- {rank}: " + ", ".join(f"{names.get(hero_id, hero_id)} ({value:.2f}%)"
+                                                                for hero_id, value in heroes))
+
+    return "\n".join(report_content)
+
+def save_report(report_text, latest_date):
+    """Guarda el reporte en la carpeta de reports y devuelve la ruta."""
     file_name = os.path.join(REPORT_OUTPUT_DIR, f"reporte_tendencia_{latest_date.strftime('%Y%m%d')}.txt")
     with open(file_name, "w", encoding="utf-8") as f:
         f.write(report_text)
     print(f"📝 Reporte de tendencias guardado en '{file_name}'")
+    return file_name
+
+def generate_report():
+    print("Generando reporte de tendencias del meta...")
+    
+    source = DATA_FILE_PATH if historical_store.list_partition_dates(DATA_FILE_PATH) else historical_store.LEGACY_CSV_PATH
+    available_dates = historical_store.list_partition_dates(source)
+    if not available_dates:
+        return "ERROR: No se pudo cargar o preprocesar los datos para generar el reporte."
+
+    # El motor de tendencias necesita los últimos LOOKBACK_DAYS días (y al menos la fecha anterior)
+    lookback_start = pd.Timestamp(available_dates[-1]) - pd.Timedelta(days=trends.LOOKBACK_DAYS)
+    start_date = min(lookback_start, pd.Timestamp(available_dates[-2:][0]))
+    df_historical = load_and_preprocess_data(source, start_date=start_date)
+    
+    if df_historical.empty:
+        return "ERROR: No se pudo cargar o preprocesar los datos para generar el reporte."
+
+    latest_date = df_historical['extraction_date'].max()
+    df_latest = df_historical.loc[latest_date:latest_date].copy()
+    
+    if df_latest.empty:
+        return "ERROR: No hay datos recientes para generar el reporte."
+
+    # Deltas 1/7/30 días, medias móviles y z-scores de todos los héroes en una pasada
+    df_trends = trends.compute_trends(df_historical)
+
+    # Top 5 por Win Rate y Ban Rate: se leen de los agregados diarios materializados
+    rollups.update_rollups(source)
+    latest_key = latest_date.strftime('%Y-%m-%d')
+    df_top = rollups.load_rollup("top_heroes", start_date=latest_key, end_date=latest_key)
+
+    cube = rate_cube.load_cube(start_date=latest_key, end_date=latest_key)
+
+    report_text = build_report_text(latest_date, df_top, trends.trends_at(df_trends, latest_date), cube)
+    save_report(report_text, latest_date)
     
     return report_text
 
 # ----------------------------------------------------
-# --- 5. EJECUCIÓN DEL SCRIPT ---
+# --- 4. EJECUCIÓN DEL SCRIPT ---
 # ----------------------------------------------------
 if __name__ == "__main__":
     generate_report()
\ No newline at end of file
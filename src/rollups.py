@@ -0,0 +1,177 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store, preprocess_cache
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+ROLLUP_DIR = os.path.join(historical_store.DATA_DIR, "rollups")
+TOP_N = 10
+
+ROLLUP_TABLES = ("role_stats", "lane_stats", "top_heroes", "meta_daily")
+
+# ----------------------------------------------------
+# --- 2. AGREGADOS DE UN DÍA ---
+# ----------------------------------------------------
+
+def _box_stats(values):
+    """Estadísticos de un box plot (mismo criterio 1.5·IQR que matplotlib/seaborn)."""
+    values = np.sort(np.asarray(values, dtype="float64"))
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    whislo = inside.min() if inside.size else q1
+    whishi = inside.max() if inside.size else q3
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "median": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "whislo": float(whislo),
+        "whishi": float(whishi),
+        "fliers": values[(values < whislo) | (values > whishi)].tolist(),
+    }
+
+def _group_stats(df_day, group_col, date):
+    rows = []
+    for group, df_group in df_day.groupby(group_col, sort=True):
+        stats = _box_stats(df_group['win_rate_pct'])
+        stats["ban_rate_mean"] = float(df_group['ban_rate_pct'].mean())
+        rows.append({"date": date, group_col: group, **stats})
+    return pd.DataFrame(rows)
+
+def compute_day_rollups(df_day, date, fingerprint=None):
+    """Todos los agregados de una fecha a partir de sus filas preprocesadas."""
+    top_rows = []
+    for metric in ('win_rate_pct', 'ban_rate_pct'):
+        top = df_day.nlargest(TOP_N, metric)
+        for rank, (_, row) in enumerate(top.iterrows(), start=1):
+            top_rows.append({"date": date, "metric": metric, "rank": rank,
+                             "hero_id": int(row['hero_id']), "hero_name": row['hero_name'],
+                             "primary_role": row['primary_role'], "value": float(row[metric])})
+
+    meta = pd.DataFrame([{
+        "date": date,
+        "heroes": int(len(df_day)),
+        "win_rate_mean": float(df_day['win_rate_pct'].mean()),
+        "ban_rate_mean": float(df_day['ban_rate_pct'].mean()),
+        "source_fingerprint": fingerprint,
+    }])
+    return {
+        "role_stats": _group_stats(df_day, 'primary_role', date),
+        "lane_stats": _group_stats(df_day, 'lane_clean', date),
+        "top_heroes": pd.DataFrame(top_rows),
+        "meta_daily": meta,
+    }
+
+# ----------------------------------------------------
+# --- 3. MANTENIMIENTO INCREMENTAL ---
+# ----------------------------------------------------
+
+def _table_path(name, rollup_dir=None):
+    return os.path.join(rollup_dir or ROLLUP_DIR, f"{name}.parquet")
+
+def load_rollup(name, start_date=None, end_date=None, rollup_dir=None):
+    """Lee una tabla de agregados, opcionalmente restringida a un rango de fechas."""
+    path = _table_path(name, rollup_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    df = pd.read_parquet(path)
+    if start_date is not None:
+        df = df[df['date'] >= pd.Timestamp(start_date).strftime('%Y-%m-%d')]
+    if end_date is not None:
+        df = df[df['date'] <= pd.Timestamp(end_date).strftime('%Y-%m-%d')]
+    return df.reset_index(drop=True)
+
+def _save_rollup(name, df, rollup_dir=None):
+    path = _table_path(name, rollup_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def update_rollups(source=None, dates=None, rollup_dir=None, force=False):
+    """
+    Mantiene las tablas de agregados al día. Solo se recalculan las fechas cuya
+    partición es nueva o cambió (según su huella) o las indicadas en 'dates'.
+    """
+    source = source or historical_store.default_source()
+    available = historical_store.list_partition_dates(source)
+    meta = load_rollup("meta_daily", rollup_dir=rollup_dir)
+    known = dict(zip(meta['date'], meta['source_fingerprint'])) if not meta.empty else {}
+    is_csv = str(source).lower().endswith(".csv")
+
+    def fingerprint(date):
+        path = source if is_csv else historical_store.partition_path(date, source)
+        return preprocess_cache.file_fingerprint(path)
+
+    if dates is None:
+        dates = [d for d in available if force or known.get(d) != fingerprint(d)]
+    dates = [d for d in dates if d in available]
+    if not dates:
+        return []
+
+    new_parts = {name: [] for name in ROLLUP_TABLES}
+    for date in dates:
+        df_day = preprocess_cache.load_preprocessed(source, start_date=date, end_date=date)
+        if df_day.empty:
+            continue
+        for name, df_part in compute_day_rollups(df_day, date, fingerprint(date)).items():
+            new_parts[name].append(df_part)
+
+    for name in ROLLUP_TABLES:
+        existing = load_rollup(name, rollup_dir=rollup_dir)
+        if not existing.empty:
+            existing = existing[~existing['date'].isin(dates)]
+        merged = pd.concat([existing] + new_parts[name], ignore_index=True)
+        _save_rollup(name, merged.sort_values('date', kind='stable').reset_index(drop=True), rollup_dir)
+
+    print(f"📦 Agregados actualizados para {len(dates)} fecha(s): {', '.join(dates)}")
+    return dates
+
+# ----------------------------------------------------
+# --- 4. CONSULTAS SOBRE LOS AGREGADOS ---
+# ----------------------------------------------------
+
+def global_meta_average(meta_daily, column='win_rate_mean'):
+    """Media global de todo el histórico (ponderada por nº de héroes de cada fecha)."""
+    if meta_daily.empty:
+        return np.nan
+    return float(np.average(meta_daily[column], weights=meta_daily['heroes']))
+
+def overall_group_means(stats, group_col):
+    """Media de win rate por grupo sobre todas las fechas (ponderada por nº de filas)."""
+    weighted = stats.assign(total=stats['mean'] * stats['count'])
+    grouped = weighted.groupby(group_col)[['total', 'count']].sum()
+    return (grouped['total'] / grouped['count']).rename('win_rate_pct').reset_index()
+
+def top_heroes(top_table, date, metric, n=5):
+    df = top_table[(top_table['date'] == date) & (top_table['metric'] == metric)]
+    return df.nsmallest(n, 'rank')
+
+# ----------------------------------------------------
+# --- 5. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agregados diarios materializados (roles, líneas, top-N, meta)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    update_parser = subparsers.add_parser("update", help="Calcula solo las fechas nuevas o modificadas")
+    update_parser.add_argument("--source", default=None)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recalcula todas las fechas")
+    rebuild_parser.add_argument("--source", default=None)
+
+    args = parser.parse_args()
+    update_rollups(args.source, force=args.command == "rebuild")
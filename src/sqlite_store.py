@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store, preprocess_cache
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+DB_PATH = os.path.join(historical_store.DATA_DIR, "mlbb.sqlite")
+
+# Columnas del frame de análisis que se guardan (las mismas que deja el preprocesado,
+# sin los blobs crudos) y su tipo en SQLite
+COLUMNS = {
+    "hero_id": "INTEGER NOT NULL",
+    "extraction_date": "TEXT NOT NULL",
+    "hero_name": "TEXT",
+    "role": "TEXT",
+    "primary_role": "TEXT",
+    "lane": "TEXT",
+    "lane_clean": "TEXT",
+    "win_rate": "REAL",
+    "ban_rate": "REAL",
+    "app_rate": "REAL",
+    "rate_date": "TEXT",
+    "win_rate_pct": "REAL",
+    "ban_rate_pct": "REAL",
+}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS hero_rates ("
+    + ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+    + ", source_row INTEGER NOT NULL, PRIMARY KEY (hero_id, extraction_date)) WITHOUT ROWID",
+    # 'source_row' conserva el orden de las filas dentro de su fecha en el origen, para
+    # devolver exactamente el mismo frame que el preprocesado.
+    # (hero_id, extraction_date) ya es la clave primaria; índice para "todos los héroes de la fecha D [y rol R]".
+    # El rol se indexa sin distinguir mayúsculas, igual que lo compara el filtro 'primary_role = ? COLLATE NOCASE'
+    "DROP INDEX IF EXISTS idx_hero_rates_date_role",
+    "CREATE INDEX IF NOT EXISTS idx_hero_rates_date_primary_role "
+    "ON hero_rates (extraction_date, primary_role COLLATE NOCASE)",
+    # Huella de la partición (o del CSV) con la que se cargó cada fecha
+    "CREATE TABLE IF NOT EXISTS sync_state (extraction_date TEXT PRIMARY KEY, source_fingerprint TEXT NOT NULL)",
+]
+
+# Conexiones por hilo (sqlite3 no comparte conexiones entre hilos por defecto)
+_local = threading.local()
+
+# ----------------------------------------------------
+# --- 2. CONEXIÓN Y ESQUEMA ---
+# ----------------------------------------------------
+
+def connect(db_path=None):
+    """Conexión del hilo actual a la base (se crea el esquema la primera vez)."""
+    db_path = os.path.abspath(db_path or DB_PATH)
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if db_path not in connections:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")  # Lectores (API) no se bloquean durante la carga diaria
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        connections[db_path] = conn
+    return connections[db_path]
+
+def close(db_path=None):
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(os.path.abspath(db_path or DB_PATH), None)
+    if conn is not None:
+        conn.close()
+
+def exists(db_path=None):
+    return os.path.exists(db_path or DB_PATH)
+
+# ----------------------------------------------------
+# --- 3. CARGA MASIVA Y SINCRONIZACIÓN ---
+# ----------------------------------------------------
+
+def _rows(df):
+    """Filas del frame de análisis en el orden de COLUMNS + source_row (fechas como 'YYYY-MM-DD', NaN como NULL)."""
+    df = df.copy()
+    df["extraction_date"] = pd.to_datetime(df["extraction_date"]).dt.strftime("%Y-%m-%d")
+    for name in COLUMNS:
+        if name not in df.columns:
+            df[name] = None
+    df["source_row"] = df.groupby("extraction_date").cumcount()
+    names = list(COLUMNS) + ["source_row"]
+    df = df[names].astype(object).where(df[names].notna(), None)
+    df["hero_id"] = df["hero_id"].astype(int)
+    return df.itertuples(index=False, name=None)
+
+def replace_dates(df, fingerprints, db_path=None, removed=()):
+    """
+    Sustituye en una sola transacción las filas de las fechas de 'fingerprints'
+    ({fecha: huella}) por las de 'df' (frame ya preprocesado) y borra las fechas
+    de 'removed' (ya no están en el origen).
+    """
+    conn = connect(db_path)
+    dates = list(fingerprints) + list(removed)
+    placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 1))
+    with conn:
+        conn.executemany("DELETE FROM hero_rates WHERE extraction_date = ?", [(d,) for d in dates])
+        conn.executemany("DELETE FROM sync_state WHERE extraction_date = ?", [(d,) for d in removed])
+        if not df.empty:
+            conn.executemany(f"INSERT OR REPLACE INTO hero_rates ({', '.join(COLUMNS)}, source_row) VALUES ({placeholders})",
+                             _rows(df))
+        conn.executemany("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", list(fingerprints.items()))
+
+def bulk_load_csv(csv_path=None, db_path=None):
+    """Carga (o recarga) todas las fechas del CSV histórico en una transacción."""
+    csv_path = csv_path or historical_store.LEGACY_CSV_PATH
+    if not os.path.exists(csv_path):
+        print(f"❌ No se encontró el CSV histórico: {csv_path}")
+        return 0
+    df = preprocess_cache.load_preprocessed(csv_path)
+    fingerprint = preprocess_cache.file_fingerprint(csv_path)
+    dates = df["extraction_date"].dt.strftime("%Y-%m-%d").unique()
+    replace_dates(df, {date: fingerprint for date in dates}, db_path)
+    print(f"🗃️ Cargadas {len(df)} filas ({len(dates)} fechas) de {csv_path} en {db_path or DB_PATH}")
+    return len(df)
+
+def _source_fingerprints(source):
+    if str(source).lower().endswith(".csv"):
+        fingerprint = preprocess_cache.file_fingerprint(source) if os.path.exists(source) else None
+        return {d: fingerprint for d in historical_store.list_partition_dates(source)}
+    return {d: preprocess_cache.file_fingerprint(historical_store.partition_path(d, source))
+            for d in historical_store.list_partition_dates(source)}
+
+def stale_dates(source=None, db_path=None):
+    """
+    Fechas a recargar: las del origen que faltan en la base o cuya partición cambió
+    desde la última carga, y las cargadas que ya no están en el origen.
+    """
+    source = source or historical_store.default_source()
+    known = dict(connect(db_path).execute("SELECT extraction_date, source_fingerprint FROM sync_state").fetchall())
+    fingerprints = _source_fingerprints(source)
+    changed = [d for d, fingerprint in fingerprints.items() if known.get(d) != fingerprint]
+    return sorted(changed + [d for d in known if d not in fingerprints])
+
+def sync_store(source=None, dates=None, db_path=None):
+    """
+    Mantiene la base al día con el histórico: solo se cargan las fechas nuevas o
+    cuya partición cambió (o las indicadas en 'dates'), reutilizando la caché de
+    preprocesado.
+    """
+    source = source or historical_store.default_source()
+    fingerprints = _source_fingerprints(source)
+    dates = stale_dates(source, db_path) if dates is None else list(dates)
+    if not dates:
+        return []
+    loaded = [d for d in dates if d in fingerprints]
+    removed = [d for d in dates if d not in fingerprints]
+    df = pd.DataFrame()
+    if loaded:
+        df = preprocess_cache.load_preprocessed(source, start_date=min(loaded), end_date=max(loaded))
+        df = df[df["extraction_date"].dt.strftime("%Y-%m-%d").isin(loaded)]
+    replace_dates(df, {d: fingerprints[d] for d in loaded}, db_path, removed)
+    print(f"🗃️ Base SQLite actualizada: {len(loaded)} fecha(s) cargadas ({len(df)} filas), {len(removed)} eliminadas.")
+    return dates
+
+def is_current(source=None, db_path=None):
+    """True si la base existe y tiene todas las fechas del origen con su huella actual."""
+    return exists(db_path) and not stale_dates(source, db_path)
+
+# ----------------------------------------------------
+# --- 4. CAPA DE CONSULTAS ---
+# ----------------------------------------------------
+
+def _where(start_date=None, end_date=None, hero_ids=None, hero_names=None, role=None, any_role=False):
+    clauses, params = [], []
+    if start_date is not None and end_date is not None and pd.Timestamp(start_date) == pd.Timestamp(end_date):
+        # Un solo día: igualdad, para que el índice busque por (fecha, rol) y no solo por rango de fechas
+        clauses.append("extraction_date = ?")
+        params.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+        start_date = end_date = None
+    if start_date is not None:
+        clauses.append("extraction_date >= ?")
+        params.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+    if end_date is not None:
+        clauses.append("extraction_date <= ?")
+        params.append(pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+    hero_filters = []
+    if hero_ids:
+        hero_filters.append(f"hero_id IN ({', '.join('?' for _ in hero_ids)})")
+        params += [int(h) for h in hero_ids]
+    if hero_names:
+        hero_filters.append(f"lower(hero_name) IN ({', '.join('?' for _ in hero_names)})")
+        params += [str(h).lower() for h in hero_names]
+    if hero_filters:
+        clauses.append("(" + " OR ".join(hero_filters) + ")")
+    if role and any_role:
+        # Rol en cualquier posición de la lista de roles (p. ej. secundario): no usa índice,
+        # recorre todas las filas del rango de fechas
+        clauses.append("instr(lower(role), ?) > 0")
+        params.append(role.lower())
+    elif role:
+        # Rol principal: resuelto con el índice (extraction_date, primary_role)
+        clauses.append("primary_role = ? COLLATE NOCASE")
+        params.append(role)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def select_columns(columns=None):
+    """
+    Columnas pedidas en el orden de COLUMNS (todas si no se pide ninguna).
+    Lanza ValueError si alguna no existe, en lugar de ignorarla.
+    """
+    if not columns:
+        return list(COLUMNS)
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+def query_history(start_date=None, end_date=None, hero_ids=None, hero_names=None, role=None,
+                  columns=None, limit=None, offset=0, parse_dates=True, db_path=None, any_role=False):
+    """
+    Filas del frame de análisis que cumplen los filtros, en el orden del origen.
+    Los filtros de fecha, héroe y rol principal se resuelven con los índices; el
+    coste depende de las filas devueltas, no de la longitud del histórico. Con
+    any_role=True el rol se busca en toda la lista de roles (sin índice).
+    """
+    columns = select_columns(columns)
+    where, params = _where(start_date, end_date, hero_ids, hero_names, role, any_role)
+    sql = f"SELECT {', '.join(columns)} FROM hero_rates{where} ORDER BY extraction_date, source_row"
+    if limit is not None or offset:
+        sql += " LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else int(limit), int(offset)]
+    df = pd.read_sql_query(sql, connect(db_path), params=params)
+    if parse_dates and "extraction_date" in df.columns:
+        df["extraction_date"] = pd.to_datetime(df["extraction_date"])
+    return df
+
+def count_history(start_date=None, end_date=None, hero_ids=None, hero_names=None, role=None, db_path=None,
+                  any_role=False):
+    where, params = _where(start_date, end_date, hero_ids, hero_names, role, any_role)
+    return connect(db_path).execute(f"SELECT COUNT(*) FROM hero_rates{where}", params).fetchone()[0]
+
+def hero_history(hero, days=14, end_date=None, db_path=None):
+    """Un héroe (ID o nombre) en los últimos 'days' días hasta 'end_date' (por defecto la última fecha)."""
+    end = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp(latest_date(db_path))
+    start = end - pd.Timedelta(days=days - 1)
+    if str(hero).isdigit():
+        return query_history(start, end, hero_ids=[int(hero)], db_path=db_path)
+    return query_history(start, end, hero_names=[hero], db_path=db_path)
+
+def heroes_on(date, role=None, db_path=None, any_role=False):
+    """Todos los héroes de una fecha (opcionalmente de un rol principal, o de cualquier rol con any_role)."""
+    return query_history(date, date, role=role, db_path=db_path, any_role=any_role)
+
+def latest_date(db_path=None):
+    return connect(db_path).execute("SELECT MAX(extraction_date) FROM hero_rates").fetchone()[0]
+
+def store_version(db_path=None):
+    """Huella del contenido cargado (cambia con cada fecha nueva o recargada)."""
+    rows = connect(db_path).execute("SELECT extraction_date, source_fingerprint FROM sync_state "
+                                    "ORDER BY extraction_date").fetchall()
+    return hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()[:16] if rows else None
+
+# ----------------------------------------------------
+# --- 5. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén SQLite indexado del histórico preprocesado")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = subparsers.add_parser("load-csv", help="Carga masiva desde el CSV histórico")
+    load_parser.add_argument("--csv", default=historical_store.LEGACY_CSV_PATH)
+    load_parser.add_argument("--db", default=DB_PATH)
+
+    sync_parser = subparsers.add_parser("sync", help="Carga las fechas nuevas o cambiadas del histórico")
+    sync_parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+    sync_parser.add_argument("--db", default=DB_PATH)
+
+    query_parser = subparsers.add_parser("query", help="Consulta de prueba (muestra el tiempo)")
+    query_parser.add_argument("--hero", default=None, help="Nombre o ID (últimos --days días)")
+    query_parser.add_argument("--days", type=int, default=14)
+    query_parser.add_argument("--date", default=None, help="Todos los héroes de una fecha")
+    query_parser.add_argument("--role", default=None, help="Rol principal")
+    query_parser.add_argument("--any-role", action="store_true", help="El rol en cualquier posición (sin índice)")
+    query_parser.add_argument("--db", default=DB_PATH)
+
+    args = parser.parse_args()
+    if args.command == "load-csv":
+        bulk_load_csv(args.csv, args.db)
+    elif args.command == "sync":
+        sync_store(args.source, db_path=args.db)
+    elif args.command == "query":
+        start = time.perf_counter()
+        if args.hero:
+            df = hero_history(args.hero, args.days, args.date, db_path=args.db)
+        else:
+            df = heroes_on(args.date or latest_date(args.db), args.role, db_path=args.db, any_role=args.any_role)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(df.to_string(index=False))
+        print(f"⏱️ {len(df)} filas en {elapsed_ms:.1f} ms")
@@ -0,0 +1,372 @@
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import historical_store, preprocess_cache
+from src.parsing import decode_blob, parse_rate_column
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+# Esquema en estrella derivado del histórico:
+# - dim_hero: atributos del héroe (nombre, imagen, roles y líneas por ID), con una
+#   versión nueva solo cuando cambian ('valid_from' = primera fecha de la versión).
+# - dim_role / dim_lane: catálogo de roles y líneas (ID, título, icono).
+# - dim_relation: relaciones assist/strong/weak por versión del héroe.
+# - fact_rates: tabla diaria estrecha y numérica (una fila por héroe y fecha),
+#   particionada por extraction_date igual que el histórico.
+STAR_DIR = os.path.join(historical_store.DATA_DIR, "star")
+FACT_DIR_NAME = "fact_rates"
+DIMENSION_TABLES = ("dim_hero", "dim_role", "dim_lane", "dim_relation")
+MANIFEST_TABLE = "manifest"
+
+RELATION_TYPES = ("assist", "strong", "weak")
+
+# Columnas del histórico que alimentan el esquema
+SOURCE_COLUMNS = ["hero_id", "hero.data.name", "hero.data.smallmap", "hero.data.sortid", "hero.data.roadsort",
+                  "_createdAt", "_updatedAt", "sourceId", "data", historical_store.PARTITION_COLUMN] + \
+                 [f"relation.{r}.target_hero_id" for r in RELATION_TYPES]
+
+# ----------------------------------------------------
+# --- 2. NORMALIZACIÓN DE UNA PARTICIÓN ---
+# ----------------------------------------------------
+
+def _catalog_items(value, id_key, title_key, icon_key):
+    """[(id, título, icono), ...] de un blob de roles/líneas, en el orden del blob."""
+    items = decode_blob(value) if isinstance(value, str) else value
+    if not isinstance(items, list):
+        return []
+    out = []
+    for item in items:
+        data = item.get("data") if isinstance(item, dict) else None
+        if isinstance(data, dict) and data.get(title_key):
+            out.append((str(data.get(id_key)), data[title_key], data.get(icon_key)))
+    return out
+
+def _unique_map(values, func):
+    """Aplica 'func' una vez por valor distinto (los blobs se repiten entre héroes y días)."""
+    cache = {}
+    return [cache[v] if v in cache else cache.setdefault(v, func(v)) for v in values]
+
+def _id_list(value):
+    parsed = decode_blob(value) if isinstance(value, str) else value
+    if not isinstance(parsed, list):
+        return []
+    # La API rellena las listas con 0 cuando hay menos relaciones que huecos
+    return [int(v) for v in parsed if str(v).isdigit() and int(v) > 0]
+
+def _to_int(values):
+    return pd.to_numeric(pd.Series(values), errors="coerce").astype("Int64").to_numpy()
+
+def normalize_day(df_day, date):
+    """
+    Separa una partición cruda del histórico en la fila de hechos de cada héroe y
+    sus atributos de dimensión. Devuelve (fact, heroes, roles, lanes, relations).
+    """
+    df_day = df_day.reset_index(drop=True)
+    hero_ids = pd.to_numeric(df_day["hero_id"], errors="coerce").astype("int64").to_numpy()
+
+    rates = parse_rate_column(df_day["data"])
+    fact = pd.DataFrame({
+        "hero_id": hero_ids,
+        "win_rate": rates["win_rate"].to_numpy(),
+        "ban_rate": rates["ban_rate"].to_numpy(),
+        "app_rate": rates["app_rate"].to_numpy(),
+        "rate_date": rates["rate_date"],
+        "created_at": _to_int(df_day.get("_createdAt")),
+        "updated_at": _to_int(df_day.get("_updatedAt")),
+        "source_id": _to_int(df_day.get("sourceId")),
+    })
+
+    roles = _unique_map(df_day["hero.data.sortid"], lambda v: _catalog_items(v, "sort_id", "sort_title", "sort_icon"))
+    lanes = _unique_map(df_day["hero.data.roadsort"],
+                        lambda v: _catalog_items(v, "road_sort_id", "road_sort_title", "road_sort_icon"))
+    heroes = pd.DataFrame({
+        "hero_id": hero_ids,
+        "valid_from": date,
+        "hero_name": df_day["hero.data.name"].to_numpy(),
+        "smallmap": df_day.get("hero.data.smallmap", pd.Series(None, index=df_day.index)).to_numpy(),
+        "role_ids": [",".join(i for i, _, _ in items) for items in roles],
+        "lane_ids": [",".join(i for i, _, _ in items) for items in lanes],
+    })
+
+    relation_rows = []
+    for relation in RELATION_TYPES:
+        column = f"relation.{relation}.target_hero_id"
+        if column not in df_day.columns:
+            continue
+        for hero_id, targets in zip(hero_ids, _unique_map(df_day[column], _id_list)):
+            relation_rows += [(hero_id, date, relation, target) for target in targets]
+    relations = pd.DataFrame(relation_rows, columns=["hero_id", "valid_from", "relation", "target_hero_id"])
+    relations = relations.astype({"hero_id": "int64", "target_hero_id": "int64"})
+
+    # El hash de atributos incluye las relaciones: si cambian, hay versión nueva del héroe
+    relation_text = {}
+    for hero_id, _, relation, target in relation_rows:
+        relation_text[hero_id] = f"{relation_text.get(hero_id, '')};{relation}:{target}"
+    heroes["attr_hash"] = [
+        hashlib.sha1("|".join(str(v) for v in (name, smallmap, role_ids, lane_ids, relation_text.get(hero_id, "")))
+                     .encode("utf-8")).hexdigest()[:16]
+        for hero_id, name, smallmap, role_ids, lane_ids
+        in zip(hero_ids, heroes["hero_name"], heroes["smallmap"], heroes["role_ids"], heroes["lane_ids"])
+    ]
+
+    def catalog(items_per_row, prefix):
+        rows = {item[0]: item for items in items_per_row for item in items}
+        return pd.DataFrame(sorted(rows.values()), columns=[f"{prefix}_id", f"{prefix}_title", f"{prefix}_icon"])
+
+    return fact, heroes, catalog(roles, "role"), catalog(lanes, "lane"), relations
+
+# ----------------------------------------------------
+# --- 3. LECTURA Y ESCRITURA DE LAS TABLAS ---
+# ----------------------------------------------------
+
+def _table_path(name, star_dir=None):
+    return os.path.join(star_dir or STAR_DIR, f"{name}.parquet")
+
+def fact_dir(star_dir=None):
+    return os.path.join(star_dir or STAR_DIR, FACT_DIR_NAME)
+
+def load_table(name, star_dir=None):
+    path = _table_path(name, star_dir)
+    return pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame()
+
+def _save_table(name, df, star_dir=None):
+    path = _table_path(name, star_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False, compression="zstd")
+    os.replace(tmp_path, path)
+
+def _write_fact(fact, date, star_dir=None):
+    path = historical_store.partition_path(date, fact_dir(star_dir))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(pa.Table.from_pandas(fact, preserve_index=False), tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+def built_partitions(star_dir=None):
+    """{fecha: huella de la partición del histórico con la que se construyeron sus hechos}."""
+    manifest = load_table(MANIFEST_TABLE, star_dir)
+    return dict(zip(manifest["date"], manifest["source_fingerprint"])) if not manifest.empty else {}
+
+def _merge_versions(existing, new, key):
+    """
+    Dimensión versionada: reemplaza las versiones de la fecha que llega y añade
+    solo las filas cuyo 'attr_hash' difiere de la versión vigente en esa fecha.
+    Devuelve (dimensión, filas añadidas, claves (key, valid_from) reemplazadas).
+    """
+    replaced = pd.MultiIndex.from_frame(new[[key, "valid_from"]])
+    if existing.empty:
+        return new.reset_index(drop=True), new, replaced
+    existing = existing[~pd.MultiIndex.from_frame(existing[[key, "valid_from"]]).isin(replaced)]
+    previous = existing[[key, "valid_from", "attr_hash"]].rename(columns={"valid_from": "current_from",
+                                                                         "attr_hash": "current_hash"})
+    current = pd.merge_asof(new.assign(_on=pd.to_datetime(new["valid_from"])).sort_values("_on"),
+                            previous.assign(_on=pd.to_datetime(previous["current_from"])).sort_values("_on"),
+                            on="_on", by=key, direction="backward")
+    changed = current.loc[current["attr_hash"] != current["current_hash"], list(new.columns)]
+    merged = pd.concat([existing, changed], ignore_index=True).sort_values([key, "valid_from"], kind="stable")
+    return merged.reset_index(drop=True), changed, replaced
+
+def _merge_catalog(existing, new, key):
+    if existing.empty:
+        return new, not new.empty
+    merged = (pd.concat([existing, new], ignore_index=True)
+                .drop_duplicates(key, keep="last").sort_values(key, kind="stable").reset_index(drop=True))
+    return merged, not merged.equals(existing.reset_index(drop=True))
+
+# ----------------------------------------------------
+# --- 4. ACTUALIZACIÓN INCREMENTAL ---
+# ----------------------------------------------------
+
+def update_star_schema(source=None, dates=None, star_dir=None, force=False):
+    """
+    Mantiene el esquema en estrella al día con el histórico. Solo se procesan las
+    fechas nuevas o cuya partición cambió (según su huella) o las de 'dates'.
+    Las dimensiones se reescriben únicamente si alguna fila cambia.
+    """
+    source = source or historical_store.default_source()
+    available = historical_store.list_partition_dates(source)
+    manifest = load_table(MANIFEST_TABLE, star_dir)
+    known = built_partitions(star_dir)
+    is_csv = str(source).lower().endswith(".csv")
+
+    def fingerprint(date):
+        path = source if is_csv else historical_store.partition_path(date, source)
+        return preprocess_cache.file_fingerprint(path)
+
+    if dates is None:
+        dates = [d for d in available if force or known.get(d) != fingerprint(d)]
+    dates = {d for d in dates if d in available}
+    # Reprocesar una fecha ya conocida puede crear o quitar una versión de héroe, y
+    # con ella cambiar si la fecha siguiente abre versión: se reprocesa también
+    for date in list(dates):
+        following = available.index(date) + 1
+        if date in known and following < len(available) and available[following] in known:
+            dates.add(available[following])
+    dates = sorted(dates)
+    if not dates:
+        return []
+
+    dims = {name: load_table(name, star_dir) for name in DIMENSION_TABLES}
+    changed_dims = set()
+    entries = []
+    df_csv = historical_store.load_history(source, columns=SOURCE_COLUMNS) if is_csv else None
+    for date in dates:
+        if is_csv:
+            df_day = df_csv[pd.to_datetime(df_csv[historical_store.PARTITION_COLUMN]).dt.strftime("%Y-%m-%d") == date]
+        else:
+            df_day = historical_store.load_history(source, start_date=date, end_date=date, columns=SOURCE_COLUMNS)
+        if df_day.empty:
+            continue
+        df_day = df_day.drop_duplicates("hero_id", keep="last").sort_values("hero_id", kind="stable")
+        fact, heroes, roles, lanes, relations = normalize_day(df_day, date)
+        _write_fact(fact, date, star_dir)
+
+        previous_heroes = dims["dim_hero"]
+        dims["dim_hero"], new_versions, replaced = _merge_versions(previous_heroes, heroes, "hero_id")
+        if not dims["dim_hero"].equals(previous_heroes.reset_index(drop=True)):
+            changed_dims.update(("dim_hero", "dim_relation"))
+            dim_relation = dims["dim_relation"]
+            if not dim_relation.empty:
+                dim_relation = dim_relation[~pd.MultiIndex.from_frame(
+                    dim_relation[["hero_id", "valid_from"]]).isin(replaced)]
+            new_relations = relations.merge(new_versions[["hero_id", "valid_from"]], on=["hero_id", "valid_from"])
+            dims["dim_relation"] = (pd.concat([dim_relation, new_relations], ignore_index=True)
+                                      .sort_values(["hero_id", "valid_from"], kind="stable").reset_index(drop=True))
+        for name, table, key in (("dim_role", roles, "role_id"), ("dim_lane", lanes, "lane_id")):
+            dims[name], changed = _merge_catalog(dims[name], table, key)
+            if changed:
+                changed_dims.add(name)
+        entries.append({"date": date, "source_fingerprint": fingerprint(date), "rows": len(fact)})
+
+    for name in changed_dims:
+        _save_table(name, dims[name], star_dir)
+    if not manifest.empty:
+        manifest = manifest[~manifest["date"].isin([e["date"] for e in entries])]
+    manifest = pd.concat([manifest, pd.DataFrame(entries)], ignore_index=True).sort_values("date").reset_index(drop=True)
+    _save_table(MANIFEST_TABLE, manifest, star_dir)
+
+    print(f"⭐ Esquema en estrella actualizado para {len(entries)} fecha(s)"
+          f" (dimensiones reescritas: {', '.join(sorted(changed_dims)) or 'ninguna'}).")
+    return [e["date"] for e in entries]
+
+def rebuild_star_schema(source=None, star_dir=None):
+    star_dir = star_dir or STAR_DIR
+    if os.path.isdir(star_dir):
+        shutil.rmtree(star_dir)
+    return update_star_schema(source, star_dir=star_dir, force=True)
+
+# ----------------------------------------------------
+# --- 5. RECONSTRUCCIÓN DEL FRAME DE ANÁLISIS ---
+# ----------------------------------------------------
+
+def _titles_by_ids(id_lists, catalog, key, title):
+    """'5,1' -> 'Marksman, Fighter' usando el catálogo (NaN si no hay IDs)."""
+    titles = dict(zip(catalog[key], catalog[title])) if not catalog.empty else {}
+
+    def join(ids):
+        names = [titles[i] for i in ids.split(",") if i in titles] if isinstance(ids, str) and ids else []
+        return ", ".join(names) if names else np.nan
+
+    # Mismo tipo de columna que deja el parseo de los blobs (parsing._map_unique)
+    return pd.Series(_unique_map(id_lists, join), index=id_lists.index).infer_objects()
+
+def load_analysis_frame(start_date=None, end_date=None, hero_ids=None, star_dir=None):
+    """
+    Reconstruye el frame de análisis (mismas columnas derivadas que el preprocesado
+    del histórico) uniendo los hechos diarios con la versión de cada dimensión
+    vigente en su fecha. No decodifica ningún blob: es lo que usa
+    preprocess_cache.load_preprocessed para las fechas que el esquema ya tiene al día.
+    """
+    facts = historical_store.load_history(fact_dir(star_dir), start_date=start_date, end_date=end_date,
+                                          hero_ids=hero_ids)
+    if facts.empty:
+        return pd.DataFrame()
+    facts["extraction_date"] = pd.to_datetime(facts["extraction_date"])
+    facts["hero_id"] = facts["hero_id"].astype("int64")
+
+    dim_hero = load_table("dim_hero", star_dir)
+    dim_hero = dim_hero.assign(valid_from=pd.to_datetime(dim_hero["valid_from"]).astype(facts["extraction_date"].dtype))
+    df = pd.merge_asof(facts.sort_values("extraction_date", kind="stable"),
+                       dim_hero[["hero_id", "valid_from", "hero_name", "role_ids", "lane_ids"]].sort_values("valid_from"),
+                       left_on="extraction_date", right_on="valid_from", by="hero_id", direction="backward")
+    df = df.sort_values(["extraction_date", "hero_id"], kind="stable").reset_index(drop=True)
+
+    df["role"] = _titles_by_ids(df["role_ids"], load_table("dim_role", star_dir), "role_id", "role_title").fillna("Unknown")
+    df["primary_role"] = df["role"].str.split(",").str[0].str.strip()
+    df["lane"] = _titles_by_ids(df["lane_ids"], load_table("dim_lane", star_dir), "lane_id", "lane_title")
+    df["win_rate_pct"] = df["win_rate"] * 100
+    df["ban_rate_pct"] = df["ban_rate"] * 100
+    df["lane_clean"] = df["lane"].str.split(",").str[0].str.strip().fillna("Desconocido")
+
+    columns = ["hero_id", "hero_name", "extraction_date", "win_rate", "ban_rate", "app_rate", "rate_date",
+               "role", "primary_role", "lane", "win_rate_pct", "ban_rate_pct", "lane_clean"]
+    return df[columns].dropna(subset=["hero_name", "win_rate_pct", "ban_rate_pct", "primary_role"]).reset_index(drop=True)
+
+# ----------------------------------------------------
+# --- 6. INFORME DE ALMACENAMIENTO Y CARGA ---
+# ----------------------------------------------------
+
+def _disk_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+def storage_report(source=None, star_dir=None, repeat=3):
+    """Compara tamaño en disco y tiempo de carga del histórico crudo frente al esquema en estrella."""
+    source = source or historical_store.default_source()
+    star_dir = star_dir or STAR_DIR
+    update_star_schema(source, star_dir=star_dir)
+
+    def best_of(func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    # Carga cruda + parseo de blobs (lo que hace el preprocesado sin caché)
+    raw_s = best_of(lambda: preprocess_cache.preprocess_history(
+        historical_store.load_history(source, columns=historical_store.ANALYSIS_COLUMNS)))
+    star_s = best_of(lambda: load_analysis_frame(star_dir=star_dir))
+    raw_mb, star_mb = _disk_size(source) / 1e6, _disk_size(star_dir) / 1e6
+    facts_mb = _disk_size(fact_dir(star_dir)) / 1e6
+
+    print(f"📐 Histórico crudo:   {raw_mb:8.2f} MB  carga+parseo {raw_s:7.3f}s  ({source})")
+    print(f"⭐ Esquema estrella:  {star_mb:8.2f} MB  carga+join   {star_s:7.3f}s  (hechos {facts_mb:.2f} MB)")
+    print(f"   Reducción: {(1 - star_mb / raw_mb) * 100 if raw_mb else 0:.0f}% en disco, "
+          f"{(1 - star_s / raw_s) * 100 if raw_s else 0:.0f}% en tiempo de carga.")
+    return {"raw_mb": raw_mb, "star_mb": star_mb, "facts_mb": facts_mb, "raw_load_s": raw_s, "star_load_s": star_s}
+
+# ----------------------------------------------------
+# --- 7. EJECUCIÓN DEL SCRIPT ---
+# ----------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Esquema en estrella (dimensiones + hechos diarios) del histórico")
+    parser.add_argument("command", choices=("update", "rebuild", "report"))
+    parser.add_argument("--source", default=None, help="Dataset Parquet o CSV histórico")
+    parser.add_argument("--star-dir", default=None, help="Directorio del esquema en estrella")
+
+    args = parser.parse_args()
+    if args.command == "update":
+        update_star_schema(args.source, star_dir=args.star_dir)
+    elif args.command == "rebuild":
+        rebuild_star_schema(args.source, star_dir=args.star_dir)
+    elif args.command == "report":
+        storage_report(args.source, star_dir=args.star_dir)
@@ -1,13 +1,25 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import ast 
 import numpy as np
-import requests  
 from datetime import datetime
 import os
+import sys
 from typing import TYPE_CHECKING
 
+# Añadir el directorio padre al path para importar 'src.*' (streamlit solo añade src/)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from src import dashboard_views
+from src import data_sources
+from src import historical_store
+from src import preprocess_cache
+from src import rate_cube
+from src import rate_series
+from src import rollups
+from src import trends
+
 if TYPE_CHECKING:
     from pandas import DataFrame 
 
@@ -17,106 +29,100 @@ if TYPE_CHECKING:
 
 # Se asume la estructura del proyecto: src/ (este archivo), data/, reports/
 REPORT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'reports'))
-CSV_FILE_PATH = os.path.join(os.path.dirname(__file__),"data", "mobile_legends_data_historical.csv")
-API_URL = "http://127.0.0.1:8000/data"  # Por si quieres usar la API en el futuro
-CSV_URL = "https://raw.githubusercontent.com/STpipa/MLBB-EDA-Project/main/data/mobile_legends_data_historical.csv"
+DATASET_DIR = historical_store.DATASET_DIR  # Histórico Parquet particionado por fecha
+CSV_FILE_PATH = historical_store.LEGACY_CSV_PATH
 
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 # ----------------------------------------------------
-# --- 1. FUNCIONES AUXILIARES GLOBALES ---
+# --- 1. FUNCIÓN DE CARGA Y CACHÉ ---
 # ----------------------------------------------------
 
-def extract_roles(roles_str):
-    if not isinstance(roles_str, str) or pd.isna(roles_str):
-        return "Unknown"
+def current_data_version():
+    """Huella del histórico local; al cambiar invalida la caché de load_data."""
     try:
-        roles_list = ast.literal_eval(roles_str)
-        roles = [item['data']['sort_title'] for item in roles_list if isinstance(item, dict) and 'data' in item]
-        return ', '.join(roles) if roles else "Unknown"
-    except Exception:
-        return "Unknown"
+        return preprocess_cache.source_version(historical_store.default_source()) or "remote"
+    except OSError:
+        return "remote"
+
+@st.cache_data(show_spinner=False)
+def load_data(data_version: str = "remote") -> pd.DataFrame:
+    """
+    Carga datos: primero los orígenes locales (histórico Parquet/CSV y copia de la
+    última descarga remota); si no hay, la API local y el export remoto a la vez.
+    Todos devuelven el mismo esquema ya preprocesado.
+    """
+    try:
+        df, source = data_sources.load_dashboard_data()
+    except Exception as e:
+        st.error(f"No se pudieron cargar los datos: {e}")
+        return pd.DataFrame()
+    if source == "api":
+        st.info("Datos cargados desde API local.")
+    return df
 
-def extract_latest_win_rate(data_str):
-    if not isinstance(data_str, str) or pd.isna(data_str):
-        return np.nan
+def current_series_version() -> str:
+    """Huella del fichero de la serie diaria larga; al cambiar invalida load_series."""
+    if not os.path.exists(rate_series.SERIES_FILE_PATH):
+        return "empty"
+    return preprocess_cache.file_fingerprint(rate_series.SERIES_FILE_PATH)
+
+@st.cache_data(show_spinner=False)
+def load_series(series_version: str = "empty") -> pd.DataFrame:
+    """Serie diaria larga (hero_id, date) para las gráficas de tendencia."""
     try:
-        data_dict = ast.literal_eval(data_str)
-        if 'win_rate' in data_dict and data_dict['win_rate']:
-            if data_dict['win_rate']:
-                return data_dict['win_rate'][-1].get('win_rate')
-        return np.nan
+        df_series = rate_series.load_rate_series()
     except Exception:
-        return np.nan
-        
-def extract_latest_ban_rate(data_str):
-    if not isinstance(data_str, str) or pd.isna(data_str):
-        return np.nan
+        return pd.DataFrame()
+    df_series['win_rate_pct'] = df_series['win_rate'] * 100
+    return df_series
+
+@st.cache_data(show_spinner=False)
+def load_rollups(data_version: str = "remote") -> dict:
+    """Agregados diarios materializados (por rol y meta); vacíos si no existen en local."""
     try:
-        data_dict = ast.literal_eval(data_str)
-        if 'win_rate' in data_dict and data_dict['win_rate']:
-            return data_dict['win_rate'][-1].get('ban_rate') 
-        return np.nan
+        return {name: rollups.load_rollup(name) for name in ("role_stats", "meta_daily")}
     except Exception:
-        return np.nan
+        return {"role_stats": pd.DataFrame(), "meta_daily": pd.DataFrame()}
 
-# ----------------------------------------------------
-# --- 2. FUNCIÓN DE CARGA Y CACHÉ ---
-# ----------------------------------------------------
+@st.cache_data(show_spinner=False)
+def load_trends(data_version: str = "remote") -> pd.DataFrame:
+    """Tendencias (deltas, medias móviles, z-scores) de todos los héroes, una vez por versión de datos."""
+    df = load_data(data_version)
+    if df.empty:
+        return pd.DataFrame()
+    return trends.compute_trends(df)
+
+@st.cache_resource(show_spinner=False)
+def load_views(data_version: str = "remote", series_version: str = "empty") -> "dashboard_views.DashboardViews":
+    """
+    Frames derivados e índice héroe→filas, una vez por versión de datos y de la
+    serie diaria. Es un recurso compartido (sin copia por rerun): cambiar de héroe
+    es una búsqueda O(1) y nada de lo que devuelve se modifica en el layout.
+    """
+    df = load_data(data_version)
+    if df.empty:
+        return None
+    return dashboard_views.DashboardViews(df, load_rollups(data_version), load_trends(data_version),
+                                          load_series(series_version))
+
+def current_cube_version() -> str:
+    """Huella del cubo de rates (fechas y último fichero); al cambiar invalida load_rate_cube."""
+    dates = rate_cube.list_cube_dates()
+    if not dates:
+        return "empty"
+    return f"{len(dates)}-{preprocess_cache.file_fingerprint(rate_cube.cube_path(dates[-1]))}"
 
 @st.cache_data(show_spinner=False)
-def load_data() -> pd.DataFrame:
-    """Carga datos: primero intenta API, luego CSV local, luego CSV remoto"""
-    df = pd.DataFrame()
-    # --- Intentar API ---
+def load_rate_cube(cube_version: str = "empty") -> "rate_cube.RateCube":
+    """Cubo héroe × fecha × rango × modo; los filtros por rango se aplican en memoria con .sel()."""
     try:
-        response = requests.get(API_URL, timeout=3)
-        response.raise_for_status()
-        data = response.json()
-        df = pd.DataFrame(data)
-        st.info("Datos cargados desde API local.")
+        return rate_cube.load_cube()
     except Exception:
-        # st.warning("No se pudieron cargar los datos desde la API. Intentando CSV local...")
-        # --- Intentar CSV local ---
-        try:
-            df = pd.read_csv(CSV_FILE_PATH, quotechar='"', engine='python')
-            # st.info("Datos cargados desde CSV histórico local.")
-        except Exception:
-            # st.warning("CSV local no disponible. Intentando CSV remoto en GitHub...")
-            # --- Intentar CSV remoto ---
-            try:
-                df = pd.read_csv(CSV_URL, quotechar='"', engine='python')
-                #st.info("Datos cargados desde CSV remoto en GitHub.")
-            except Exception as e:
-                st.error(f"No se pudieron cargar los datos: {e}")
-                return pd.DataFrame()
-    
-        # 1. Aplicar funciones de parseo a la columna CRUDA 'data'
-        df['win_rate'] = df['data'].apply(extract_latest_win_rate)
-        df['ban_rate'] = df['data'].apply(extract_latest_ban_rate)
-        # 2. Renombrar columnas clave y crear la columna de rol
-        df.rename(columns={'hero.data.name': 'hero_name', 
-                    'hero.data.sortid': 'raw_roles'}, inplace=True)
-                    
-        df['role'] = df['raw_roles'].apply(extract_roles) # Crea la columna 'role'
-        df['primary_role'] = df['role'].apply(lambda x: x.split(',')[0].strip())
-    
-        # 3. Conversiones y limpieza final
-        df['win_rate_pct'] = df['win_rate'] * 100
-        df['ban_rate_pct'] = df['ban_rate'] * 100
-        df['extraction_date'] = pd.to_datetime(df['extraction_date'])
-
-        # Seleccionamos las columnas útiles y limpiamos NaN
-        df_clean = df[['hero_name', 'win_rate_pct', 'ban_rate_pct', 
-                'extraction_date', 'role']].copy()
-        df_clean.dropna(subset=['win_rate_pct', 'ban_rate_pct'], inplace=True)
-        return df
-    except Exception as e:
-        st.error(f"No se pudieron cargar los datos: {e}")
-        return pd.DataFrame()
+        return rate_cube.RateCube.empty()
 
 # ----------------------------------------------------
-# --- 3. LAYOUT DEL DASHBOARD ---
+# --- 2. LAYOUT DEL DASHBOARD ---
 # ----------------------------------------------------
 
 def run_dashboard():
@@ -124,10 +130,11 @@ def run_dashboard():
     st.title("🛡️ MLBB: Análisis de Tendencias del Meta")
 
 
-    # 3.1 Cargar datos
+    # 3.1 Cargar datos (y sus derivados, calculados una vez por versión de datos)
     
-    df = load_data()
-    if df.empty:
+    data_version = current_data_version()
+    views = load_views(data_version, current_series_version())
+    if views is None:
         st.stop()  # Termina si no hay datos
         
         
@@ -135,9 +142,12 @@ def run_dashboard():
     
     
     
-    latest_date = df['extraction_date'].max().date()
+    latest_date = views.latest_date
     st.info(f"Mostrando datos hasta la última fecha de extracción: **{latest_date}**")
 
+    # Import diferido: plotly no retrasa el arranque ni el primer render (título y datos)
+    import plotly.express as px
+
     tab1, tab2, tab3 = st.tabs(["📊 Análisis del Meta", "📈 Tendencia Semanal", "🔍 Detalle por Héroe"])
 
     with tab1:
@@ -145,11 +155,11 @@ def run_dashboard():
 
         # 1. Scatter Plot
         st.header("Gráfico 1: Dominancia del Meta (Win Rate vs Ban Rate)")
-        df_current = df[df['extraction_date'].dt.date == latest_date].copy()
+        df_current = views.df_current
 
         # 2. Comparativa de Roles (Win Rate Promedio)
-        df['primary_role'] = df['role'].apply(lambda x: x.split(',')[0].strip())
-        df_role_winrate = df.groupby('primary_role')['win_rate_pct'].mean().reset_index()
+        # Precalculado desde los agregados por fecha (o el histórico si no existen)
+        df_role_winrate = views.role_winrate
 
         st.subheader("Win Rate Promedio por Rol")
         fig_role = px.bar(
@@ -162,13 +172,41 @@ def run_dashboard():
         )   
         st.plotly_chart(fig_role, use_container_width=True)
 
+        # 3. Meta por rango y modo (cubo de rates; sin recargar datos al cambiar el filtro)
+        cube = load_rate_cube(current_cube_version())
+        if not cube.is_empty:
+            st.subheader("Meta por Rango")
+            col_rank, col_mode = st.columns(2)
+            with col_rank:
+                selected_rank = st.selectbox("Rango", list(cube.ranks))
+            with col_mode:
+                selected_mode = st.selectbox("Modo (match_type)", list(cube.modes))
+
+            cube_date = cube.latest_date
+            df_tier = cube.sel(rank=selected_rank, mode=selected_mode,
+                               start_date=cube_date, end_date=cube_date).to_frame()
+            df_tier = df_tier.merge(views.hero_names, on='hero_id', how='left')
+            if df_tier.empty:
+                st.warning(f"Sin datos para el rango {selected_rank} (modo {selected_mode}) el {cube_date}.")
+            else:
+                fig_tier = px.scatter(
+                    df_tier,
+                    x='ban_rate_pct',
+                    y='win_rate_pct',
+                    color='win_rate_pct',
+                    hover_name='hero_name',
+                    color_continuous_scale=px.colors.sequential.Sunset,
+                    title=f'Win Rate vs. Ban Rate en {selected_rank} (modo {selected_mode}, {cube_date})'
+                )
+                st.plotly_chart(fig_tier, use_container_width=True)
+
 
     with tab2:
         st.header("Resumen del Meta y Tendencias Clave")
 
         # Aseguramos la ruta del archivo de reporte más reciente
         # Esto asume que el reporte se corre el mismo día de la última extracción
-        latest_report_date = df['extraction_date'].max().strftime('%Y%m%d') 
+        latest_report_date = latest_date.strftime('%Y%m%d') 
         report_file_path = f"reports/reporte_tendencia_{latest_report_date}.txt"
     
         try:
@@ -181,12 +219,12 @@ def run_dashboard():
             st.warning(f"⚠️ Reporte de tendencia ({report_file_path}) no encontrado. Asegúrate de haber ejecutado 'python reporting.py'.")
 
             # Asumiendo que has generado un reporte para la fecha más reciente (df.max())
-            latest_report_date = df['extraction_date'].max().strftime('%Y%m%d')
+            latest_report_date = latest_date.strftime('%Y%m%d')
             report_file_path = f"reports/reporte_tendencia_{latest_report_date}.txt"
-        
+
             with open(report_file_path, 'r', encoding='utf-8') as f:
                 report_content = f.read()
-        
+
             st.code(report_content) # Muestra el texto formateado
         except FileNotFoundError:
             st.warning("El reporte de tendencia más reciente no ha sido generado. Ejecuta 'reporting.py'.")
@@ -194,33 +232,25 @@ def run_dashboard():
     with tab3:
         st.header("Detalle y Perfil del Héroe")
     
-        hero_list = sorted(df['hero_name'].unique())
+        hero_list = views.hero_list
         selected_hero = st.selectbox("Selecciona un Héroe", hero_list)
         
-        df_hero = df[df['hero_name'] == selected_hero].copy()
+        # Slice del índice héroe→filas (ya ordenado por fecha; no se copia ni se filtra el histórico)
+        df_hero = views.hero(selected_hero)
 
         if not df_hero.empty:
 
-            # 1. Preparación de Métricas
-            # Ordenamos por fecha para asegurar que la última es la más reciente
-            df_hero.sort_values(by='extraction_date', inplace=True)
+            # 1. Preparación de Métricas: la última fila es la extracción más reciente
             latest_metrics = df_hero.iloc[-1]
 
-            # 2. Cálculo del Delta (Cambio vs. fecha anterior)
-            # Filtramos las dos últimas fechas disponibles para el héroe
-            df_hero_history = df_hero.nlargest(2, 'extraction_date')
-            change = 0.0 
-
-            if len(df_hero_history) == 2:
-                win_rate_latest = df_hero_history.iloc[-1]['win_rate_pct']
-                win_rate_previous = df_hero_history.iloc[0]['win_rate_pct']
-                change = win_rate_latest - win_rate_previous
+            # 2. Cálculo del Delta (cambio vs. la extracción anterior), precalculado del motor de tendencias
+            change = views.hero_delta(latest_metrics['hero_id'])
 
             # 3. Mostrar Metricas Clave (usando st.metric)
             col_metrics_1, col_metrics_2, col_metrics_3 = st.columns(3)
 
             with col_metrics_1:
-                st.metric("Win Rate Actual", f"{latest_metrics['win_rate_pct']:.2f}%")
+                st.metric("Win Rate Actual", f"{latest_metrics['win_rate_pct']:.2f}%", delta=f"{change:+.2f} pp")
 
             with col_metrics_2:
                 st.metric("Ban Rate Actual", f"{latest_metrics['ban_rate_pct']:.2f}%")
@@ -231,16 +261,22 @@ def run_dashboard():
             # 4. Gráfico de Línea de Tendencia (Win Rate histórico del héroe)
             st.subheader(f"Evolución del Win Rate de {selected_hero}")
 
+            # Preferimos la serie diaria completa (tabla larga); si no existe, las extracciones
+            hero_id = latest_metrics.get('hero_id')
+            df_trend = views.hero_series(hero_id)
+            if df_trend.empty:
+                df_trend = df_hero.rename(columns={'extraction_date': 'date'})
+
             fig_trend = px.line(
-                df_hero, 
-                x='extraction_date', 
+                df_trend, 
+                x='date', 
                 y='win_rate_pct', 
-                title='Tendencia Histórica de {selected_hero}',
-                markers=True # Mostrar puntos para cada extracción
+                title=f'Tendencia Histórica de {selected_hero}',
+                markers=True # Mostrar puntos para cada día
             )
 
             # Añadir una línea horizontal para el Win Rate promedio general para contexto
-            avg_win_rate = df['win_rate_pct'].mean()
+            avg_win_rate = views.avg_win_rate
             fig_trend.add_hline(y=avg_win_rate, line_dash="dash", line_color="red",
                                 annotation_text=f"Promedio Meta ({avg_win_rate:.2f}%)") 
 
@@ -254,14 +290,12 @@ def run_dashboard():
     # Mostrar la data cruda (Botón de chequeo)
     if st.checkbox("Mostrar datos crudos para chequeo (última fecha)"):
         st.subheader("Datos de la Última Extracción")
-        df_latest = df[df['extraction_date'].dt.date == latest_date].copy()
-        st.dataframe(df_latest)
+        st.dataframe(df_current)
 
 
     # --- Zona de gráficos: Scatter Plot (Win Rate vs Ban Rate) ---
 
     st.header("Gráfico 1: Dominancia del Meta (Win Rate vs Ban Rate)")
-    df_current = df[df['extraction_date'].dt.date == latest_date].copy()
     
     if 'ban_rate_pct' in df_current.columns and 'win_rate_pct' in df_current.columns:
 
@@ -288,7 +322,7 @@ def run_dashboard():
 
 
 # ----------------------------------------------------
-# --- 4. EJECUCIÓN DEL SCRIPT ---
+# --- 3. EJECUCIÓN DEL SCRIPT ---
 # ----------------------------------------------------
 if __name__ == "__main__":
     run_dashboard()
\ No newline at end of file
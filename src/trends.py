@@ -0,0 +1,81 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio padre al path para importar 'src.*' al ejecutar el script directamente
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+# ----------------------------------------------------
+# ------------- 1. CONFIGURACIÓN ---------------------
+# ----------------------------------------------------
+TREND_HORIZONS = (1, 7, 30)     # Deltas en días naturales
+ROLLING_WINDOW = 7              # Media móvil (días naturales)
+ZSCORE_WINDOW = 30              # Ventana del z-score (días naturales)
+TREND_METRICS = ('win_rate_pct', 'ban_rate_pct')
+
+# Días de histórico previos que necesita el cálculo de una fecha
+LOOKBACK_DAYS = max(max(TREND_HORIZONS), ZSCORE_WINDOW, ROLLING_WINDOW)
+
+# ----------------------------------------------------
+# --- 2. MOTOR DE TENDENCIAS (hero_id, fecha) ---
+# ----------------------------------------------------
+
+def hero_date_table(df):
+    """Tabla indexada por (hero_id, extraction_date), una fila por héroe y día."""
+    columns = ['hero_id', 'extraction_date', 'hero_name', 'primary_role', *TREND_METRICS]
+    # Las métricas se calculan en float64 aunque el frame compacto las guarde en float32
+    return (df[columns]
+            .astype(dict.fromkeys(TREND_METRICS, 'float64'))
+            .sort_values(['hero_id', 'extraction_date'], kind='stable')
+            .drop_duplicates(['hero_id', 'extraction_date'], keep='last')
+            .set_index(['hero_id', 'extraction_date']))
+
+def _to_long(wide, index):
+    """Matriz fecha × héroe -> serie alineada con el índice (hero_id, extraction_date)."""
+    long = wide.stack(future_stack=True).swaplevel().sort_index()
+    return long.reindex(index)
+
+def compute_trends(df, horizons=TREND_HORIZONS, metrics=TREND_METRICS):
+    """
+    Tendencias de todos los héroes y fechas en una sola pasada vectorizada.
+
+    Por cada métrica se pivota a una matriz fecha × héroe sobre el calendario
+    completo (los huecos quedan como NaN) y se calculan, por desplazamiento:
+    - '<metric>_delta_<h>d': cambio frente a h días naturales antes.
+    - '<metric>_delta_prev': cambio frente a la extracción anterior del héroe.
+    - '<metric>_rolling_7d': media móvil de 7 días.
+    - '<metric>_zscore_30d': desviación frente a la media/desviación de los 30 días
+      anteriores (sin incluir el propio punto, que si no atenúa su desviación).
+    """
+    table = hero_date_table(df)
+    trends = table.copy()
+    for metric in metrics:
+        wide = table[metric].unstack('hero_id').asfreq('D')
+        trends[f'{metric}_delta_prev'] = table[metric].groupby(level='hero_id').diff()
+        for horizon in horizons:
+            trends[f'{metric}_delta_{horizon}d'] = _to_long(wide - wide.shift(horizon), table.index)
+        trends[f'{metric}_rolling_{ROLLING_WINDOW}d'] = _to_long(
+            wide.rolling(ROLLING_WINDOW, min_periods=1).mean(), table.index)
+        history = wide.shift(1).rolling(ZSCORE_WINDOW, min_periods=2)
+        mean = history.mean()
+        std = history.std().replace(0, np.nan)
+        trends[f'{metric}_zscore_{ZSCORE_WINDOW}d'] = _to_long((wide - mean) / std, table.index)
+    return trends
+
+def trends_at(trends, date):
+    """Filas de una fecha (índice por hero_id)."""
+    dates = trends.index.get_level_values('extraction_date')
+    return trends[dates == pd.Timestamp(date)].droplevel('extraction_date')
+
+def hero_trend(trends, hero_id, date=None):
+    """Última fila de tendencia de un héroe (o la de una fecha concreta); None si no hay."""
+    if hero_id not in trends.index.get_level_values('hero_id'):
+        return None
+    df_hero = trends.xs(hero_id, level='hero_id')
+    if date is not None:
+        df_hero = df_hero[df_hero.index <= pd.Timestamp(date)]
+    return df_hero.iloc[-1] if not df_hero.empty else None